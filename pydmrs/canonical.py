@@ -0,0 +1,210 @@
+from hashlib import blake2b
+
+
+def _digest(string):
+    """
+    Hashes a string, independently of the Python hash seed (so that hashes can be stored and compared across runs).
+    """
+    return blake2b(string.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def node_label(node):
+    """
+    Returns a string label of a node, consisting of its predicate, carg and sortinfo (but not its node id or span).
+    """
+    return '{!r} {!r} {}'.format(node.pred, node.carg, node.sortinfo)
+
+
+def _adjacency(dmrs):
+    """
+    Returns a dictionary mapping node ids to lists of (direction, link label, neighbour node id).
+    Undirected (None/EQ) links have the same direction from both sides.
+    """
+    neighbours = {nodeid: [] for nodeid in dmrs}
+    for link in dmrs.iter_links():
+        if link.rargname is None and link.post == 'EQ':
+            neighbours[link.start].append(('eq', link.labelstring, link.end))
+            neighbours[link.end].append(('eq', link.labelstring, link.start))
+        else:
+            neighbours[link.start].append(('out', link.labelstring, link.end))
+            neighbours[link.end].append(('in', link.labelstring, link.start))
+    return neighbours
+
+
+def wl_labels(dmrs, rounds=None):
+    """
+    Computes Weisfeiler-Lehman labels of the nodes of a DMRS graph. Initial labels are given by node_label and whether
+    the node is the top or index of the graph, and each round relabels every node by its label together with the
+    multiset of its links' labels and neighbours' labels.
+    :param dmrs A Dmrs object.
+    :param rounds The maximum number of refinement rounds. If None, rounds continue until the partition of the nodes
+    into equally labelled classes is stable.
+    :return A dictionary mapping node ids to labels.
+    """
+    top = dmrs.top.nodeid if dmrs.top is not None else None
+    index = dmrs.index.nodeid if dmrs.index is not None else None
+    labels = {node.nodeid: _digest('{} {:d}{:d}'.format(node_label(node), node.nodeid == top, node.nodeid == index))
+              for node in dmrs.iter_nodes()}
+    if rounds is None:
+        rounds = len(labels)
+    neighbours = _adjacency(dmrs)
+    num_classes = len(set(labels.values()))
+    for _ in range(rounds):
+        labels = {nodeid: _digest(label + '|' + ' '.join(sorted('{}:{}:{}'.format(direction, labelstring, labels[other])
+                                                                for direction, labelstring, other in neighbours[nodeid])))
+                  for nodeid, label in labels.items()}
+        new_num_classes = len(set(labels.values()))
+        if new_num_classes == num_classes:
+            break
+        num_classes = new_num_classes
+    return labels
+
+
+def canonical_hash(dmrs, rounds=None):
+    """
+    Computes an isomorphism-invariant fingerprint of a DMRS graph, based on Weisfeiler-Lehman refinement (see
+    wl_labels). Node ids, spans and graph attributes other than top and index are ignored, so isomorphic graphs always
+    have the same hash, while non-isomorphic graphs have different hashes except in rare, highly symmetric cases.
+    :param dmrs A Dmrs object.
+    :param rounds The maximum number of refinement rounds (by default, until the labels are stable).
+    :return A hexadecimal string.
+    """
+    labels = wl_labels(dmrs, rounds=rounds)
+    links = []
+    for link in dmrs.iter_links():
+        start, end = labels[link.start], labels[link.end]
+        if link.rargname is None and link.post == 'EQ' and end < start:
+            start, end = end, start
+        links.append('{}:{}:{}'.format(start, link.labelstring, end))
+    return _digest(' '.join(sorted(labels.values())) + '|' + ' '.join(sorted(links)))
+
+
+def _refine(colours, neighbours):
+    """
+    Refines a colouring of the nodes until it is equitable, i.e. until equally coloured nodes have the same multiset
+    of link labels and neighbour colours. Colours are ranks, and the order of existing colour classes is preserved.
+    """
+    num_colours = len(set(colours.values()))
+    while True:
+        keys = {nodeid: (colour, tuple(sorted((direction, labelstring, colours[other])
+                                              for direction, labelstring, other in neighbours[nodeid])))
+                for nodeid, colour in colours.items()}
+        ranks = {key: rank for rank, key in enumerate(sorted(set(keys.values())))}
+        colours = {nodeid: ranks[key] for nodeid, key in keys.items()}
+        if len(ranks) == num_colours:
+            return colours
+        num_colours = len(ranks)
+
+
+def _orbits(cell, path, automorphisms):
+    """
+    Computes the orbits of the nodes in a cell under the automorphisms which fix all nodes on the path.
+    :return A function mapping node ids in the cell to a representative of their orbit.
+    """
+    parent = {nodeid: nodeid for nodeid in cell}
+
+    def find(nodeid):
+        while parent[nodeid] != nodeid:
+            nodeid = parent[nodeid]
+        return nodeid
+
+    for automorphism in automorphisms:
+        if all(automorphism[nodeid] == nodeid for nodeid in path):
+            for nodeid in cell:
+                root1, root2 = find(nodeid), find(automorphism[nodeid])
+                if root1 != root2:
+                    parent[max(root1, root2)] = min(root1, root2)
+    return find
+
+
+def canonical_form(dmrs):
+    """
+    Computes an exact canonical form of a DMRS graph, by partition refinement and individualisation. Node ids and spans
+    are ignored, and two graphs are isomorphic (with equal preds, cargs, sortinfos, link labels, top and index) if and
+    only if their canonical forms are equal.
+    :param dmrs A Dmrs object.
+    :return A pair of a canonical renumbering, i.e. a dictionary mapping node ids to consecutive node ids starting
+    from 1, and the canonical byte string of the graph.
+    """
+    top = dmrs.top.nodeid if dmrs.top is not None else None
+    index = dmrs.index.nodeid if dmrs.index is not None else None
+    labels = {node.nodeid: (node_label(node), node.nodeid == top, node.nodeid == index) for node in dmrs.iter_nodes()}
+    ranks = {label: rank for rank, label in enumerate(sorted(set(labels.values())))}
+    neighbours = _adjacency(dmrs)
+    links = list(dmrs.iter_links())
+    best = {}  # certificate and node order of the best leaf
+    # nodes with the same label and the same links to the same neighbours can be swapped
+    automorphisms = []
+    twins = {}
+    for nodeid, label in labels.items():
+        twins.setdefault((label, tuple(sorted(neighbours[nodeid], key=str))), []).append(nodeid)
+    for group in twins.values():
+        group.sort()
+        # transpositions of consecutive nodes, so that those fixing the smallest nodes (explored first) remain
+        for nodeid1, nodeid2 in zip(group, group[1:]):
+            automorphism = {nodeid: nodeid for nodeid in labels}
+            automorphism[nodeid1], automorphism[nodeid2] = nodeid2, nodeid1
+            automorphisms.append(automorphism)
+
+    def certificate(order):
+        positions = {nodeid: n for n, nodeid in enumerate(order, 1)}
+        result = []
+        for link in links:
+            start, end = positions[link.start], positions[link.end]
+            if link.rargname is None and link.post == 'EQ' and end < start:
+                start, end = end, start
+            result.append((start, end, link.labelstring))
+        return tuple(sorted(result))
+
+    def search(colours, path):
+        cells = {}
+        for nodeid, colour in colours.items():
+            cells.setdefault(colour, []).append(nodeid)
+        cell = next((cells[colour] for colour in sorted(cells) if len(cells[colour]) > 1), None)
+        if cell is None:
+            order = sorted(colours, key=colours.get)
+            leaf = certificate(order)
+            if not best or leaf < best['certificate']:
+                best['certificate'] = leaf
+                best['order'] = order
+            elif leaf == best['certificate']:
+                automorphisms.append(dict(zip(best['order'], order)))
+            return
+        explored = []
+        for nodeid in sorted(cell):
+            if explored:
+                # skip nodes equivalent to an explored one, since their subtrees have the same leaves
+                find = _orbits(cell, path, automorphisms)
+                if any(find(nodeid) == find(other) for other in explored):
+                    continue
+            explored.append(nodeid)
+            individualised = {other: (colour, other != nodeid) for other, colour in colours.items()}
+            individual_ranks = {key: rank for rank, key in enumerate(sorted(set(individualised.values())))}
+            search(_refine({other: individual_ranks[key] for other, key in individualised.items()}, neighbours),
+                   path + [nodeid])
+
+    if labels:
+        search(_refine({nodeid: ranks[label] for nodeid, label in labels.items()}, neighbours), [])
+        order = best['order']
+        link_certificate = best['certificate']
+    else:
+        order = []
+        link_certificate = ()
+    lines = []
+    for n, nodeid in enumerate(order, 1):
+        label, is_top, is_index = labels[nodeid]
+        lines.append('node {} {}{}{}'.format(n, label, ' top' if is_top else '', ' index' if is_index else ''))
+    for start, end, labelstring in link_certificate:
+        lines.append('link {} {} {}'.format(start, end, labelstring))
+    renumbering = {nodeid: n for n, nodeid in enumerate(order, 1)}
+    return renumbering, '\n'.join(lines).encode('utf-8')
+
+
+def is_isomorphic(dmrs1, dmrs2):
+    """
+    Checks whether two DMRS graphs are identical up to node ids and spans (see canonical_form).
+    :return True/False
+    """
+    if len(dmrs1) != len(dmrs2) or dmrs1.count_links() != dmrs2.count_links():
+        return False
+    return canonical_form(dmrs1)[1] == canonical_form(dmrs2)[1]
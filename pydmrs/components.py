@@ -87,7 +87,7 @@ class Pred(object):
         """
         if not isinstance(other, Pred):
             raise PydmrsTypeError()
-        if hierarchy is not None and str(self) in hierarchy.get(str(other), ()):
+        if hierarchy is not None and hierarchy_subsumes(hierarchy, other, self):
             return True
         return False
 
@@ -97,7 +97,7 @@ class Pred(object):
         """
         if not isinstance(other, Pred):
             raise PydmrsTypeError()
-        if hierarchy is not None and str(other) in hierarchy.get(str(self), ()):
+        if hierarchy is not None and hierarchy_subsumes(hierarchy, self, other):
             return True
         return type(other) is not Pred
 
@@ -269,7 +269,7 @@ class RealPred(namedtuple('RealPredNamedTuple', ('lemma', 'pos', 'sense')), Pred
         """
         if not isinstance(other, Pred):
             raise PydmrsTypeError()
-        if hierarchy is not None and str(self) in hierarchy.get(str(other), ()):
+        if hierarchy is not None and hierarchy_subsumes(hierarchy, other, self):
             return True
         elif type(other) is Pred:
             return True
@@ -296,7 +296,7 @@ class RealPred(namedtuple('RealPredNamedTuple', ('lemma', 'pos', 'sense')), Pred
         """
         if not isinstance(other, Pred):
             raise PydmrsTypeError()
-        if hierarchy is not None and str(other) in hierarchy.get(str(self), ()):
+        if hierarchy is not None and hierarchy_subsumes(hierarchy, self, other):
             return True
         elif not isinstance(other, RealPred):
             return False
@@ -420,7 +420,7 @@ class GPred(namedtuple('GPredNamedTuple', ('name')), Pred):
         """
         if not isinstance(other, Pred):
             raise PydmrsTypeError()
-        if hierarchy is not None and str(self) in hierarchy.get(str(other), ()):
+        if hierarchy is not None and hierarchy_subsumes(hierarchy, other, self):
             return True
         return type(other) is Pred or (isinstance(other, GPred) and (self.name != '?' and other.name == '?'))
 
@@ -430,7 +430,7 @@ class GPred(namedtuple('GPredNamedTuple', ('name')), Pred):
         """
         if not isinstance(other, Pred):
             raise PydmrsTypeError()
-        if hierarchy is not None and str(other) in hierarchy.get(str(self), ()):
+        if hierarchy is not None and hierarchy_subsumes(hierarchy, self, other):
             return True
         return isinstance(other, GPred) and (self.name == '?' and other.name != '?')
 
@@ -445,6 +445,136 @@ class GPred(namedtuple('GPredNamedTuple', ('name')), Pred):
             return GPred(string)
 
 
+class PredHierarchy(object):
+    """
+    A predicate hierarchy, precompiled for fast subsumption checks.
+    Every predicate is assigned an integer id and a bitset of the ids of its (direct and indirect) more general
+    predicates, so that checking whether one predicate is more specific than another does not require formatting
+    predicates as strings. Like a hierarchy dictionary, it can be passed as the hierarchy argument of pred, node and
+    matching functions, where get(str(pred)) returns the strings of all more specific predicates.
+    """
+
+    def __init__(self, hierarchy=()):
+        """
+        Compile a hierarchy.
+        :param hierarchy A dictionary mapping a predicate to its more specific predicates (predicates or strings), or
+        an iterable of such pairs. Indirect subsumptions are added by transitive closure.
+        """
+        if isinstance(hierarchy, dict):
+            hierarchy = hierarchy.items()
+        self.ids = {}  # pred string -> id
+        self.names = []  # id -> pred string
+        children = []  # id -> set of ids of directly more specific preds
+        for general, specifics in hierarchy:
+            general_id = self._add(general, children)
+            for specific in specifics:
+                children[general_id].add(self._add(specific, children))
+        # transitive closure
+        self.ancestors = [0] * len(self.names)  # id -> bitset of ids of more general preds
+        self._specific = {}  # pred string -> frozenset of strings of more specific preds
+        for general_id in range(len(self.names)):
+            reached = set()
+            agenda = list(children[general_id])
+            while agenda:
+                pred_id = agenda.pop()
+                if pred_id not in reached:
+                    reached.add(pred_id)
+                    agenda.extend(children[pred_id])
+            for pred_id in reached:
+                self.ancestors[pred_id] |= 1 << general_id
+            if reached:
+                self._specific[self.names[general_id]] = frozenset(self.names[pred_id] for pred_id in reached)
+        self._pred_ids = {}  # pred -> id (or None), to avoid formatting preds as strings
+
+    def _add(self, pred, children):
+        name = str(pred)
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+            children.append(set())
+        return self.ids[name]
+
+    @classmethod
+    def from_file(cls, filename):
+        """
+        Read a hierarchy from a file, where every line consists of a predicate followed by its more specific
+        predicates, separated by whitespace. Empty lines and lines starting with '#' are ignored.
+        :param filename The file name.
+        :return A PredHierarchy.
+        """
+        pairs = []
+        with open(filename, 'r') as file:
+            for line in file:
+                preds = line.split()
+                if not preds or preds[0].startswith('#'):
+                    continue
+                preds = [str(Pred.from_string(pred)) for pred in preds]
+                pairs.append((preds[0], preds[1:]))
+        return cls(pairs)
+
+    def pred_id(self, pred):
+        """
+        Get the id of a predicate.
+        :param pred A predicate or predicate string.
+        :return The id, or None if the predicate is not in the hierarchy.
+        """
+        if isinstance(pred, str):
+            return self.ids.get(pred)
+        try:
+            return self._pred_ids[pred]
+        except KeyError:
+            pred_id = self._pred_ids[pred] = self.ids.get(str(pred))
+            return pred_id
+
+    def subsumes(self, general, specific):
+        """
+        Checks whether a predicate is more specific than another according to the hierarchy.
+        :param general A predicate or predicate string.
+        :param specific A predicate or predicate string.
+        :return True/False
+        """
+        general_id = self.pred_id(general)
+        if general_id is None:
+            return False
+        specific_id = self.pred_id(specific)
+        return specific_id is not None and bool(self.ancestors[specific_id] >> general_id & 1)
+
+    def get(self, key, default=None):
+        """
+        Get the strings of all more specific predicates of a predicate string (like a hierarchy dictionary).
+        """
+        return self._specific.get(key, default)
+
+    def __getitem__(self, key):
+        return self._specific[key]
+
+    def __contains__(self, key):
+        return key in self._specific
+
+    def __iter__(self):
+        return iter(self._specific)
+
+    def __len__(self):
+        """
+        Return the number of predicates with more specific predicates
+        """
+        return len(self._specific)
+
+
+def hierarchy_subsumes(hierarchy, general, specific):
+    """
+    Checks whether a predicate is listed as more specific than another in a hierarchy.
+    :param hierarchy A PredHierarchy, or a dictionary mapping predicate strings to collections of strings of more
+    specific predicates (of which only direct entries are consulted).
+    :param general A predicate.
+    :param specific A predicate.
+    :return True/False
+    """
+    if isinstance(hierarchy, PredHierarchy):
+        return hierarchy.subsumes(general, specific)
+    return str(specific) in hierarchy.get(str(general), ())
+
+
 # Sortinfo objects will store features via __slots__
 # Users can define subclasses with additional features
 # The __slots__ of a class and all its parents are concatenated as the 'features' attribute
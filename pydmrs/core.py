@@ -697,6 +697,38 @@ class Dmrs(object):
             explore_set.update(self.get_neighbours(nodeid, nodeids=True) & unvisited_nodeids)
         return unvisited_nodeids
 
+    def span_index(self):
+        """
+        Builds an index of the node spans of this graph, for overlap, containment and covering queries.
+        :return A SpanIndex.
+        """
+        return SpanIndex(self.iter_nodes())
+
+    def canonical_hash(self, rounds=None):
+        """
+        Computes an isomorphism-invariant fingerprint of this graph, ignoring node ids and spans.
+        :param rounds The maximum number of Weisfeiler-Lehman refinement rounds (by default, until stable).
+        :return A hexadecimal string.
+        """
+        from pydmrs.canonical import canonical_hash
+        return canonical_hash(self, rounds=rounds)
+
+    def canonical_form(self):
+        """
+        Computes an exact canonical form of this graph, ignoring node ids and spans.
+        :return A pair of a canonical renumbering (mapping node ids to consecutive node ids starting from 1) and the
+        canonical byte string of the graph.
+        """
+        from pydmrs.canonical import canonical_form
+        return canonical_form(self)
+
+    def is_isomorphic(self, other):
+        """
+        Checks whether this graph and another are identical up to node ids and spans.
+        """
+        from pydmrs.canonical import is_isomorphic
+        return is_isomorphic(self, other)
+
     @classmethod
     def loads_xml(cls, bytestring, encoding=None, **kwargs):
         """
@@ -1141,6 +1173,112 @@ def span_pred_key(node):
     return (node.cfrom, -node.cto, str(node.pred))
 
 
+class SpanIndex(object):
+    """
+    An index of the character spans of DMRS nodes, for logarithmic-time span queries.
+    Nodes are sorted by span_pred_key, and a segment tree over this order stores the minimum and maximum cto of each
+    range, so that overlap, containment and covering queries take O((k + 1) log n) time for k results.
+    Nodes without a span are not indexed. The index does not reflect later changes to the graph.
+    """
+
+    def __init__(self, nodes):
+        """
+        Create a new span index.
+        :param nodes An iterable of nodes (if already sorted by span_pred_key, their order is preserved).
+        """
+        nodes = sorted((node for node in nodes if node.cfrom is not None and node.cto is not None), key=span_pred_key)
+        self.nodeids = [node.nodeid for node in nodes]
+        self.cfroms = [node.cfrom for node in nodes]
+        self.ctos = [node.cto for node in nodes]
+        self.positions = {nodeid: i for i, nodeid in enumerate(self.nodeids)}
+        size = 1
+        while size < len(nodes):
+            size *= 2
+        self._size = size
+        self._min_ctos = [float('inf')] * (2 * size)
+        self._max_ctos = [float('-inf')] * (2 * size)
+        for i, cto in enumerate(self.ctos):
+            self._min_ctos[size + i] = cto
+            self._max_ctos[size + i] = cto
+        for i in range(size - 1, 0, -1):
+            self._min_ctos[i] = min(self._min_ctos[2 * i], self._min_ctos[2 * i + 1])
+            self._max_ctos[i] = max(self._max_ctos[2 * i], self._max_ctos[2 * i + 1])
+
+    def __len__(self):
+        return len(self.nodeids)
+
+    def find_positions(self, start, end, min_cto=None, max_cto=None):
+        """
+        Finds the positions (in span order) in [start, end) whose cto lies within [min_cto, max_cto].
+        :param start First position.
+        :param end Position after the last one.
+        :param min_cto Optional minimum cto.
+        :param max_cto Optional maximum cto.
+        :return A list of positions in ascending order.
+        """
+        positions = []
+        if start >= end:
+            return positions
+        stack = [(1, 0, self._size)]
+        while stack:
+            tree_index, low, high = stack.pop()
+            if high <= start or low >= end:
+                continue
+            if (min_cto is not None and self._max_ctos[tree_index] < min_cto) or \
+                    (max_cto is not None and self._min_ctos[tree_index] > max_cto):
+                continue
+            if high - low == 1:
+                positions.append(low)
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * tree_index + 1, middle, high))
+            stack.append((2 * tree_index, low, middle))
+        return positions
+
+    def max_cto(self, start, end):
+        """
+        Returns the maximum cto of the nodes at positions [start, end) in span order (or None if empty).
+        """
+        start = max(start, 0) + self._size
+        end = min(end, len(self.nodeids)) + self._size
+        result = float('-inf')
+        while start < end:
+            if start & 1:
+                result = max(result, self._max_ctos[start])
+                start += 1
+            if end & 1:
+                end -= 1
+                result = max(result, self._max_ctos[end])
+            start //= 2
+            end //= 2
+        return None if result == float('-inf') else result
+
+    def overlapping(self, cfrom, cto):
+        """
+        Finds the nodes whose span overlaps the span from cfrom to cto (i.e. node.cfrom < cto and node.cto > cfrom).
+        :return A list of node ids, sorted by span_pred_key of the nodes.
+        """
+        end = bisect.bisect_left(self.cfroms, cto)
+        return [self.nodeids[i] for i in self.find_positions(0, end, min_cto=cfrom) if self.ctos[i] > cfrom]
+
+    def contained(self, cfrom, cto):
+        """
+        Finds the nodes whose span lies within the span from cfrom to cto.
+        :return A list of node ids, sorted by span_pred_key of the nodes.
+        """
+        start = bisect.bisect_left(self.cfroms, cfrom)
+        end = bisect.bisect_right(self.cfroms, cto)
+        return [self.nodeids[i] for i in self.find_positions(start, end, max_cto=cto)]
+
+    def covering(self, cfrom, cto):
+        """
+        Finds the nodes whose span covers the span from cfrom to cto (e.g. all nodes covering some characters).
+        :return A list of node ids, sorted by span_pred_key of the nodes.
+        """
+        end = bisect.bisect_right(self.cfroms, cfrom)
+        return [self.nodeids[i] for i in self.find_positions(0, end, min_cto=cto)]
+
+
 def abstractSortDictDmrs(node_key=None, link_key=None):
     """
     For constructing SortDictDmrs objects with the same node_key and link_key functions.
@@ -1,8 +1,8 @@
 import copy
 from pydmrs._exceptions import PydmrsError
-from pydmrs.components import Pred, RealPred, GPred, Sortinfo, EventSortinfo, InstanceSortinfo
+from pydmrs.components import Pred, RealPred, GPred, Sortinfo, EventSortinfo, InstanceSortinfo, hierarchy_subsumes
 from pydmrs.core import Link, Node
-from pydmrs.matching.exact_matching import dmrs_exact_matching
+from pydmrs.matching.exact_matching import CompiledPattern, IncrementalMatching, dmrs_exact_matching
 
 
 class AnchorNode(Node):
@@ -99,10 +99,10 @@ class AnchorNode(Node):
             # GPred and predicate values are either equal or underspecified
             name = other.pred.name if self.pred.name == '?' else self.pred.name
             self.pred = GPred(name)
-        elif type(self.pred) is Pred or str(other.pred) in hierarchy.get(str(self.pred), ()):
+        elif type(self.pred) is Pred or hierarchy_subsumes(hierarchy, self.pred, other.pred):
             # predicate is underspecified, or predicate is more general according to the hierarchy
             self.pred = other.pred
-        elif type(other.pred) is Pred or str(self.pred) in hierarchy.get(str(other.pred), ()):
+        elif type(other.pred) is Pred or hierarchy_subsumes(hierarchy, other.pred, self.pred):
             # other is underspecified, or predicate is more specific according to the hierarchy
             pass
         else:
@@ -172,24 +172,13 @@ class OptionalNode(AnchorNode):
         self.requires_target = False
 
 
-def dmrs_mapping(dmrs, search_dmrs, replace_dmrs, equalities=(), hierarchy=None, copy_dmrs=True, iterative=True, all_matches=True, require_connected=True, max_matches=100):
+def anchor_mapping(search_dmrs, replace_dmrs):
     """
-    Performs an exact DMRS (sub)graph matching of a (sub)graph against a containing graph.
-    :param dmrs DMRS graph to map.
+    Extracts the mapping of anchor nodes between a search and a replace graph.
     :param search_dmrs DMRS subgraph to replace.
     :param replace_dmrs DMRS subgraph to replace with.
-    :param equalities
-    :param hierarchy An optional predicate hierarchy.
-    :param copy_dmrs True if DMRS graph argument should be copied before being mapped.
-    :param iterative True if all possible mappings should be performed iteratively to the same DMRS graph, instead of a separate copy per mapping (iterative=False requires copy_dmrs=True).
-    :param all_matches True if all possible matches should be returned, instead of only the first (or None).
-    :param require_connected True if mappings resulting in a disconnected DMRS graph should be ignored.
-    :param max_matches: Maximum number of matches.
-    :return Mapped DMRS graph (resp. a list of graphs in case of iterative=False and all_matches=True)
+    :return A pair of a dictionary mapping node ids of anchor nodes in search_dmrs to the corresponding node ids in replace_dmrs, and a list of node ids of optional nodes in search_dmrs.
     """
-    assert copy_dmrs or iterative, 'Invalid argument combination.'
-
-    # extract anchor node mapping between search_dmrs and replace_dmrs
     sub_mapping = {}
     optional_nodeids = []
     for search_node in search_dmrs.iter_nodes():
@@ -204,23 +193,56 @@ def dmrs_mapping(dmrs, search_dmrs, replace_dmrs, equalities=(), hierarchy=None,
             sub_mapping[search_node.nodeid] = replace_node.nodeid
         if search_node.nodeid not in sub_mapping:
             assert not search_node.requires_target, 'Un-matched anchor node.'
+    return sub_mapping, optional_nodeids
+
+
+def dmrs_mapping(dmrs, search_dmrs, replace_dmrs, equalities=(), hierarchy=None, copy_dmrs=True, iterative=True, all_matches=True, require_connected=True, max_matches=100, corpus_index=None, graph_id=None, budget=None, anchors=None):
+    """
+    Performs an exact DMRS (sub)graph matching of a (sub)graph against a containing graph.
+    :param dmrs DMRS graph to map.
+    :param search_dmrs DMRS subgraph to replace.
+    :param replace_dmrs DMRS subgraph to replace with.
+    :param equalities
+    :param hierarchy An optional predicate hierarchy.
+    :param copy_dmrs True if DMRS graph argument should be copied before being mapped.
+    :param iterative True if all possible mappings should be performed iteratively to the same DMRS graph, instead of a separate copy per mapping (iterative=False requires copy_dmrs=True). Matchings are updated incrementally after every mapping (see IncrementalMatching), so mapping continues until no (new) matching is left.
+    :param all_matches True if all possible matches should be returned, instead of only the first (or None).
+    :param require_connected True if mappings resulting in a disconnected DMRS graph should be ignored.
+    :param max_matches: Maximum number of matches.
+    :param corpus_index: An optional CorpusIndex containing dmrs, to skip matching if dmrs cannot contain search_dmrs.
+    :param graph_id: The id of dmrs in corpus_index (required if corpus_index is given).
+    :param budget: An optional MatchBudget for matching, which flags whether the matches are truncated.
+    :param anchors: The precomputed anchor mapping of search_dmrs and replace_dmrs (see anchor_mapping).
+    :return Mapped DMRS graph (resp. a list of graphs in case of iterative=False and all_matches=True)
+    """
+    assert copy_dmrs or iterative, 'Invalid argument combination.'
+    assert corpus_index is None or graph_id is not None, 'Graph id has to be specified for the corpus index.'
+
+    # extract anchor node mapping between search_dmrs and replace_dmrs
+    if anchors is None:
+        anchors = anchor_mapping(search_dmrs, replace_dmrs)
+    sub_mapping, optional_nodeids = anchors
 
     # set up variables according to settings
     if iterative:
         result_dmrs = copy.deepcopy(dmrs) if copy_dmrs else dmrs
-        matchings = dmrs_exact_matching(search_dmrs, dmrs, optional_nodeids=optional_nodeids, equalities=equalities, hierarchy=hierarchy, match_top_index=True)
+    if corpus_index is not None and not corpus_index.may_match(graph_id, search_dmrs, optional_nodeids=optional_nodeids, hierarchy=hierarchy):
+        # dmrs lacks a fully specified element of search_dmrs
+        matchings = iter(())
+    elif iterative:
+        pattern = CompiledPattern(search_dmrs, optional_nodeids=optional_nodeids, equalities=equalities, hierarchy=hierarchy, match_top_index=True)
+        # the initial matchings are only valid for unmodified nodes, and equalities are evaluated on the graph itself
+        initial_dmrs = copy.deepcopy(dmrs) if pattern.equalities and not copy_dmrs else dmrs
+        matchings = IncrementalMatching(pattern, result_dmrs, matchings=pattern.match(initial_dmrs, budget=budget), budget=budget)
     else:
-        matchings = dmrs_exact_matching(search_dmrs, dmrs, optional_nodeids=optional_nodeids, equalities=equalities, hierarchy=hierarchy, match_top_index=True)
+        matchings = dmrs_exact_matching(search_dmrs, dmrs, optional_nodeids=optional_nodeids, equalities=equalities, hierarchy=hierarchy, match_top_index=True, budget=budget)
     if not iterative and all_matches:
         result = []
 
     # continue while there is a match for search_dmrs
     count = 0
     for _ in range(max_matches):
-        if iterative:
-            pass
-            # matchings = dmrs_exact_matching(search_dmrs, result_dmrs, optional_nodeids=optional_nodeids, equalities=equalities, hierarchy=hierarchy, match_top_index=True)
-        else:
+        if not iterative:
             result_dmrs = copy.deepcopy(dmrs) if copy_dmrs else dmrs
 
         # return mapping(s) if there are no more matches left
@@ -247,6 +269,10 @@ def dmrs_mapping(dmrs, search_dmrs, replace_dmrs, equalities=(), hierarchy=None,
             else:
                 return result
 
+        if iterative:
+            nodeids = set(result_dmrs)
+            top_index = tuple(node.nodeid if node is not None else None for node in (result_dmrs.top, result_dmrs.index))
+
         # remove nodes in the matched search_dmrs if they are no anchor nodes, otherwise perform mapping()
         # mapping() performs the mapping process (with whatever it involves) specific to this node type (e.g. fill underspecified values)
         for nodeid in search_dmrs:
@@ -290,8 +316,19 @@ def dmrs_mapping(dmrs, search_dmrs, replace_dmrs, equalities=(), hierarchy=None,
             link = Link(replace_matching[link.start], replace_matching[link.end], link.rargname, link.post)
             result_dmrs.add_link(link)
 
-        # add/return result
-        if not require_connected or result_dmrs.is_connected():
+        # update the matchings for the modified nodes: removed and added nodes, and nodes of both matchings
+        if isinstance(matchings, IncrementalMatching):
+            nodeids.symmetric_difference_update(result_dmrs)
+            nodeids.update(search_matching.values())
+            nodeids.update(replace_matching.values())
+            for nodeid, node in zip(top_index, (result_dmrs.top, result_dmrs.index)):
+                if node is None or node.nodeid != nodeid:
+                    nodeids.add(nodeid)
+                    nodeids.add(node.nodeid if node is not None else None)
+            matchings.update(nodeids, image=replace_matching.values())
+
+        # add/return result (iterative mapping of all matches only checks connectedness at the end)
+        if (all_matches and iterative) or not require_connected or result_dmrs.is_connected():
             if all_matches and not iterative:
                 result.append(result_dmrs)
             elif not all_matches:
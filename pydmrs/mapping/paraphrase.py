@@ -1,7 +1,15 @@
+import copy
+import hashlib
+import os
+import pickle
 import sys
+import time
+from collections import namedtuple
+from collections.abc import Sequence
 from pydmrs.core import Dmrs, ListDmrs
-from pydmrs.mapping.mapping import dmrs_mapping
+from pydmrs.mapping.mapping import anchor_mapping, dmrs_mapping
 from pydmrs.graphlang.graphlang import parse_graphlang
+from pydmrs.matching.corpus_index import graph_keys, pattern_requirements
 
 
 def read_paraphrases_file(filename):
@@ -17,28 +25,370 @@ def read_paraphrases_file(filename):
         except StopIteration:
             assert False, 'Invalid paraphrases file format.'
         try:
-            assert not next(lines)
+            assert not next(lines).strip()
         except StopIteration:
             break
     return paraphrases
 
 
+def graph_memory(dmrs):
+    """
+    Estimates the memory used by a DMRS graph, as the total size of all objects reachable from it (see sys.getsizeof).
+    :param dmrs A Dmrs object.
+    :return The size in bytes.
+    """
+    seen = set()
+    size = 0
+    objects = [dmrs]
+    while objects:
+        obj = objects.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            objects.extend(obj.keys())
+            objects.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            objects.extend(obj)
+        if hasattr(obj, '__dict__'):
+            objects.append(obj.__dict__)
+        for cls in type(obj).__mro__:
+            slots = cls.__dict__.get('__slots__', ())
+            for slot in ((slots,) if isinstance(slots, str) else slots):
+                if hasattr(obj, slot):
+                    objects.append(getattr(obj, slot))
+    return size
+
+
+ParaphraseClosure = namedtuple('ParaphraseClosure', ('graphs', 'duplicates', 'memory', 'truncated'))
+ParaphraseClosure.__doc__ = """
+The result of a paraphrase closure: the list of distinct graphs in the order they were found (starting with the
+original graph), the number of duplicate graphs which were discarded, the estimated memory (in bytes) used by the
+graphs and fingerprints, and whether the exploration stopped early because a limit was reached.
+"""
+
+
+class RuleStats(object):
+    """
+    Statistics of a paraphrase rule: the number of graphs it was skipped for (since they lack a required element),
+    the number of graphs it was matched against, the number of graphs it rewrote, and the time spent on matching and
+    rewriting (in seconds).
+    """
+
+    def __init__(self):
+        self.skips = 0
+        self.attempts = 0
+        self.hits = 0
+        self.time = 0.
+
+    def __repr__(self):
+        return 'RuleStats(skips={}, attempts={}, hits={}, time={:.6f})'.format(self.skips, self.attempts, self.hits,
+                                                                             self.time)
+
+
+# version of the compiled paraphrases file format, to be increased whenever the format or the pickled classes change
+COMPILED_FORMAT_VERSION = 1
+
+
+def _file_digest(filename):
+    with open(filename, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _hierarchy_digest(hierarchy):
+    if not hierarchy:
+        return None
+    return hashlib.sha256(repr(sorted((key, sorted(hierarchy[key])) for key in hierarchy)).encode('utf-8')).hexdigest()
+
+
+class _LazyRules(Sequence):
+    """
+    A sequence of pickled rules, which are only unpickled when accessed.
+    """
+
+    def __init__(self, pickled_rules):
+        self.pickled_rules = pickled_rules
+        self.rules = [None] * len(pickled_rules)
+
+    def __len__(self):
+        return len(self.pickled_rules)
+
+    def __getitem__(self, n):
+        rule = self.rules[n]
+        if rule is None:
+            rule = self.rules[n] = pickle.loads(self.pickled_rules[n])
+        return rule
+
+
+class ParaphraseEngine(object):
+    """
+    Applies a sequence of paraphrase rules to DMRS graphs. Rules are indexed by the fully specified predicates, cargs
+    and link labels their search graph requires (see pattern_requirements), so that only rules whose requirements are
+    all contained in a graph are matched against it.
+    """
+
+    def __init__(self, paraphrases, hierarchy=None, requirements=None, anchors=None):
+        """
+        Create a new engine.
+        :param paraphrases A list of (search_dmrs, replace_dmrs) rules, as returned by read_paraphrases_file.
+        :param hierarchy An optional predicate hierarchy.
+        :param requirements Precomputed requirements per rule (see pattern_requirements).
+        :param anchors Precomputed anchor mappings per rule (see anchor_mapping).
+        """
+        self.rules = paraphrases if isinstance(paraphrases, _LazyRules) else list(paraphrases)
+        self.hierarchy = hierarchy
+        if requirements is None:
+            requirements = [pattern_requirements(search_dmrs, hierarchy=hierarchy) for search_dmrs, _ in self.rules]
+        if anchors is None:
+            anchors = [anchor_mapping(search_dmrs, replace_dmrs) for search_dmrs, replace_dmrs in self.rules]
+        assert len(requirements) == len(anchors) == len(self.rules), 'Invalid number of requirements or anchors.'
+        self.requirements = requirements
+        self.anchors = anchors
+        self.postings = {}  # requirement key -> set of rule indices
+        self.stats = [RuleStats() for _ in range(len(self.rules))]
+        for n, rule_requirements in enumerate(self.requirements):
+            for key in rule_requirements:
+                self.postings.setdefault(key, set()).add(n)
+
+    @classmethod
+    def from_file(cls, filename, hierarchy=None, cache=False, compiled_filename=None):
+        """
+        Create an engine from a paraphrases file (see read_paraphrases_file).
+        :param filename The paraphrases file name.
+        :param hierarchy An optional predicate hierarchy.
+        :param cache True if the engine should be loaded from the compiled file if it is up to date, and the compiled
+        file should be (re)written otherwise (see compile_paraphrases_file).
+        :param compiled_filename The compiled file name, by default the paraphrases file name with '.pickle' appended.
+        :return A ParaphraseEngine.
+        """
+        if not cache:
+            return cls(read_paraphrases_file(filename), hierarchy=hierarchy)
+        engine = load_compiled_paraphrases(filename, compiled_filename=compiled_filename, hierarchy=hierarchy)
+        if engine is None:
+            engine = compile_paraphrases_file(filename, compiled_filename=compiled_filename, hierarchy=hierarchy)
+        return engine
+
+    def __len__(self):
+        return len(self.rules)
+
+    def candidates(self, dmrs=None, keys=None):
+        """
+        Find the rules which can possibly match a graph.
+        :param dmrs A Dmrs object.
+        :param keys Precomputed index keys of the graph (see graph_keys), instead of dmrs.
+        :return A set of rule indices.
+        """
+        if keys is None:
+            keys = graph_keys(dmrs)
+        counts = {}
+        for key in keys:
+            for n in self.postings.get(key, ()):
+                counts[n] = counts.get(n, 0) + 1
+        return {n for n, requirements in enumerate(self.requirements) if counts.get(n, 0) == len(requirements)}
+
+    def paraphrase(self, dmrs):
+        """
+        Applies the rules in sequence to a graph, equivalently to matching every rule with dmrs_mapping. As soon as a
+        rule results in a disconnected graph, the graph so far is returned.
+        :param dmrs A Dmrs object (which is not modified).
+        :return The paraphrased Dmrs object.
+        """
+        assert isinstance(dmrs, Dmrs), 'Object in dmrs_iter is not a Dmrs.'
+        candidates = self.candidates(dmrs)
+        connected = None
+        for n in range(len(self.rules)):
+            stats = self.stats[n]
+            if n not in candidates:
+                stats.skips += 1
+                if connected is None:
+                    connected = dmrs.is_connected()
+                if not connected:
+                    # dmrs_mapping rejects a disconnected graph even if there is no match
+                    break
+                continue
+            stats.attempts += 1
+            start = time.perf_counter()
+            search_dmrs, replace_dmrs = self.rules[n]
+            paraphrased_dmrs = copy.deepcopy(dmrs)
+            rewritten = dmrs_mapping(paraphrased_dmrs, search_dmrs, replace_dmrs, hierarchy=self.hierarchy,
+                                     copy_dmrs=False, anchors=self.anchors[n])
+            stats.time += time.perf_counter() - start
+            if rewritten:
+                stats.hits += 1
+                dmrs = paraphrased_dmrs
+                candidates = self.candidates(dmrs)
+                connected = True
+            elif not paraphrased_dmrs.is_connected():
+                break
+        return dmrs
+
+    def closure(self, dmrs, max_depth=None, max_frontier=None, max_graphs=None, max_memory=None, exact=False):
+        """
+        Finds all paraphrases of a graph, by a breadth-first exploration of single rule applications (see dmrs_mapping
+        with iterative=False). Graphs reached more than once, via different rules or matches, are only explored once,
+        since they are identified by a fingerprint (see Dmrs.canonical_hash, or Dmrs.canonical_form if exact).
+        :param dmrs A Dmrs object (which is not modified).
+        :param max_depth Maximum number of rule applications to reach a graph.
+        :param max_frontier Maximum number of graphs to be explored per depth.
+        :param max_graphs Maximum number of distinct graphs.
+        :param max_memory Maximum estimated memory (in bytes, see graph_memory) of the graphs and fingerprints.
+        :param exact True if graphs are identified by their exact canonical form instead of a Weisfeiler-Lehman hash,
+        which avoids (rare) collisions of non-isomorphic graphs.
+        :return A ParaphraseClosure.
+        """
+        assert isinstance(dmrs, Dmrs), 'Object in dmrs_iter is not a Dmrs.'
+
+        def fingerprint(graph):
+            return graph.canonical_form()[1] if exact else graph.canonical_hash()
+
+        key = fingerprint(dmrs)
+        visited = {key}
+        graphs = [dmrs]
+        memory = graph_memory(dmrs) + sys.getsizeof(key)
+        duplicates = 0
+        truncated = False  # whether graphs were not explored
+        stop = False  # whether the graph or memory limit was reached
+        frontier = [dmrs]
+        depth = 0
+        while frontier and not stop:
+            if max_depth is not None and depth >= max_depth:
+                truncated = True
+                break
+            depth += 1
+            next_frontier = []
+            for graph in frontier:
+                candidates = self.candidates(graph)
+                for n in range(len(self.rules)):
+                    stats = self.stats[n]
+                    if n not in candidates:
+                        stats.skips += 1
+                        continue
+                    stats.attempts += 1
+                    start = time.perf_counter()
+                    search_dmrs, replace_dmrs = self.rules[n]
+                    paraphrased = dmrs_mapping(graph, search_dmrs, replace_dmrs, hierarchy=self.hierarchy,
+                                               iterative=False, anchors=self.anchors[n])
+                    stats.time += time.perf_counter() - start
+                    if paraphrased:
+                        stats.hits += 1
+                    for paraphrased_dmrs in paraphrased:
+                        key = fingerprint(paraphrased_dmrs)
+                        if key in visited:
+                            duplicates += 1
+                            continue
+                        size = graph_memory(paraphrased_dmrs) + sys.getsizeof(key)
+                        if (max_graphs is not None and len(graphs) >= max_graphs) or \
+                                (max_memory is not None and memory + size > max_memory):
+                            stop = True
+                            break
+                        visited.add(key)
+                        graphs.append(paraphrased_dmrs)
+                        memory += size
+                        if max_frontier is not None and len(next_frontier) >= max_frontier:
+                            # the graph is kept, but not explored further
+                            truncated = True
+                        else:
+                            next_frontier.append(paraphrased_dmrs)
+                    if stop:
+                        break
+                if stop:
+                    break
+            frontier = next_frontier
+        return ParaphraseClosure(graphs, duplicates, memory, truncated or stop)
+
+    def reset_stats(self):
+        """
+        Reset the rule statistics.
+        """
+        self.stats = [RuleStats() for _ in range(len(self.rules))]
+
+
+def compile_paraphrases_file(filename, compiled_filename=None, hierarchy=None):
+    """
+    Compiles a paraphrases file into a binary file, which contains the parsed rules (pickled separately, so that they
+    can be loaded lazily), their anchor mappings and their index requirements, together with the format version and
+    the hashes of the paraphrases file and hierarchy to detect whether the compiled file is outdated.
+    :param filename The paraphrases file name.
+    :param compiled_filename The compiled file name, by default the paraphrases file name with '.pickle' appended.
+    :param hierarchy An optional predicate hierarchy.
+    :return The ParaphraseEngine for the rules.
+    """
+    if compiled_filename is None:
+        compiled_filename = filename + '.pickle'
+    source_digest = _file_digest(filename)
+    engine = ParaphraseEngine(read_paraphrases_file(filename), hierarchy=hierarchy)
+    compiled = {
+        'version': COMPILED_FORMAT_VERSION,
+        'source': source_digest,
+        'hierarchy': _hierarchy_digest(hierarchy),
+        'requirements': engine.requirements,
+        'anchors': engine.anchors,
+        'rules': [pickle.dumps(rule, protocol=pickle.HIGHEST_PROTOCOL) for rule in engine.rules]
+    }
+    # write to a temporary file first, so that concurrent readers never see a partial file
+    temp_filename = '{}.{}.tmp'.format(compiled_filename, os.getpid())
+    with open(temp_filename, 'wb') as file:
+        pickle.dump(compiled, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_filename, compiled_filename)
+    return engine
+
+
+def load_compiled_paraphrases(filename, compiled_filename=None, hierarchy=None):
+    """
+    Loads the rules of a paraphrases file from its compiled file (see compile_paraphrases_file). Only the rule index is
+    loaded, while the rules themselves are unpickled when they are first matched.
+    :param filename The paraphrases file name.
+    :param compiled_filename The compiled file name, by default the paraphrases file name with '.pickle' appended.
+    :param hierarchy An optional predicate hierarchy.
+    :return The ParaphraseEngine for the rules, or None if the compiled file does not exist or is outdated.
+    """
+    if compiled_filename is None:
+        compiled_filename = filename + '.pickle'
+    try:
+        with open(compiled_filename, 'rb') as file:
+            compiled = pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if not isinstance(compiled, dict) or compiled.get('version') != COMPILED_FORMAT_VERSION or \
+            compiled['source'] != _file_digest(filename) or compiled['hierarchy'] != _hierarchy_digest(hierarchy):
+        return None
+    return ParaphraseEngine(_LazyRules(compiled['rules']), hierarchy=hierarchy, requirements=compiled['requirements'],
+                            anchors=compiled['anchors'])
+
+
+def paraphrase_closure(dmrs, paraphrases, hierarchy=None, **kwargs):
+    """
+    Finds all paraphrases of a graph (see ParaphraseEngine.closure).
+    :param dmrs A Dmrs object.
+    :param paraphrases A list of (search_dmrs, replace_dmrs) rules, or a ParaphraseEngine.
+    :param hierarchy An optional predicate hierarchy (if paraphrases is not an engine).
+    :return A ParaphraseClosure.
+    """
+    if not isinstance(paraphrases, ParaphraseEngine):
+        paraphrases = ParaphraseEngine(paraphrases, hierarchy=hierarchy)
+    return paraphrases.closure(dmrs, **kwargs)
+
+
 def paraphrase(dmrs, paraphrases, hierarchy=None):
     """
+    Applies a sequence of paraphrase rules to a graph (see ParaphraseEngine.paraphrase).
+    :param dmrs A Dmrs object.
+    :param paraphrases A list of (search_dmrs, replace_dmrs) rules, or a ParaphraseEngine (which is preferable for
+    paraphrasing several graphs, since rules are indexed only once).
+    :param hierarchy An optional predicate hierarchy (if paraphrases is not an engine).
+    :return The paraphrased Dmrs object.
     """
-    assert isinstance(dmrs, Dmrs), 'Object in dmrs_iter is not a Dmrs.'
-    for (search_dmrs, replace_dmrs) in paraphrases:
-        paraphrased_dmrs = dmrs_mapping(dmrs, search_dmrs, replace_dmrs, hierarchy=hierarchy)
-        if paraphrased_dmrs is None:
-            break
-        else:
-            dmrs = paraphrased_dmrs
-    return dmrs
+    if not isinstance(paraphrases, ParaphraseEngine):
+        paraphrases = ParaphraseEngine(paraphrases, hierarchy=hierarchy)
+    return paraphrases.paraphrase(dmrs)
 
 
 if __name__ == '__main__':
     assert len(sys.argv) == 2 and not sys.stdin.isatty(), 'Invalid arguments'
-    paraphrases = read_paraphrases_file(sys.argv[1])
+    engine = ParaphraseEngine.from_file(sys.argv[1], cache=True)
     for line in sys.stdin:
         dmrs = ListDmrs.loads_xml(line[:-1])
-        sys.stdout.write(str(paraphrase(dmrs, paraphrases)) + '\n')
+        sys.stdout.write(str(engine.paraphrase(dmrs)) + '\n')
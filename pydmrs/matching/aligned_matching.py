@@ -1,10 +1,69 @@
-from pydmrs.core import SortDictDmrs, span_pred_key, abstractSortDictDmrs
-from pydmrs.matching.common import are_equal_links
+import bisect
+
+from pydmrs.core import SortDictDmrs, SpanIndex, span_pred_key, abstractSortDictDmrs
+from pydmrs.matching.common import CompatibilityCache
+
+
+FILTERED_PREDS = ('compound', 'compound_name')
+
+
+def _get_quantifier_link(dmrs, nodeid):
+    """ Returns a RSTR/H link ending in nodeid, or None. """
+    links = dmrs.get_in(nodeid, rargname='RSTR', post='H')
+    return links.pop() if links else None
+
+
+class PreparedAlignedTarget(object):
+    """
+    A large DMRS prepared once for repeated aligned matching of many small DMRS against it. Caches the
+    span_pred_key-sorted nodes, the nodes without quantifiers and compounds, the quantifier RSTR links, the compounds
+    (found on first use) and a SpanIndex of the node spans. Can be used wherever large_dmrs is accepted in this
+    module.
+    """
+
+    def __init__(self, dmrs, compound_preds=FILTERED_PREDS):
+        """
+        :param dmrs: The large DMRS.
+        :param compound_preds: Predicate strings of compounds, which are not aligned directly.
+        """
+        if not isinstance(dmrs, SortDictDmrs) or (dmrs.node_key != span_pred_key):
+            dmrs = dmrs.convert_to(abstractSortDictDmrs(node_key=span_pred_key))
+        self.dmrs = dmrs
+        self.compound_preds = tuple(compound_preds)
+        self.nodes = list(dmrs.nodes)
+        self.span_index = SpanIndex(self.nodes)
+        self.filtered_nodes = [n for n in self.nodes
+                               if not dmrs.is_quantifier(n.nodeid) and str(n.pred) not in self.compound_preds]
+        self.quantifier_links = {}
+        for node in self.nodes:
+            link = _get_quantifier_link(dmrs, node.nodeid)
+            if link is not None:
+                self.quantifier_links[node.nodeid] = link
+        self._compounds = None
+
+    @property
+    def compounds(self):
+        """ The compounds of the DMRS (see get_compounds), which are only needed if a match is found. """
+        if self._compounds is None:
+            self._compounds = get_compounds(self.dmrs, self.compound_preds)
+        return self._compounds
+
+    def __getitem__(self, nodeid):
+        return self.dmrs[nodeid]
+
+
+def _get_dmrs(dmrs):
+    """ Returns the DMRS of a PreparedAlignedTarget, or the argument itself. """
+    return dmrs.dmrs if isinstance(dmrs, PreparedAlignedTarget) else dmrs
 
 
 # ------------------------------------------------------------------------
 def match_nodes(nodes1, nodes2, excluded=[]):
     """
+    Finds the longest alignments of two node sequences (longest common subsequences), where each node of nodes2 is
+    aligned with the first equal node of nodes1 after the previously aligned one.
+    The alignment lengths are computed by dynamic programming in O(len(nodes1) * len(nodes2)), and all alignments of
+    maximal length are enumerated by following the table.
     :param nodes1: A list of Nodes from the DMRS to be matched, sorted by span_pred_key.
     :param nodes2: A list of Nodes from the DMRS against which we match, sorted by span_pred_key.
     :param excluded: A list of nodeids which should not be used for matching.
@@ -15,42 +74,71 @@ def match_nodes(nodes1, nodes2, excluded=[]):
     """
     if not nodes1 or not nodes2:
         return []
-    matches = []
-    earliest = len(nodes1)
-    longest = 0
-    for i, node2 in enumerate(nodes2):
-        if len(nodes2) - i < longest:  # Not enough nodes left to beat the current longest match.
-            break
-        if excluded and node2.nodeid in excluded:
-            continue
-        for j, node1 in enumerate(nodes1):
-            if j > earliest:  # To avoid repetition.
+    excluded = set(excluded) if excluded else ()
+    len1 = len(nodes1)
+    len2 = len(nodes2)
+
+    # next_match[i][j]: position of the first node in nodes1[j:] equal to nodes2[i] (or len1 if none)
+    next_match = []
+    for node2 in nodes2:
+        row = [len1] * (len1 + 1)
+        if node2.nodeid not in excluded:
+            position = len1
+            for j in range(len1 - 1, -1, -1):
+                if nodes1[j] == node2:
+                    position = j
+                row[j] = position
+        next_match.append(row)
+
+    # lengths[j][i]: length of the longest alignment of nodes1[j:] and nodes2[i:]
+    lengths = [[0] * (len2 + 1) for _ in range(len1 + 1)]
+    for i in range(len2 - 1, -1, -1):
+        row = next_match[i]
+        for j in range(len1 - 1, -1, -1):
+            length = lengths[j][i + 1]
+            position = row[j]
+            if position < len1 and lengths[position + 1][i + 1] >= length:
+                length = lengths[position + 1][i + 1] + 1
+            lengths[j][i] = length
+
+    def _alignments(start1, start2):
+        # all alignments of nodes1[start1:] and nodes2[start2:] with maximal length, in reverse order
+        longest = lengths[start1][start2]
+        alignments = []
+        for i in range(start2, len2):
+            if lengths[start1][i] < longest:  # no longest alignment starts later
                 break
-            if node1 == node2:
-                best_matches = match_nodes(nodes1[j + 1:], nodes2[i + 1:], excluded=excluded)
-                if best_matches:
-                    for match in best_matches:
-                        match.append((node1.nodeid, node2.nodeid))
-                else:
-                    best_matches = [[(node1.nodeid, node2.nodeid)]]
-                earliest = j
-                longest = max(longest, len(best_matches[0]))
-                matches.extend(best_matches)
-    if matches:
-        max_len = len(max(matches, key=len))
-        return [m for m in matches if len(m) == max_len]
-    else:
+            j = next_match[i][start1]
+            if j == len1 or lengths[j + 1][i + 1] + 1 != longest:
+                continue
+            pair = (nodes1[j].nodeid, nodes2[i].nodeid)
+            if longest == 1:
+                alignments.append([pair])
+                continue
+            for alignment in _alignments(j + 1, i + 1):
+                alignment.append(pair)
+                alignments.append(alignment)
+        return alignments
+
+    if not lengths[0][0]:
         return []
+    return _alignments(0, 0)
 
 
 def add_quantifier_matches(dmrs1, dmrs2, longest_matches):
+    if isinstance(dmrs2, PreparedAlignedTarget):
+        get_quantifier_link2 = dmrs2.quantifier_links.get
+        dmrs2 = dmrs2.dmrs
+    else:
+        get_quantifier_link2 = lambda nodeid: _get_quantifier_link(dmrs2, nodeid)
     for m in longest_matches:
         q_pairs = []
         for nodeid1, nodeid2 in m:
-            try:
-                q_link1 = dmrs1.get_in(nodeid1, rargname='RSTR', post='H').pop()
-                q_link2 = dmrs2.get_in(nodeid2, rargname='RSTR', post='H').pop()
-            except KeyError:
+            q_link1 = _get_quantifier_link(dmrs1, nodeid1)
+            if q_link1 is None:
+                continue
+            q_link2 = get_quantifier_link2(nodeid2)
+            if q_link2 is None:
                 continue
             if dmrs1[q_link1.start] == dmrs2[q_link2.start]:
                 q_pairs.append((q_link1.start, q_link2.start))
@@ -68,8 +156,13 @@ def get_compounds(dmrs, compound_preds):
 
 
 def add_compound_matches(small_dmrs, large_dmrs, longest_matches, compound_preds):
+    if not longest_matches:
+        return
     small_compounds = get_compounds(small_dmrs, compound_preds)
-    large_compounds = get_compounds(large_dmrs, compound_preds)
+    if isinstance(large_dmrs, PreparedAlignedTarget) and large_dmrs.compound_preds == tuple(compound_preds):
+        large_compounds = large_dmrs.compounds
+    else:
+        large_compounds = get_compounds(_get_dmrs(large_dmrs), compound_preds)
 
     for m in longest_matches:
         cmpd_pairs = []
@@ -98,39 +191,47 @@ def find_extra_surface_nodeids(nodeids, large_dmrs):
 
         :param nodeids Nodeids from the large DMRS which have equivalents in the small one, sorted by span_pred_key of
         their nodes.
-        :param large_dmrs The large DMRS.
+        :param large_dmrs The large DMRS (or a PreparedAlignedTarget).
 
         :return A list of additional nodeids sharing the span with nodeids but without equivalents in the small DMRS.
     """
+    if isinstance(large_dmrs, PreparedAlignedTarget):
+        span_index = large_dmrs.span_index
+    else:
+        span_index = SpanIndex(large_dmrs.nodes)
+    cfroms = span_index.cfroms
+    ctos = span_index.ctos
     max_cto = large_dmrs[nodeids[-1]].cto
-    extra_nodeids = []
-    reached_start = False
-    reached_end = False
-    for i, node in enumerate(large_dmrs.nodes):
-        if node.nodeid == nodeids[0]:
-            first_overlap_orderid = i
-            min_cfrom = node.cfrom
-            max_cto = max(max_cto, node.cto)
-            while True and first_overlap_orderid > 0:
-                prev_node = large_dmrs.nodes[first_overlap_orderid - 1]
-                prev_cfrom = prev_node.cfrom
-                if prev_cfrom == min_cfrom and prev_node.cto <= max_cto:
-                    first_overlap_orderid -= 1
-                    extra_nodeids.append(prev_node.nodeid)
-                    max_cto = max(max_cto, prev_node.cto)
-                else:
-                    break
-            reached_start = True
-        elif not reached_start:
-            continue
-        elif reached_end and node.cfrom >= max_cto:
-            break
-        else:
-            max_cto = max(max_cto, node.cto)
-            if node.nodeid not in nodeids and node.nodeid not in extra_nodeids:
-                extra_nodeids.append(node.nodeid)
-        if node.nodeid == nodeids[-1]:
-            reached_end = True
+    if nodeids[0] not in span_index.positions:
+        return []
+    start = span_index.positions[nodeids[0]]
+    end = span_index.positions.get(nodeids[-1], -1)
+    min_cfrom = cfroms[start]
+    max_cto = max(max_cto, ctos[start])
+
+    # nodes before the first matched node with the same start and a contained span
+    first = bisect.bisect_left(cfroms, min_cfrom)
+    extra_nodeids = [span_index.nodeids[i] for i in reversed(span_index.find_positions(first, start, max_cto=max_cto))]
+
+    # all nodes up to the last matched node, and then the nodes overlapping the span covered so far
+    if end < start:  # the last matched node is not in span order after the first
+        last = len(cfroms)
+    else:
+        max_cto = max(max_cto, span_index.max_cto(start, end + 1))
+        last = bisect.bisect_left(cfroms, max_cto, lo=end + 1)
+        while True:
+            extended_cto = span_index.max_cto(end + 1, last)
+            if extended_cto is None or extended_cto <= max_cto:
+                break
+            end = last - 1
+            max_cto = extended_cto
+            last = bisect.bisect_left(cfroms, max_cto, lo=last)
+    nodeids_set = set(nodeids)
+    extra_nodeids_set = set(extra_nodeids)
+    for nodeid in span_index.nodeids[start + 1:last]:
+        if nodeid not in nodeids_set and nodeid not in extra_nodeids_set:
+            extra_nodeids.append(nodeid)
+            extra_nodeids_set.add(nodeid)
 
     return extra_nodeids
 
@@ -168,17 +269,20 @@ def get_subgraph(dmrs, subgraph_nodeids):
 
 # -------------------------------------------------------------------------------
 
-def get_link_diff(small_dmrs, matched_subgraph, matching_nodeids):
+def get_link_diff(small_dmrs, matched_subgraph, matching_nodeids, compatibility_cache=None):
     """
     :param small_dmrs A Dmrs which we're matching.
     :param matched_subgraph A Dmrs. A subgraph of the larger DMRS returned as a match for small_dmrs.
     :param matching_nodeids A list of pairs of nodeids. The first nodeid in each pair comes from small_dmrs, the second
     comes from the large dmrs.
+    :param compatibility_cache An optional CompatibilityCache for node comparisons.
     :return three list of links:
         1) links present only in the small dmrs
         2) links present only in the matched subgraph
         3) common links.
     """
+    if compatibility_cache is None:
+        compatibility_cache = CompatibilityCache()
     both = []
     small_only = []
     subgraph_only = []
@@ -194,14 +298,12 @@ def get_link_diff(small_dmrs, matched_subgraph, matching_nodeids):
                     if link1 in checked_eq_links:
                         continue
                     checked_eq_links.add(link1)
-                match_found = False
-                for link2 in subgraph_links:
-                    if are_equal_links(link1, link2, small_dmrs, matched_subgraph):
+                for i, link2 in enumerate(subgraph_links):
+                    if compatibility_cache.are_equal_links(link1, link2, small_dmrs, matched_subgraph):
                         both.append(link1)
-                        match_found = True
-                        links_flag[subgraph_links.index(link2)] = True
+                        links_flag[i] = True
                         break
-                if not match_found:
+                else:
                     small_only.append(link1)
             for i in range(0, len(subgraph_links)):
                 if not links_flag[i]:
@@ -210,8 +312,9 @@ def get_link_diff(small_dmrs, matched_subgraph, matching_nodeids):
             subgraph_only.extend(matched_subgraph.get_out(subgraph_nodeid))
 
     checked_eq_links = set()
+    matched_small_nodeids = set(pair[0] for pair in matching_nodeids)
     for nodeid in small_dmrs:
-        if nodeid not in list(zip(*matching_nodeids))[0]:
+        if nodeid not in matched_small_nodeids:
             small_only.extend(small_dmrs.get_out(nodeid))
             eq_links = small_dmrs.get_eq(nodeid)
             small_only.extend({link for link in eq_links if link not in checked_eq_links})
@@ -226,7 +329,7 @@ def get_matching_nodeids(small_dmrs, large_dmrs, all_surface=False, large_exclud
     """ Finds matching pairs of nodeids between small_dmrs and large_dmrs. Starts by matching all
         nodes but quantifiers, then matches quantifiers for nouns with matches.
         :param small_dmrs A DMRS object used as a match query,
-        :param large_dmrs A DMRS object to be searched for a match.
+        :param large_dmrs A DMRS object to be searched for a match (or a PreparedAlignedTarget).
         :param all_surface If true, include all nodes from the aligned surface region.
                            If false, find only the nodes with equivalents in small_dmrs.
         :param large_excluded The nodeids from the large DMRS to be ignored during matching.
@@ -237,16 +340,15 @@ def get_matching_nodeids(small_dmrs, large_dmrs, all_surface=False, large_exclud
     # Convert DMRSs to SortDictDmrs with span_pred_key node if needed.
     if not isinstance(small_dmrs, SortDictDmrs) or (small_dmrs.node_key != span_pred_key):
         small_dmrs = small_dmrs.convert_to(abstractSortDictDmrs(node_key=span_pred_key))
-    if not isinstance(large_dmrs, SortDictDmrs) or (large_dmrs.node_key != span_pred_key):
-        large_dmrs = large_dmrs.convert_to(abstractSortDictDmrs(node_key=span_pred_key))
+    if not isinstance(large_dmrs, PreparedAlignedTarget) or large_dmrs.compound_preds != FILTERED_PREDS:
+        large_dmrs = PreparedAlignedTarget(_get_dmrs(large_dmrs))
 
     # Filter quantifiers.
     small_no_qs = [n for n in small_dmrs.nodes if not small_dmrs.is_quantifier(n.nodeid)]
-    large_no_qs = [n for n in large_dmrs.nodes if not large_dmrs.is_quantifier(n.nodeid)]
     # Filter compound_name and compund predicates.
-    filtered_pred = ['compound', 'compound_name']
+    filtered_pred = FILTERED_PREDS
     filtered_small = [n for n in small_no_qs if str(n.pred) not in filtered_pred]
-    filtered_large = [n for n in large_no_qs if str(n.pred) not in filtered_pred]
+    filtered_large = large_dmrs.filtered_nodes
 
     longest_matches = match_nodes(filtered_small, filtered_large,
                                   excluded=large_excluded)  # list of lists of nodeid pairs
@@ -271,20 +373,146 @@ def get_matching_nodeids(small_dmrs, large_dmrs, all_surface=False, large_exclud
 def get_matched_subgraph(matching_nodeids, large_dmrs):
     """
     :param matching_nodeids: A list of pairs of matches nodeids from the small and large dmrs.
-    :param large_dmrs: A Dmrs.
+    :param large_dmrs: A Dmrs (or PreparedAlignedTarget).
     :return: A Dmrs. A subgraph of large_dmrs containing only nodes with nodeids in matching_nodeids.
     """
     present_large_nodeids = list(zip(*matching_nodeids))[1]
-    return get_subgraph(large_dmrs, present_large_nodeids)
+    return get_subgraph(_get_dmrs(large_dmrs), present_large_nodeids)
 
 
-def get_best_subgraph(nodeid_matches, small_dmrs, large_dmrs):
+class AlignedScorer(object):
+    """
+    Scores candidate matches of one small DMRS, as get_score does. The links of each small graph node (bucketed by
+    label for comparison), and comparisons between small and large graph nodes, are computed once and shared by all
+    scored matches.
+    """
+
+    def __init__(self, small_dmrs, compatibility_cache=None):
+        """
+        :param small_dmrs: A Dmrs which we're matching.
+        :param compatibility_cache: An optional CompatibilityCache for node comparisons, e.g. shared between scorers.
+        """
+        if compatibility_cache is None:
+            compatibility_cache = CompatibilityCache()
+        self.small_dmrs = small_dmrs
+        self.compatibility_cache = compatibility_cache
+        self.nodeids = list(small_dmrs)
+        self.out_links = {nodeid: small_dmrs.get_out(nodeid) for nodeid in self.nodeids}
+        self.eq_links = {nodeid: small_dmrs.get_eq(nodeid) for nodeid in self.nodeids}
+        self.node_links = {nodeid: list(self.out_links[nodeid] | self.eq_links[nodeid]) for nodeid in self.nodeids}
+        self._equal_nodes = {}
+
+    def _are_equal_nodes(self, small_nodeid, large_nodeid, large_dmrs):
+        large_node = large_dmrs[large_nodeid]
+        key = (small_nodeid, large_nodeid, id(large_node))
+        if key not in self._equal_nodes:
+            # the node is kept to ensure that its id is not reused
+            self._equal_nodes[key] = (self.compatibility_cache.are_equal_nodes(self.small_dmrs[small_nodeid], large_node),
+                                      large_node)
+        return self._equal_nodes[key][0]
+
+    def _are_equal_links(self, link1, link2, large_dmrs):
+        # equivalent to are_equal_links for links with the same label
+        if self._are_equal_nodes(link1.start, link2.start, large_dmrs) and \
+                self._are_equal_nodes(link1.end, link2.end, large_dmrs):
+            return True
+        if link1.rargname is None:
+            return self._are_equal_nodes(link1.start, link2.end, large_dmrs) and \
+                self._are_equal_nodes(link1.end, link2.start, large_dmrs)
+        return False
+
+    def count_link_diff(self, matched_subgraph, matching_nodeids):
+        """
+        Counts the links returned by get_link_diff.
+        :param matched_subgraph A Dmrs. A subgraph of the larger DMRS returned as a match for the small DMRS.
+        :param matching_nodeids A list of pairs of nodeids (small DMRS nodeid or None, large DMRS nodeid).
+        :return The numbers of links present only in the small dmrs, only in the matched subgraph, and in both.
+        """
+        num_small_only = 0
+        num_subgraph_only = 0
+        num_both = 0
+        checked_eq_links = set()
+        for small_nodeid, subgraph_nodeid in matching_nodeids:
+            subgraph_links = list(matched_subgraph.get_out(subgraph_nodeid))
+            if not small_nodeid:
+                num_subgraph_only += len(subgraph_links)
+                continue
+            labelled_links = {}
+            for i, link2 in enumerate(subgraph_links):
+                labelled_links.setdefault(link2.label, []).append(i)
+            links_flag = [False] * len(subgraph_links)
+            for link1 in self.node_links[small_nodeid]:
+                # Check if the EQ has been counted already.
+                if not link1.rargname:
+                    if link1 in checked_eq_links:
+                        continue
+                    checked_eq_links.add(link1)
+                for i in labelled_links.get(link1.label, ()):
+                    if self._are_equal_links(link1, subgraph_links[i], matched_subgraph):
+                        num_both += 1
+                        links_flag[i] = True
+                        break
+                else:
+                    num_small_only += 1
+            num_subgraph_only += links_flag.count(False)
+
+        checked_eq_links = set()
+        matched_small_nodeids = set(pair[0] for pair in matching_nodeids)
+        for nodeid in self.nodeids:
+            if nodeid not in matched_small_nodeids:
+                num_small_only += len(self.out_links[nodeid])
+                eq_links = self.eq_links[nodeid]
+                num_small_only += len(eq_links - checked_eq_links)
+                checked_eq_links.update(eq_links)
+        return num_small_only, num_subgraph_only, num_both
+
+    def score(self, matched_subgraph, matching_nodeids):
+        """
+        Scores a match, as get_score does.
+        :param matched_subgraph A Dmrs. A subgraph of the larger DMRS returned as a match for the small DMRS.
+        :param matching_nodeids A list of pairs of nodeids (small DMRS nodeid or None, large DMRS nodeid).
+        :return A tuple (num_correct, num_matched, num_expected).
+        """
+        num_extra_nodes = sum(1 for pair in matching_nodeids if pair[0] is None)
+        num_matched_nodes = len(matching_nodeids) - num_extra_nodes
+        matched_small_nodeids = set(pair[0] for pair in matching_nodeids)
+        num_missing_nodes = sum(1 for nodeid in self.nodeids if nodeid not in matched_small_nodeids)
+        num_missing_links, num_extra_links, num_shared_links = self.count_link_diff(matched_subgraph,
+                                                                                    matching_nodeids)
+        num_correct = num_matched_nodes + num_shared_links
+        num_matched = num_correct + num_extra_links + num_extra_nodes
+        num_expected = num_correct + num_missing_links + num_missing_nodes
+        return num_correct, num_matched, num_expected
+
+    def score_all(self, nodeid_matches, large_dmrs):
+        """
+        Scores all candidate matches against a large DMRS.
+        :param nodeid_matches A list of lists of nodeid pairs, as returned by get_matching_nodeids.
+        :param large_dmrs A Dmrs (or PreparedAlignedTarget).
+        :return A list of pairs (matched subgraph, score) in the order of nodeid_matches.
+        """
+        results = []
+        for match in nodeid_matches:
+            subgraph = get_matched_subgraph(match, large_dmrs)
+            results.append((subgraph, self.score(subgraph, match)))
+        return results
+
+
+def get_best_subgraph(nodeid_matches, small_dmrs, large_dmrs, scorer=None, compatibility_cache=None):
+    """
+    :param nodeid_matches A list of lists of nodeid pairs, as returned by get_matching_nodeids.
+    :param small_dmrs A Dmrs which we're matching.
+    :param large_dmrs A Dmrs (or PreparedAlignedTarget).
+    :param scorer An optional AlignedScorer for small_dmrs, to be reused across calls.
+    :param compatibility_cache An optional CompatibilityCache for node comparisons, if no scorer is given.
+    :return A tuple (list of matched subgraphs with the best fscore, their score).
+    """
+    if scorer is None:
+        scorer = AlignedScorer(small_dmrs, compatibility_cache=compatibility_cache)
     best_fscore = 0
     best_score = 0, 0, 0
     best_graphs = []
-    for match in nodeid_matches:
-        subgraph = get_matched_subgraph(match, large_dmrs)
-        score = get_score(small_dmrs, subgraph, match)
+    for subgraph, score in scorer.score_all(nodeid_matches, large_dmrs):
         fscore = get_fscore(*score)
         if fscore > best_fscore:
             best_graphs = [subgraph]
@@ -295,15 +523,16 @@ def get_best_subgraph(nodeid_matches, small_dmrs, large_dmrs):
     return best_graphs, best_score
 
 
-def get_score(small_dmrs, matched_subgraph, matching_nodeids):
+def get_score(small_dmrs, matched_subgraph, matching_nodeids, compatibility_cache=None):
     num_extra_nodes = len([pair for pair in matching_nodeids if pair[0] is None])
     num_matched_nodes = len(matching_nodeids) - num_extra_nodes
-    num_missing_nodes = len(
-        [nodeid for nodeid in small_dmrs if nodeid not in list(zip(*matching_nodeids))[0]])
+    matched_small_nodeids = set(pair[0] for pair in matching_nodeids)
+    num_missing_nodes = len([nodeid for nodeid in small_dmrs if nodeid not in matched_small_nodeids])
 
     only_small_links, only_subgraph_links, shared_links = get_link_diff(small_dmrs,
                                                                         matched_subgraph,
-                                                                        matching_nodeids)
+                                                                        matching_nodeids,
+                                                                        compatibility_cache=compatibility_cache)
     num_extra_links = len(only_subgraph_links)
     num_missing_links = len(only_small_links)
     num_shared_links = len(shared_links)
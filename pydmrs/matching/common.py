@@ -1,3 +1,32 @@
+from collections import OrderedDict
+
+from pydmrs.core import Node
+
+
+def pred_signature(pred):
+    """Returns a hashable signature of a predicate, which can safely be compared with signatures of other
+    predicates and None."""
+    if pred is None:
+        return None
+    return type(pred), tuple(pred) if isinstance(pred, tuple) else ()
+
+
+def sortinfo_signature(sortinfo):
+    """Returns a hashable signature of a sortinfo, which can safely be compared with signatures of other
+    sortinfos and None."""
+    if sortinfo is None:
+        return None
+    return type(sortinfo), tuple(sortinfo[feature] for feature in sortinfo.features)
+
+
+def node_signature(node):
+    """Returns a hashable signature of a node, consisting of its predicate, carg and sortinfo. Nodes with the same
+    signature are equivalent for matching purposes."""
+    if type(node).__eq__ is not Node.__eq__ or type(node).is_less_specific is not Node.is_less_specific:
+        return 'node', id(node)
+    return pred_signature(node.pred), node.carg, sortinfo_signature(node.sortinfo)
+
+
 def are_equal_nodes(n1, n2, underspecified=True):
     """Returns True if nodes n1 and n2 have the same predicate and sortinfo. If underspecified,
     allow underspecification."""
@@ -24,3 +53,97 @@ def are_equal_links(l1, l2, dmrs1, dmrs2, underspecified=True):
                 return True
     else:
         return False
+
+
+DEFAULT_CACHE_SIZE = 100000
+
+
+class CompatibilityCache(object):
+    """
+    A bounded LRU cache of node comparisons, keyed on node signatures (see node_signature), so that comparisons of
+    equivalent node pairs are only computed once. One cache can be shared by several matching calls (a match session),
+    and by general and aligned matching. The numbers of hits and misses are counted.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        """
+        Create a new empty cache.
+        :param maxsize The maximum number of cached comparisons, after which the least recently used are discarded.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        """
+        Return the number of cached comparisons
+        """
+        return len(self._cache)
+
+    def clear(self):
+        """
+        Discard all cached comparisons and reset the counters.
+        """
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        """
+        The fraction of lookups answered from the cache (0 if there were none).
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def _lookup(self, key, n1, n2, compare):
+        signature1 = node_signature(n1)
+        signature2 = node_signature(n2)
+        if signature1[0] == 'node' or signature2[0] == 'node':
+            # nodes which are only identified by their object id are not cached
+            self.misses += 1
+            return compare(n1, n2)
+        key = (key, signature1, signature2)
+        cache = self._cache
+        try:
+            result = cache[key]
+        except KeyError:
+            self.misses += 1
+            result = cache[key] = compare(n1, n2)
+            if len(cache) > self.maxsize:
+                cache.popitem(last=False)
+            return result
+        self.hits += 1
+        cache.move_to_end(key)
+        return result
+
+    def are_equal_nodes(self, n1, n2, underspecified=True):
+        """Cached are_equal_nodes."""
+        if underspecified:
+            return self._lookup('equal', n1, n2, are_equal_nodes)
+        return self._lookup('same', n1, n2, _are_same_nodes)
+
+    def is_less_specific(self, n1, n2):
+        """Cached n1.is_less_specific(n2)."""
+        return self._lookup('less', n1, n2, _is_less_specific)
+
+    def are_equal_links(self, l1, l2, dmrs1, dmrs2, underspecified=True):
+        """Cached are_equal_links."""
+        if l1.label != l2.label:
+            return False
+        if self.are_equal_nodes(dmrs1[l1.start], dmrs2[l2.start], underspecified) and \
+                self.are_equal_nodes(dmrs1[l1.end], dmrs2[l2.end], underspecified):
+            return True
+        if l1.rargname is None:
+            return self.are_equal_nodes(dmrs1[l1.start], dmrs2[l2.end], underspecified) and \
+                self.are_equal_nodes(dmrs1[l1.end], dmrs2[l2.start], underspecified)
+        return False
+
+
+def _are_same_nodes(n1, n2):
+    return are_equal_nodes(n1, n2, underspecified=False)
+
+
+def _is_less_specific(n1, n2):
+    return n1.is_less_specific(n2)
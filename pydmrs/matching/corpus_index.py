@@ -0,0 +1,183 @@
+from pydmrs.components import RealPred, GPred
+
+
+def pred_key(pred):
+    """
+    Returns the index key string of a fully specified predicate, or None if the predicate is underspecified.
+    :param pred A predicate (or None).
+    :return A predicate string or None.
+    """
+    if type(pred) is RealPred:
+        if pred.lemma == '?' or pred.pos in ('u', '?') or pred.sense == '?':
+            return None
+        return str(pred)
+    elif type(pred) is GPred:
+        if pred.name == '?':
+            return None
+        return str(pred)
+    return None
+
+
+def node_keys(node):
+    """
+    Returns the index keys of a graph node: its predicate and its carg.
+    :param node A Node object.
+    :return A list of keys.
+    """
+    keys = []
+    if isinstance(node.pred, (RealPred, GPred)):
+        keys.append(('pred', str(node.pred)))
+    if node.carg is not None:
+        keys.append(('carg', node.carg))
+    return keys
+
+
+def link_keys(link, dmrs):
+    """
+    Returns the index keys of a graph link: its label, and its label together with the predicates of its endpoints.
+    Undirected (None/EQ) links are indexed in both directions.
+    :param link A Link object.
+    :param dmrs The DMRS graph containing the link.
+    :return A list of keys.
+    """
+    start_pred = str(dmrs[link.start].pred)
+    end_pred = str(dmrs[link.end].pred)
+    keys = [('link', link.rargname, link.post), ('edge', start_pred, link.rargname, link.post, end_pred)]
+    if link.rargname is None and link.post == 'EQ':
+        keys.append(('edge', end_pred, link.rargname, link.post, start_pred))
+    return keys
+
+
+def graph_keys(dmrs):
+    """
+    Returns the set of index keys of a DMRS graph.
+    :param dmrs A Dmrs object.
+    :return A set of keys.
+    """
+    keys = set()
+    for node in dmrs.iter_nodes():
+        keys.update(node_keys(node))
+    for link in dmrs.iter_links():
+        keys.update(link_keys(link, dmrs))
+    return keys
+
+
+def pattern_requirements(search_dmrs, optional_nodeids=(), hierarchy=None):
+    """
+    Returns the index keys every graph has to contain in order to match a search (sub)graph with dmrs_exact_matching.
+    Only fully specified elements of required (non-optional) nodes are taken into account.
+    :param search_dmrs DMRS (sub)graph to match.
+    :param optional_nodeids Node ids of optional nodes.
+    :param hierarchy An optional predicate hierarchy.
+    :return A set of keys.
+    """
+    hierarchy = hierarchy or dict()
+    required = set()
+    pred_keys = {}
+    for node in search_dmrs.iter_nodes():
+        if node.nodeid in optional_nodeids or not getattr(node, 'required', True):
+            continue
+        key = pred_key(node.pred)
+        if key is not None and hierarchy.get(key):
+            # more specific predicates also match
+            key = None
+        if key is not None:
+            required.add(('pred', key))
+            pred_keys[node.nodeid] = key
+        if node.carg is not None and node.carg != '?':
+            required.add(('carg', node.carg))
+    for link in search_dmrs.iter_links():
+        if link.start not in pred_keys and link.end not in pred_keys:
+            continue
+        if link.rargname in ('?', 'ARG') or link.post == '?':
+            continue
+        required.add(('link', link.rargname, link.post))
+        if link.start in pred_keys and link.end in pred_keys:
+            required.add(('edge', pred_keys[link.start], link.rargname, link.post, pred_keys[link.end]))
+    return required
+
+
+class CorpusIndex(object):
+    """
+    An inverted index over a corpus of DMRS graphs, mapping predicates, cargs and link labels
+    (with and without their endpoint predicates) to posting sets of graph ids.
+    Used to restrict exact matching to graphs which contain all required, fully specified elements of a pattern.
+    """
+
+    def __init__(self, corpus=()):
+        """
+        Create a new index.
+        :param corpus An iterable of DMRS graphs, which are indexed with consecutive graph ids starting from 0.
+        """
+        self.postings = {}
+        self.graph_ids = set()
+        self._next_id = 0
+        for dmrs in corpus:
+            self.add(dmrs)
+
+    def __len__(self):
+        """
+        Return the number of indexed graphs
+        """
+        return len(self.graph_ids)
+
+    def __contains__(self, graph_id):
+        return graph_id in self.graph_ids
+
+    def add(self, dmrs, graph_id=None):
+        """
+        Add a graph to the index.
+        :param dmrs A Dmrs object.
+        :param graph_id The graph id. If None, the next free consecutive integer id.
+        :return The graph id.
+        """
+        if graph_id is None:
+            graph_id = self._next_id
+        assert graph_id not in self.graph_ids, 'Graph id already indexed.'
+        if isinstance(graph_id, int) and graph_id >= self._next_id:
+            self._next_id = graph_id + 1
+        self.graph_ids.add(graph_id)
+        for key in graph_keys(dmrs):
+            self.postings.setdefault(key, set()).add(graph_id)
+        return graph_id
+
+    def lookup(self, key):
+        """
+        Get the posting set of a key, defaulting to the empty set.
+        """
+        return self.postings.get(key, frozenset())
+
+    def may_match(self, graph_id, search_dmrs=None, optional_nodeids=(), hierarchy=None, requirements=None):
+        """
+        Check whether an indexed graph can possibly match a search (sub)graph.
+        :param graph_id The graph id.
+        :param search_dmrs DMRS (sub)graph to match.
+        :param optional_nodeids Node ids of optional nodes.
+        :param hierarchy An optional predicate hierarchy.
+        :param requirements Precomputed requirements (see pattern_requirements), instead of search_dmrs.
+        :return True/False
+        """
+        if requirements is None:
+            requirements = pattern_requirements(search_dmrs, optional_nodeids=optional_nodeids, hierarchy=hierarchy)
+        return graph_id in self.graph_ids and all(graph_id in self.lookup(key) for key in requirements)
+
+    def candidates(self, search_dmrs=None, optional_nodeids=(), hierarchy=None, requirements=None):
+        """
+        Find the ids of graphs which can possibly match a search (sub)graph.
+        :param search_dmrs DMRS (sub)graph to match.
+        :param optional_nodeids Node ids of optional nodes.
+        :param hierarchy An optional predicate hierarchy.
+        :param requirements Precomputed requirements (see pattern_requirements), instead of search_dmrs.
+        :return A set of graph ids.
+        """
+        if requirements is None:
+            requirements = pattern_requirements(search_dmrs, optional_nodeids=optional_nodeids, hierarchy=hierarchy)
+        if not requirements:
+            return set(self.graph_ids)
+        postings = sorted((self.lookup(key) for key in requirements), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result.intersection_update(posting)
+        return result
@@ -0,0 +1,218 @@
+from collections import Counter, namedtuple
+
+from pydmrs.components import RealPred
+
+
+EditDistance = namedtuple('EditDistance', ('lower_bound', 'upper_bound', 'mapping'))
+EditDistance.__doc__ = """
+Bounds of the edit distance between two graphs, and the node mapping (from node ids of the first graph to node ids of
+the second graph, or None for deleted nodes) whose edit cost gives the upper bound.
+"""
+
+
+def pred_distance(pred1, pred2):
+    """
+    Returns 0 for equal predicates, 0.5 for real predicates with the same lemma, and 1 otherwise.
+    """
+    if pred1 is None or pred2 is None:
+        return 0 if pred1 is pred2 else 1
+    if pred1 == pred2:
+        return 0
+    if isinstance(pred1, RealPred) and isinstance(pred2, RealPred) and pred1.lemma == pred2.lemma:
+        return 0.5
+    return 1
+
+
+def sortinfo_distance(sortinfo1, sortinfo2):
+    """
+    Returns the fraction of specified features (including the cvarsort) with different values, between 0 and 1.
+    """
+    if sortinfo1 is None or sortinfo2 is None:
+        return 0 if sortinfo1 is sortinfo2 else 1
+    features1 = dict(sortinfo1.iter_specified())
+    features2 = dict(sortinfo2.iter_specified())
+    features1['cvarsort'] = sortinfo1.cvarsort
+    features2['cvarsort'] = sortinfo2.cvarsort
+    features = set(features1) | set(features2)
+    return sum(1 for feature in features if features1.get(feature) != features2.get(feature)) / len(features)
+
+
+def node_distance(node1, node2):
+    """
+    Returns the cost of substituting a node by another, between 0 and 2 (the cost of a deletion and an insertion).
+    """
+    return pred_distance(node1.pred, node2.pred) + 0.5 * sortinfo_distance(node1.sortinfo, node2.sortinfo) + \
+        0.5 * (node1.carg != node2.carg)
+
+
+def _is_undirected(link):
+    return link.rargname is None and link.post == 'EQ'
+
+
+def _local_links(dmrs):
+    """
+    Returns a dictionary mapping node ids to Counters of the labels of their outgoing, incoming and undirected links.
+    """
+    local = {nodeid: (Counter(), Counter(), Counter()) for nodeid in dmrs}
+    for link in dmrs.iter_links():
+        if _is_undirected(link):
+            local[link.start][2][link.labelstring] += 1
+            local[link.end][2][link.labelstring] += 1
+        else:
+            local[link.start][0][link.labelstring] += 1
+            local[link.end][1][link.labelstring] += 1
+    return local
+
+
+def _multiset_distance(labels1, labels2):
+    """
+    The minimal cost of editing a multiset of link labels into another, with unit substitution, insertion and
+    deletion costs.
+    """
+    return max(sum(labels1.values()), sum(labels2.values())) - sum((labels1 & labels2).values())
+
+
+def _link_pairs(dmrs, mapping=None):
+    """
+    Returns a Counter of link labels for every (mapped) node pair with links.
+    """
+    pairs = {}
+    for link in dmrs.iter_links():
+        start, end = link.start, link.end
+        if mapping is not None:
+            start, end = mapping[start], mapping[end]
+        key = ('eq', frozenset((start, end))) if _is_undirected(link) else ('directed', start, end)
+        pairs.setdefault(key, Counter())[link.labelstring] += 1
+    return pairs
+
+
+def edit_cost(dmrs1, dmrs2, mapping):
+    """
+    Computes the cost of editing a graph into another with a given node mapping, where nodes are substituted (see
+    node_distance), deleted or inserted, and links are substituted (if their labels differ), deleted or inserted, all
+    with unit cost.
+    :param dmrs1 A DMRS object.
+    :param dmrs2 A DMRS object.
+    :param mapping A dictionary mapping all node ids of dmrs1 to distinct node ids of dmrs2, or to None for deleted
+    nodes.
+    :return The edit cost.
+    """
+    cost = 0
+    mapped = set()
+    link_mapping = {}
+    for nodeid, other in mapping.items():
+        if other is None:
+            cost += 1
+            link_mapping[nodeid] = ('deleted', nodeid)
+        else:
+            cost += node_distance(dmrs1[nodeid], dmrs2[other])
+            mapped.add(other)
+            link_mapping[nodeid] = other
+    cost += sum(1 for nodeid in dmrs2 if nodeid not in mapped)
+    pairs1 = _link_pairs(dmrs1, link_mapping)
+    pairs2 = _link_pairs(dmrs2)
+    for key in set(pairs1) | set(pairs2):
+        cost += _multiset_distance(pairs1.get(key, Counter()), pairs2.get(key, Counter()))
+    return cost
+
+
+def solve_assignment(costs):
+    """
+    Solves a linear sum assignment problem with the Hungarian algorithm, in O(n^2 m) time.
+    :param costs A list of n rows of m >= n costs.
+    :return A pair of the list of assigned columns per row, and the total cost.
+    """
+    num_rows = len(costs)
+    if num_rows == 0:
+        return [], 0
+    num_columns = len(costs[0])
+    assert num_columns >= num_rows, 'More rows than columns.'
+    infinity = float('inf')
+    row_potentials = [0] * (num_rows + 1)
+    column_potentials = [0] * (num_columns + 1)
+    column_rows = [0] * (num_columns + 1)  # row (1-based) assigned to each column, 0 if none
+    previous = [0] * (num_columns + 1)
+    for row in range(1, num_rows + 1):
+        column_rows[0] = row
+        column = 0
+        min_slack = [infinity] * (num_columns + 1)
+        used = [False] * (num_columns + 1)
+        while True:
+            used[column] = True
+            current_row = column_rows[column]
+            row_costs = costs[current_row - 1]
+            row_potential = row_potentials[current_row]
+            delta = infinity
+            next_column = 0
+            for j in range(1, num_columns + 1):
+                if not used[j]:
+                    slack = row_costs[j - 1] - row_potential - column_potentials[j]
+                    if slack < min_slack[j]:
+                        min_slack[j] = slack
+                        previous[j] = column
+                    if min_slack[j] < delta:
+                        delta = min_slack[j]
+                        next_column = j
+            for j in range(num_columns + 1):
+                if used[j]:
+                    row_potentials[column_rows[j]] += delta
+                    column_potentials[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            column = next_column
+            if column_rows[column] == 0:
+                break
+        # augment along the alternating path
+        while column:
+            previous_column = previous[column]
+            column_rows[column] = column_rows[previous_column]
+            column = previous_column
+    assignment = [0] * num_rows
+    for j in range(1, num_columns + 1):
+        if column_rows[j]:
+            assignment[column_rows[j] - 1] = j - 1
+    return assignment, sum(costs[i][assignment[i]] for i in range(num_rows))
+
+
+def approximate_edit_distance(dmrs1, dmrs2):
+    """
+    Approximates the edit distance between two graphs (see edit_cost) by a bipartite assignment of their nodes.
+    Every node substitution is scored by the node distance and half the cost of editing the labels of its outgoing,
+    incoming and undirected links into those of the other node. The optimal assignment of these costs is a lower
+    bound of the edit distance, and the edit cost of the resulting node mapping is an upper bound.
+    Since substitution is never more expensive than deletion and insertion, the smaller graph is fully assigned, and
+    the remaining nodes of the larger graph are deleted or inserted. The assignment takes O(n^2 m) time for graphs of
+    n <= m nodes.
+    :param dmrs1 A DMRS object.
+    :param dmrs2 A DMRS object.
+    :return An EditDistance.
+    """
+    nodes1 = list(dmrs1.iter_nodes())
+    nodes2 = list(dmrs2.iter_nodes())
+    local1 = _local_links(dmrs1)
+    local2 = _local_links(dmrs2)
+    swap = len(nodes1) > len(nodes2)
+    if swap:
+        nodes1, nodes2, local1, local2 = nodes2, nodes1, local2, local1
+    # the nodes of the larger graph which are not assigned are deleted (or inserted), so the cost of every
+    # substitution is offset by the deletion cost of the node
+    deletion_costs = [1 + 0.5 * sum(sum(labels.values()) for labels in local2[node2.nodeid]) for node2 in nodes2]
+    costs = []
+    for node1 in nodes1:
+        links1 = local1[node1.nodeid]
+        row = []
+        for node2, deletion_cost in zip(nodes2, deletion_costs):
+            links2 = local2[node2.nodeid]
+            row.append(node_distance(node1, node2) - deletion_cost +
+                       0.5 * sum(_multiset_distance(labels1, labels2) for labels1, labels2 in zip(links1, links2)))
+        costs.append(row)
+    assignment, cost = solve_assignment(costs)
+    cost += sum(deletion_costs)
+    pairs = [(node1.nodeid, nodes2[n].nodeid) for node1, n in zip(nodes1, assignment)]
+    if swap:
+        pairs = [(nodeid2, nodeid1) for nodeid1, nodeid2 in pairs]
+        mapping = {node.nodeid: None for node in nodes2}
+    else:
+        mapping = {node.nodeid: None for node in nodes1}
+    mapping.update(pairs)
+    return EditDistance(cost, edit_cost(dmrs1, dmrs2, mapping), mapping)
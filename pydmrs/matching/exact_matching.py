@@ -1,174 +1,599 @@
-from pydmrs.core import Dmrs
+import time
+from collections import deque
 
+from pydmrs.components import Pred, RealPred, GPred, Sortinfo, PredHierarchy
+from pydmrs.core import Dmrs, Node
 
-def dmrs_exact_matching(sub_dmrs, dmrs, optional_nodeids=(), equalities=(), hierarchy=None, match_top_index=True):
+
+def compile_pred_test(pred, hierarchy=None):
     """
-    Performs an exact DMRS (sub)graph matching of a (sub)graph against a containing graph.
-    :param sub_dmrs DMRS (sub)graph to match.
-    :param dmrs DMRS graph to match against.
-    :param optional_nodeids
-    :param equalities
+    Precomputes a test for the predicate of a (sub)graph node.
+    :param pred The predicate of the (sub)graph node.
     :param hierarchy An optional predicate hierarchy.
-    :param match_top_index
-    :return Iterator of dictionaries, mapping node ids of the matched (sub)graph to the corresponding matching node id in the containing graph.
-    """
-    hierarchy = hierarchy or dict()
-
-    if not isinstance(sub_dmrs, Dmrs) or not isinstance(dmrs, Dmrs):
-        return
-    matching = {}
-    matching_values = set()
-    matches = {}
-
-    # find matchable nodes and add unambiguous matchings
-    for sub_node in sub_dmrs.iter_nodes():
-        match = [node.nodeid for node in dmrs.iter_nodes() if sub_node == node or sub_node.is_less_specific(node, hierarchy=hierarchy)]
-        if match:
-            if sub_node.nodeid in optional_nodeids:
-                match.append(None)
-            if len(match) == 1:
-                matching[sub_node.nodeid] = match[0]
-                matching_values.add(match[0])
-                continue
-            matches[sub_node.nodeid] = match
-        elif sub_node.nodeid not in optional_nodeids:
+    :return Function taking a predicate and returning True if it is equal to or more specific than pred.
+    """
+    if pred is None:
+        return lambda other: other is None
+    if type(pred) is Pred:
+        return lambda other: True
+    if type(pred) is RealPred:
+        lemma, pos, sense = pred
+        lemma_free = lemma == '?'
+        pos_free = pos in ('u', '?')
+        sense_free = sense == '?'
+
+        def test(other):
+            return isinstance(other, RealPred) and \
+                (lemma_free or lemma == other.lemma) and \
+                (pos == other.pos or (pos_free and other.pos not in ('u', '?'))) and \
+                (sense_free or sense == other.sense)
+    elif type(pred) is GPred:
+        name = pred.name
+        name_free = name == '?'
+
+        def test(other):
+            return isinstance(other, GPred) and (name_free or name == other.name)
+    else:
+        def test(other):
+            return other is not None and (pred == other or pred.is_less_specific(other, hierarchy=hierarchy))
+        return test
+    if hierarchy:
+        specific = hierarchy.get(str(pred), ())
+        if specific:
+            base_test = test
+            if isinstance(hierarchy, PredHierarchy):
+                subsumes = hierarchy.subsumes
+
+                def test(other):
+                    return base_test(other) or (other is not None and subsumes(pred, other))
+            else:
+                def test(other):
+                    return base_test(other) or (other is not None and str(other) in specific)
+    return test
+
+
+def compile_sortinfo_test(sortinfo):
+    """
+    Precomputes a test for the sortinfo of a (sub)graph node.
+    :param sortinfo The sortinfo of the (sub)graph node.
+    :return Function taking a sortinfo and returning True if it is equal to or more specific than sortinfo.
+    """
+    if sortinfo is None:
+        return lambda other: other is None
+    if type(sortinfo) is Sortinfo:
+        return lambda other: True
+    if sortinfo.cvarsort == 'i' or \
+            type(sortinfo).__eq__ is not Sortinfo.__eq__ or \
+            type(sortinfo).is_less_specific is not Sortinfo.is_less_specific:
+        def test(other):
+            return other is not None and (sortinfo == other or sortinfo.is_less_specific(other))
+        return test
+    cvarsort = sortinfo.cvarsort
+    specified = tuple(sortinfo.iter_specified())
+
+    def test(other):
+        if other is None or other.cvarsort != cvarsort:
+            return False
+        for key, value in specified:
+            other_value = getattr(other, key, None)
+            if other_value in ('u', '?', None):
+                return False
+            if value != other_value and not (key == 'tense' and value == 'tensed' and other_value != 'untensed'):
+                return False
+        return True
+    return test
+
+
+def compile_node_test(sub_node, hierarchy=None):
+    """
+    Precomputes the candidate test for a node of a (sub)graph to match.
+    The test is equivalent to: sub_node == node or sub_node.is_less_specific(node, hierarchy=hierarchy)
+    :param sub_node Node of the DMRS (sub)graph to match.
+    :param hierarchy An optional predicate hierarchy.
+    :return Function taking a node and returning True if it is a candidate match for sub_node.
+    """
+    if type(sub_node).__eq__ is not Node.__eq__ or type(sub_node).is_less_specific is not Node.is_less_specific:
+        return lambda node: sub_node == node or sub_node.is_less_specific(node, hierarchy=hierarchy)
+    pred_test = compile_pred_test(sub_node.pred, hierarchy=hierarchy)
+    sortinfo_test = compile_sortinfo_test(sub_node.sortinfo)
+    carg = sub_node.carg
+    if carg == '?':
+        def test(node):
+            return pred_test(node.pred) and sortinfo_test(node.sortinfo)
+    else:
+        def test(node):
+            return carg == node.carg and pred_test(node.pred) and sortinfo_test(node.sortinfo)
+    return test
+
+
+class MatchBudget(object):
+    """
+    Limits on the work done by exact matching: the number of results, the number of search states (node assignments
+    tried) and a deadline. Once a limit is exhausted, matching stops and the budget is flagged as truncated.
+    A budget can be shared between several matching runs, in which case its counters accumulate.
+    """
+
+    def __init__(self, max_results=None, max_states=None, deadline=None):
+        """
+        Create a new budget.
+        :param max_results Maximum number of results.
+        :param max_states Maximum number of search states.
+        :param deadline Point in time (in seconds, see time.monotonic) after which matching stops.
+        """
+        self.max_results = max_results
+        self.max_states = max_states
+        self.deadline = deadline
+        self.results = 0
+        self.states = 0
+        self.truncated = False
+
+    def step(self):
+        """
+        Counts a search state.
+        :return False if the budget is exhausted, True otherwise.
+        """
+        if self.truncated:
+            return False
+        self.states += 1
+        if (self.max_states is not None and self.states > self.max_states) or \
+                (self.deadline is not None and time.monotonic() > self.deadline):
+            self.truncated = True
+            return False
+        return True
+
+    def expired(self):
+        """
+        Checks the deadline without counting a search state.
+        :return True if the budget is exhausted, False otherwise.
+        """
+        if not self.truncated and self.deadline is not None and time.monotonic() > self.deadline:
+            self.truncated = True
+        return self.truncated
+
+    def result(self):
+        """
+        Counts a result.
+        :return False if the budget is exhausted (and the result should be discarded), True otherwise.
+        """
+        if self.truncated:
+            return False
+        if self.max_results is not None and self.results >= self.max_results:
+            self.truncated = True
+            return False
+        self.results += 1
+        return True
+
+
+class MatchResults(object):
+    """
+    An iterator over matching results, which flags whether they are truncated by the budget of the matching.
+    """
+
+    def __init__(self, results=(), budget=None):
+        """
+        Wrap matching results.
+        :param results An iterable of results.
+        :param budget The MatchBudget of the matching, or None.
+        """
+        self._results = iter(results)
+        self.budget = budget
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._results)
+
+    @property
+    def truncated(self):
+        """
+        Whether the results are truncated, i.e. whether the budget was exhausted (so far).
+        """
+        return self.budget is not None and self.budget.truncated
+
+
+def make_budget(max_results=None, max_states=None, deadline=None, budget=None):
+    """
+    Returns the given budget, or a new budget if any limit is given, or None.
+    """
+    if budget is not None:
+        assert max_results is None and max_states is None and deadline is None, 'Invalid argument combination.'
+        return budget
+    if max_results is None and max_states is None and deadline is None:
+        return None
+    return MatchBudget(max_results=max_results, max_states=max_states, deadline=deadline)
+
+
+class CompiledPattern(object):
+    """
+    A DMRS (sub)graph prepared for repeated exact matching against many graphs.
+    Node candidate tests, link constraints and top/index constraints are computed once.
+    """
+
+    def __init__(self, sub_dmrs, optional_nodeids=(), equalities=(), hierarchy=None, match_top_index=True):
+        """
+        Prepare a DMRS (sub)graph for exact matching.
+        :param sub_dmrs DMRS (sub)graph to match.
+        :param optional_nodeids
+        :param equalities
+        :param hierarchy An optional predicate hierarchy.
+        :param match_top_index
+        """
+        self.sub_dmrs = sub_dmrs
+        self.optional_nodeids = frozenset(optional_nodeids)
+        if isinstance(equalities, dict):
+            equalities = tuple(equalities.values())
+        self.equalities = tuple(equality for equality in equalities if len(equality) > 1)
+        self.node_tests = [(node.nodeid, compile_node_test(node, hierarchy=hierarchy)) for node in sub_dmrs.iter_nodes()]
+        self.neighbours = {nodeid: tuple(sub_dmrs.get_neighbours(nodeid, nodeids=True)) for nodeid in sub_dmrs}
+        self.links = tuple(sub_dmrs.iter_links())
+        self.link_count = len(self.links)
+        if match_top_index and sub_dmrs.top is not None:
+            self.top = sub_dmrs.top.nodeid
+        else:
+            self.top = None
+        if match_top_index and sub_dmrs.index is not None:
+            self.index = sub_dmrs.index.nodeid
+        else:
+            self.index = None
+
+    def match(self, dmrs, copy=True, fixed=None, candidates=None, max_results=None, max_states=None, deadline=None, budget=None):
+        """
+        Performs an exact DMRS (sub)graph matching of the prepared (sub)graph against a containing graph.
+        :param dmrs DMRS graph to match against.
+        :param copy False if the same (internally updated) dictionary should be yielded for every matching.
+        :param fixed An optional dictionary of node id pairs which are required to be part of every matching.
+        :param candidates An optional dictionary of precomputed lists of candidate node ids per node id of the (sub)graph.
+        :param max_results Maximum number of results.
+        :param max_states Maximum number of search states.
+        :param deadline Point in time (in seconds, see time.monotonic) after which matching stops.
+        :param budget A MatchBudget instead of the three limits above, e.g. shared between several matchings.
+        :return MatchResults of dictionaries, mapping node ids of the matched (sub)graph to the corresponding matching node id in the containing graph, which flag whether they are truncated once iterated.
+        """
+        budget = make_budget(max_results=max_results, max_states=max_states, deadline=deadline, budget=budget)
+        return MatchResults(self._match(dmrs, copy, fixed, candidates, budget), budget)
+
+    def _match(self, dmrs, copy, fixed, candidates, budget):
+        if budget is not None and not budget.step():
             return
+        optional_nodeids = self.optional_nodeids
+        matching = {}
+        matching_values = set()
+        matches = {}
 
-    # match index and top
-    if match_top_index:
-        # if sub_dmrs.top is None:
-        #     if dmrs.top is not None:
-        #         top = dmrs.top.nodeid
-        #         if top in matching.values():
-        #             return
-        #         for sub_nodeid, match in matches.items():
-        #             if top in match:
-        #                 match.remove(top)
-        #             if not match and sub_nodeid not in optional_nodeids:
-        #                 return
-        # else:
-        if sub_dmrs.top is not None:
-            if dmrs.top is None:
-                return
-            sub_top = sub_dmrs.top.nodeid
-            top = dmrs.top.nodeid
-            if sub_top in matching:
-                if matching[sub_top] != top:
+        # find matchable nodes and add unambiguous matchings
+        nodes = list(dmrs.iter_nodes())
+        for sub_nodeid, test in self.node_tests:
+            if fixed and sub_nodeid in fixed:
+                nodeid = fixed[sub_nodeid]
+                if nodeid not in dmrs or not test(dmrs[nodeid]):
                     return
+                matching[sub_nodeid] = nodeid
+                matching_values.add(nodeid)
+                continue
+            if candidates is not None and sub_nodeid in candidates:
+                match = list(candidates[sub_nodeid])
             else:
-                if top in matches[sub_top]:
-                    matching[sub_top] = top
-                    matching_values.add(top)
-                    del matches[sub_top]
-                else:
-                    return
-        # if sub_dmrs.index is None:
-        #     if dmrs.index is not None:
-        #         index = dmrs.index.nodeid
-        #         if index in matching.values():
-        #             return
-        #         for sub_nodeid, match in matches.items():
-        #             if index in match:
-        #                 match.remove(index)
-        #             if not match and sub_nodeid not in optional_nodeids:
-        #                 return
-        # else:
-        if sub_dmrs.index is not None:
-            if dmrs.index is None:
+                match = [node.nodeid for node in nodes if test(node)]
+            if match:
+                if sub_nodeid in optional_nodeids:
+                    match.append(None)
+                if len(match) == 1:
+                    matching[sub_nodeid] = match[0]
+                    matching_values.add(match[0])
+                    continue
+                matches[sub_nodeid] = match
+            elif sub_nodeid not in optional_nodeids:
+                return
+
+        # match index and top
+        for sub_nodeid, node in ((self.top, dmrs.top), (self.index, dmrs.index)):
+            if sub_nodeid is None:
+                continue
+            if node is None:
                 return
-            sub_index = sub_dmrs.index.nodeid
-            index = dmrs.index.nodeid
-            if sub_index in matching:
-                if matching[sub_index] != index:
+            nodeid = node.nodeid
+            if sub_nodeid in matching:
+                if matching[sub_nodeid] != nodeid:
                     return
+            elif nodeid in matches[sub_nodeid]:
+                matching[sub_nodeid] = nodeid
+                matching_values.add(nodeid)
+                del matches[sub_nodeid]
             else:
-                if index in matches[sub_index]:
-                    matching[sub_index] = index
-                    matching_values.add(index)
-                    del matches[sub_index]
-                else:
-                    return
+                return
 
-    change = True
-    while change:
-        change = False
+        change = True
+        while change:
+            change = False
+            for sub_nodeid, match in list(matches.items()):
+                match[:] = [m for m in match if m not in matching_values]
+                if len(match) == 1:
+                    m = matches.pop(sub_nodeid)[0]
+                    matching[sub_nodeid] = m
+                    matching_values.add(m)
+                    change = True
+
+        # optimisation for nodes with uniquely matching neighbour nodes
         for sub_nodeid, match in list(matches.items()):
-            for k, m in enumerate(match):
-                if m in matching_values:
-                    del match[k]
-            if len(match) == 1:
-                m = matches.pop(sub_nodeid)[0]
-                matching[sub_nodeid] = m
-                matching_values.add(m)
-                change = True
-
-    # optimisation for nodes with uniquely matching neighbour nodes
-    for sub_nodeid, match in list(matches.items()):
-        neighbours = []
-        for n in sub_dmrs.get_neighbours(sub_nodeid, nodeids=True):
-            if n not in matching:
-                break
-            neighbours.append(matching[n])
-        else:  # all neighbours in sub_dmrs match uniquely
-            candidate = None
-            for nodeid in match:
-                if nodeid is None:  # not possible if an optional node is present
-                    candidate = None
+            neighbours = []
+            for n in self.neighbours[sub_nodeid]:
+                if n not in matching:
                     break
-                if nodeid in matching_values or any(n not in dmrs.get_neighbours(nodeid, nodeids=True) for n in neighbours):  # node is already assigned or has invalid neighbourhood
+                neighbours.append(matching[n])
+            else:  # all neighbours in sub_dmrs match uniquely
+                candidate = None
+                for nodeid in match:
+                    if nodeid is None:  # not possible if an optional node is present
+                        candidate = None
+                        break
+                    if nodeid in matching_values or any(n not in dmrs.get_neighbours(nodeid, nodeids=True) for n in neighbours):  # node is already assigned or has invalid neighbourhood
+                        continue
+                    if candidate is not None:  # can't optimise in case of more than one candidate
+                        break
+                    candidate = nodeid
+                else:  # loop finished (no break), i.e. candidate is unique or non-existent
+                    if candidate is not None:
+                        matching[sub_nodeid] = candidate
+                        matching_values.add(candidate)
+                        del matches[sub_nodeid]
+
+        matches_items = list(matches.items())
+        sub_links = self.links
+        link_count = self.link_count
+        dmrs_links = [link for link in dmrs.iter_links()]
+
+        # checks whether the links match within the current node matching
+        def _check_links():
+            count = 0
+            for l1 in dmrs_links:
+                if l1.start not in matching_values or l1.end not in matching_values:
                     continue
-                if candidate is not None:  # can't optimise in case of more than one candidate
+                for l2 in sub_links:
+                    if (l2.rargname == '?' or l2.rargname == l1.rargname or (l1.rargname and l2.rargname == l1.rargname[:3] == 'ARG')) and (l2.post == '?' or l2.post == l1.post) and matching.get(l2.start) == l1.start and matching.get(l2.end) == l1.end:
+                        count += 1
+                        break
+                    # reversed directionality for None/EQ links which (so far) are undirected
+                    if l1.rargname is l2.rargname is None and l1.post == l2.post == 'EQ' and matching.get(l2.start) == l1.end and matching.get(l2.end) == l1.start:
+                        count += 1
+                        break
+                else:
+                    return False
+            return count == link_count
+
+        # does an exhaustive search over all the left-over matches in matches_items
+        def _exhaustive_search(n):
+            if not n:
+                if _check_links():
+                    yield matching.copy() if copy else matching
+                return
+            n -= 1
+            sub_nodeid, match = matches_items[n]
+            for nodeid in match:  # assign and recursively continue for every possible match
+                if nodeid is None or nodeid in matching_values:
+                    continue
+                if budget is not None and not budget.step():
                     break
-                candidate = nodeid
-            else:  # loop finished (no break), i.e. candidate is unique or non-existent
-                if candidate is not None:
-                    matching[sub_nodeid] = candidate
-                    matching_values.add(candidate)
-                    del matches[sub_nodeid]
-
-    matches_items = list(matches.items())
-
-    # does an exhaustive search over all the left-over matches in matches_items
-    def _exhaustive_search(n):
-        if not n:
-            if _check_links():
-                yield matching.copy()
-            return
-        n -= 1
-        sub_nodeid, match = matches_items[n]
-        for nodeid in match:  # assign and recursively continue for every possible match
-            if nodeid is None or nodeid in matching_values:
-                continue
-            matching[sub_nodeid] = nodeid
-            matching_values.add(nodeid)
-            for result in _exhaustive_search(n):
-                yield result
-            matching_values.remove(nodeid)
-        matching.pop(sub_nodeid, None)
-        if match[-1] is None:  # without assigning if optional node is present
-            for result in _exhaustive_search(n):
+                matching[sub_nodeid] = nodeid
+                matching_values.add(nodeid)
+                for result in _exhaustive_search(n):
+                    yield result
+                matching_values.remove(nodeid)
+            matching.pop(sub_nodeid, None)
+            if budget is not None and budget.truncated:
+                return
+            if match and match[-1] is None:  # without assigning if optional node is present
+                for result in _exhaustive_search(n):
+                    yield result
+
+        equalities = self.equalities
+        for result in _exhaustive_search(len(matches_items)):
+            if all(retriever(result, dmrs) == equality[0](result, dmrs) for equality in equalities for retriever in equality):
+                if budget is not None and not budget.result():
+                    return
                 yield result
 
-    # checks whether the links match within the current node matching
-    def _check_links():
+    def count(self, dmrs, budget=None):
+        """
+        Counts the exact matchings of the prepared (sub)graph against a containing graph, without copying matchings.
+        :param dmrs DMRS graph to match against.
+        :param budget An optional MatchBudget.
+        :return The number of matchings.
+        """
         count = 0
-        for l1 in dmrs.iter_links():
-            if l1.start not in matching_values or l1.end not in matching_values:
+        for _ in self._match(dmrs, False, None, None, budget):
+            count += 1
+        return count
+
+    def exists(self, dmrs, budget=None):
+        """
+        Checks whether the prepared (sub)graph matches a containing graph, stopping at the first matching.
+        :param dmrs DMRS graph to match against.
+        :param budget An optional MatchBudget.
+        :return True/False
+        """
+        for _ in self._match(dmrs, False, None, None, budget):
+            return True
+        return False
+
+
+class IncrementalMatching(object):
+    """
+    Iterates over the matchings of a compiled pattern against a graph which is rewritten in between, as in iterative
+    DMRS mapping. Matchings depend only on the attributes of the matched nodes, the links between them, and the top and
+    index of the graph. Hence, after a rewrite, only matchings containing a modified node are invalidated, and new
+    matchings are only searched for which contain a modified node, by fixing it to every pattern node it can match.
+    Matchings whose nodes all lie in the image of a single earlier rewrite (the nodes the replacement was mapped to)
+    are not yielded, even if the replacement matches the pattern again (e.g. if a rule swaps two arguments), so that
+    rewriting reaches a fixed point.
+    """
+
+    def __init__(self, pattern, dmrs, matchings=None, budget=None):
+        """
+        Start iterating over matchings.
+        :param pattern A CompiledPattern.
+        :param dmrs DMRS graph to match against, which is rewritten in between.
+        :param matchings An optional iterator of matchings of the pattern against the graph before any rewrite. If
+        None, the matchings are computed with pattern.match.
+        :param budget An optional MatchBudget, shared by all matching runs.
+        """
+        self.pattern = pattern
+        self.dmrs = dmrs
+        self.budget = budget
+        if matchings is None:
+            matchings = pattern.match(dmrs, budget=budget)
+        self._matchings = matchings
+        self._queue = deque()  # matchings found after rewrites
+        self._queued = set()
+        self._images = {}  # node id -> images of rewrites containing the node
+        self._touched = set()  # all nodes modified since the initial matchings were started
+        self._candidates = None
+        # distances between pattern nodes (via required nodes), which bound the distances of matched nodes
+        self._distances = {}
+        for sub_nodeid in pattern.sub_dmrs:
+            distances = {sub_nodeid: 0}
+            frontier = [sub_nodeid]
+            while frontier:
+                next_frontier = []
+                for nodeid in frontier:
+                    if nodeid in pattern.optional_nodeids and nodeid != sub_nodeid:
+                        continue
+                    for neighbour in pattern.neighbours[nodeid]:
+                        if neighbour not in distances:
+                            distances[neighbour] = distances[nodeid] + 1
+                            next_frontier.append(neighbour)
+                frontier = next_frontier
+            self._distances[sub_nodeid] = distances
+        self._radius = max((max(distances.values()) for distances in self._distances.values()), default=0)
+
+    @staticmethod
+    def _signature(matching):
+        return frozenset(matching.items())
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._queue:
+            matching = self._queue.popleft()
+            self._queued.discard(self._signature(matching))
+            return matching
+        for matching in self._matchings:
+            # matchings of the initial graph are valid as long as none of their nodes was modified
+            if not self._touched.intersection(matching.values()):
+                return matching
+        raise StopIteration
+
+    def _neighbourhood(self, nodeid):
+        """
+        Returns a dictionary mapping the node ids within the pattern's diameter of a node to their distance.
+        """
+        distances = {nodeid: 0}
+        frontier = [nodeid]
+        for distance in range(1, self._radius + 1):
+            next_frontier = []
+            for current in frontier:
+                for neighbour in self.dmrs.get_neighbours(current, nodeids=True):
+                    if neighbour not in distances:
+                        distances[neighbour] = distance
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        return distances
+
+    def _in_image(self, matching):
+        """
+        Checks whether all nodes of a matching lie in the image of a single earlier rewrite.
+        """
+        nodeids = set(matching.values())
+        nodeids.discard(None)
+        if not nodeids:
+            return False
+        return any(nodeids <= image for image in self._images.get(next(iter(nodeids)), ()))
+
+    def update(self, nodeids, image=None):
+        """
+        Updates the matchings after a rewrite.
+        :param nodeids Ids of nodes which were added, removed or modified, or whose links were added or removed.
+        :param image Ids of the nodes the replacement was mapped to, whose matchings are not yielded anymore.
+        """
+        nodeids = set(nodeids)
+        nodeids.discard(None)
+        self._touched.update(nodeids)
+        dmrs = self.dmrs
+        # forget images with removed nodes, since node ids may be reused
+        for nodeid in nodeids:
+            if nodeid not in dmrs:
+                for removed_image in self._images.pop(nodeid, ()):
+                    for other in removed_image:
+                        if removed_image in self._images.get(other, ()):
+                            self._images[other].remove(removed_image)
+        if image is not None:
+            image = frozenset(nodeid for nodeid in image if nodeid is not None)
+            for nodeid in image:
+                self._images.setdefault(nodeid, []).append(image)
+        self._queue = deque(queued for queued in self._queue if not nodeids.intersection(queued.values()))
+        self._queued = set(self._signature(queued) for queued in self._queue)
+
+        # update the candidate nodes per pattern node
+        if self._candidates is None:
+            self._candidates = {sub_nodeid: set(node.nodeid for node in dmrs.iter_nodes() if test(node))
+                                for sub_nodeid, test in self.pattern.node_tests}
+        else:
+            for sub_nodeid, test in self.pattern.node_tests:
+                candidates = self._candidates[sub_nodeid]
+                for nodeid in nodeids:
+                    if nodeid in dmrs and test(dmrs[nodeid]):
+                        candidates.add(nodeid)
+                    else:
+                        candidates.discard(nodeid)
+        candidates = {sub_nodeid: sorted(nodeids) for sub_nodeid, nodeids in self._candidates.items()}
+
+        # find the new matchings containing a modified node, among the nodes in its neighbourhood
+        for nodeid in sorted(nodeids):
+            if nodeid not in dmrs:
                 continue
-            for l2 in sub_dmrs.iter_links():
-                if (l2.rargname == '?' or l2.rargname == l1.rargname or (l1.rargname and l2.rargname == l1.rargname[:3] == 'ARG')) and (l2.post == '?' or l2.post == l1.post) and matching[l2.start] == l1.start and matching[l2.end] == l1.end:
-                    count += 1
-                    break
-                # reversed directionality for None/EQ links which (so far) are undirected
-                if l1.rargname is l2.rargname is None and l1.post == l2.post == 'EQ' and matching[l2.start] == l1.end and matching[l2.end] == l1.start:
-                    count += 1
-                    break
-            else:
-                return False
-        return count == sub_dmrs.count_links()
+            neighbourhood = self._neighbourhood(nodeid)
+            for sub_nodeid, _ in self.pattern.node_tests:
+                if nodeid not in self._candidates[sub_nodeid]:
+                    continue
+                distances = self._distances[sub_nodeid]
+                local_candidates = {}
+                for other, other_candidates in candidates.items():
+                    if other in distances:
+                        other_candidates = [n for n in other_candidates
+                                            if neighbourhood.get(n, self._radius + 1) <= distances[other]]
+                    local_candidates[other] = other_candidates
+                for new_matching in self.pattern.match(dmrs, fixed={sub_nodeid: nodeid}, candidates=local_candidates,
+                                                       budget=self.budget):
+                    signature = self._signature(new_matching)
+                    if signature in self._queued or self._in_image(new_matching):
+                        continue
+                    self._queue.append(new_matching)
+                    self._queued.add(signature)
 
-    if isinstance(equalities, dict):
-        equalities = tuple(equalities.values())
-    for result in _exhaustive_search(len(matches_items)):
-        if all(retriever(result, dmrs) == equality[0](result, dmrs) for equality in equalities for retriever in equality):
-            yield result
+
+def dmrs_exact_matching(sub_dmrs, dmrs, optional_nodeids=(), equalities=(), hierarchy=None, match_top_index=True, fixed=None, max_results=None, max_states=None, deadline=None, budget=None):
+    """
+    Performs an exact DMRS (sub)graph matching of a (sub)graph against a containing graph.
+    :param sub_dmrs DMRS (sub)graph to match, or a CompiledPattern.
+    :param dmrs DMRS graph to match against.
+    :param optional_nodeids
+    :param equalities
+    :param hierarchy An optional predicate hierarchy.
+    :param match_top_index
+    :param fixed An optional dictionary of node id pairs which are required to be part of every matching.
+    :param max_results Maximum number of results.
+    :param max_states Maximum number of search states.
+    :param deadline Point in time (in seconds, see time.monotonic) after which matching stops.
+    :param budget A MatchBudget instead of the three limits above, e.g. shared between several matchings.
+    :return MatchResults of dictionaries, mapping node ids of the matched (sub)graph to the corresponding matching node id in the containing graph, which flag whether they are truncated once iterated.
+    """
+    if not isinstance(dmrs, Dmrs):
+        return MatchResults()
+    if isinstance(sub_dmrs, CompiledPattern):
+        pattern = sub_dmrs
+    elif isinstance(sub_dmrs, Dmrs):
+        pattern = CompiledPattern(sub_dmrs, optional_nodeids=optional_nodeids, equalities=equalities, hierarchy=hierarchy, match_top_index=match_top_index)
+    else:
+        return MatchResults()
+    return pattern.match(dmrs, fixed=fixed, max_results=max_results, max_states=max_states, deadline=deadline, budget=budget)
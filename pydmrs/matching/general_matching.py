@@ -1,8 +1,10 @@
+from collections import Counter
 from itertools import product, chain
 
 from pydmrs.components import RealPred
 from pydmrs.core import DictDmrs
-from pydmrs.matching.common import are_equal_nodes, are_equal_links
+from pydmrs.matching.common import CompatibilityCache
+from pydmrs.matching.exact_matching import make_budget
 from pydmrs.matching.match_evaluation import get_fscore
 
 
@@ -11,11 +13,18 @@ class Match(object):
         The nodeid_pairs is a list of nodeid tuples (nodeid1, nodeid2), where
         nodeid1 and nodeid2 come from different DMRS.
         The link_pairs is the link equivalent of the nodeid_pairs.
+        Both lists may be extended in place; lookups use dictionaries which are
+        updated lazily with the newly appended pairs.
+        The approximate flag is set by find_best_matches if the match is not
+        guaranteed to be among the best ones.
     """
 
-    def __init__(self, nodeid_pairs=None, link_pairs=None):
-        self.nodeid_pairs = nodeid_pairs
-        self.link_pairs = link_pairs
+    def __init__(self, nodeid_pairs=None, link_pairs=None, approximate=False):
+        self.nodeid_pairs = nodeid_pairs if nodeid_pairs is not None else []
+        self.link_pairs = link_pairs if link_pairs is not None else []
+        self.approximate = approximate
+        self._indexed_nodeid_pairs = None
+        self._indexed_link_pairs = None
 
     def __str__(self):
         return "Nodes:{}; Links:{}".format(self.nodeid_pairs, self.link_pairs)
@@ -23,20 +32,72 @@ class Match(object):
     def __len__(self):
         return len(self.nodeid_pairs) + len(self.link_pairs)
 
+    def _update_node_index(self):
+        """Indexes node pairs appended since the last lookup (or re-indexes all if the list was replaced)."""
+        pairs = self.nodeid_pairs
+        if pairs is not self._indexed_nodeid_pairs or len(pairs) < self._node_count:
+            self._indexed_nodeid_pairs = pairs
+            self._node_count = 0
+            self._pair_set = set()
+            self._first_to_second = {}
+            self._second_to_first = {}
+        for n in range(self._node_count, len(pairs)):
+            nodeid1, nodeid2 = pair = pairs[n]
+            self._pair_set.add(pair)
+            self._first_to_second.setdefault(nodeid1, nodeid2)
+            self._second_to_first.setdefault(nodeid2, nodeid1)
+        self._node_count = len(pairs)
+
+    def _update_link_index(self):
+        """Indexes link pairs appended since the last lookup (or re-indexes all if the list was replaced)."""
+        pairs = self.link_pairs
+        if pairs is not self._indexed_link_pairs or len(pairs) < self._link_count:
+            self._indexed_link_pairs = pairs
+            self._link_count = 0
+            self._links1 = set()
+            self._links2 = set()
+        for n in range(self._link_count, len(pairs)):
+            link1, link2 = pairs[n]
+            self._links1.add(link1)
+            self._links2.add(link2)
+        self._link_count = len(pairs)
+
+    def first_nodeids(self):
+        """Returns a view of the matched nodeids from the first DMRS."""
+        self._update_node_index()
+        return self._first_to_second.keys()
+
+    def second_nodeids(self):
+        """Returns a view of the matched nodeids from the second DMRS."""
+        self._update_node_index()
+        return self._second_to_first.keys()
+
+    def has_nodeid_pair(self, nodeid_pair):
+        """Returns True if the pair (nodeid1, nodeid2) is part of the match."""
+        self._update_node_index()
+        return nodeid_pair in self._pair_set
+
+    def has_link(self, link, second=False):
+        """Returns True if the link from the first (resp. second) DMRS is part of the match."""
+        self._update_link_index()
+        return link in (self._links2 if second else self._links1)
+
     def add(self, match):
         """Combines self with match, resolving any conflicts in favour of self."""
         if self.is_compatible(match):
             self.nodeid_pairs.extend(match.nodeid_pairs)
             self.link_pairs.extend(match.link_pairs)
         else:
-            nodesA, nodesB = map(list, zip(*self.nodeid_pairs))
+            nodesA = set(self.first_nodeids())
+            nodesB = set(self.second_nodeids())
             for node_pair in match.nodeid_pairs:
                 if node_pair[0] not in nodesA and node_pair[1] not in nodesB:
                     self.nodeid_pairs.append(node_pair)
-                    nodesA.append(node_pair[0])
-                    nodesB.append(node_pair[1])
+                    nodesA.add(node_pair[0])
+                    nodesB.add(node_pair[1])
 
-            linksA, linksB = map(set, zip(*self.link_pairs))
+            self._update_link_index()
+            linksA, linksB = set(self._links1), set(self._links2)
             for link1, link2 in match.link_pairs:
                 if link1 not in linksA and link2 not in linksB:
                     if link1.start in nodesA and link1.end in nodesA:
@@ -52,36 +113,31 @@ class Match(object):
         """
         if len(self) == 0 or len(match2) == 0:
             return True
-        nodeA_set1, nodeA_set2 = map(set, zip(*self.nodeid_pairs))
-        nodeB_set1, nodeB_set2 = map(set, zip(*match2.nodeid_pairs))
-        if nodeA_set1.isdisjoint(nodeB_set1) and nodeA_set2.isdisjoint(nodeB_set2):
-            return True
-        else:
-            return False
+        return self.first_nodeids().isdisjoint(match2.first_nodeids()) and \
+            self.second_nodeids().isdisjoint(match2.second_nodeids())
 
     def get_first(self, nodeid):
-        for nodeid1, nodeid2 in self.nodeid_pairs:
-            if nodeid == nodeid2:
-                return nodeid1
-        return None
+        self._update_node_index()
+        return self._second_to_first.get(nodeid)
 
     def get_second(self, nodeid):
-        for nodeid1, nodeid2 in self.nodeid_pairs:
-            if nodeid == nodeid1:
-                return nodeid2
-        return None
+        self._update_node_index()
+        return self._first_to_second.get(nodeid)
 
 
 # ------------------------------------------------------------------------------
-def group_same_nodes(nodes):
+def group_same_nodes(nodes, compatibility_cache=None):
     """ Groups nodeids of equivalent nodes into sublists, using are_equal_nodes
         as the equivalency criterion.
 
         :param nodes A list of nodes.
+        :param compatibility_cache An optional CompatibilityCache for node comparisons.
         :return A list of tuples (pred, id list) sorted by pred. The pred is
                 the shared predicate of the group; the id_list is a list of
                 nodeids of equivalent nodes.
     """
+    if compatibility_cache is None:
+        compatibility_cache = CompatibilityCache()
     grouped_nodes = []
     group_node_type = None
     current_group = []
@@ -90,7 +146,7 @@ def group_same_nodes(nodes):
         if not group_node_type:
             group_node_type = node
             current_group.append(node.nodeid)
-        elif are_equal_nodes(node, group_node_type, underspecified=False):
+        elif compatibility_cache.are_equal_nodes(node, group_node_type, underspecified=False):
             current_group.append(node.nodeid)
         else:
             grouped_nodes.append((group_node_type.pred, current_group))
@@ -100,42 +156,70 @@ def group_same_nodes(nodes):
     return grouped_nodes
 
 
-def pair_same_node_groups(dmrs1, dmrs2, underspecified):
+def pair_same_node_groups(dmrs1, dmrs2, underspecified, compatibility_cache=None):
     """ Finds which nodes in dmrs1 are equivalent to which nodes in dmrs2. Allow the nodes in dmrs1 to be
     underspecified, but not the other way.
         :param dmrs1 A DMRS object. For matching, the small dmrs.
         :param dmrs2 A DMRS object. For matching, the large dmrs.
         :param underspecified: If True, the underspecified nodes in dmrs1 will be matched to more specific ones in
                             dmrs2.
+        :param compatibility_cache An optional CompatibilityCache for node comparisons.
 
         :return A list of tuples (pred, nodes from dmrs1, nodes from dmrs2). All
                 nodes in nodes from dmrs1 and nodes form dmrs2 are quivalent.
                 The pred is their common predicate. The list of tuples is sorted
                  by pred.
     """
-    grouped_nodes1 = group_same_nodes(dmrs1.nodes)
-    grouped_nodes2 = group_same_nodes(dmrs2.nodes)
+    if compatibility_cache is None:
+        compatibility_cache = CompatibilityCache()
+    grouped_nodes1 = group_same_nodes(dmrs1.nodes, compatibility_cache)
+    grouped_nodes2 = group_same_nodes(dmrs2.nodes, compatibility_cache)
     grouped_nodes = []
 
     for pred1, node_list1 in grouped_nodes1:
         paired_nodes2 = []
         for pred2, node_list2 in grouped_nodes2:
-            if dmrs1[node_list1[0]] == dmrs2[node_list2[0]]:
+            if compatibility_cache.are_equal_nodes(dmrs1[node_list1[0]], dmrs2[node_list2[0]], underspecified=False):
                 paired_nodes2 = node_list2
                 break
-            elif underspecified and dmrs1[node_list1[0]].is_less_specific(dmrs2[node_list2[0]]):
+            elif underspecified and compatibility_cache.is_less_specific(dmrs1[node_list1[0]], dmrs2[node_list2[0]]):
                 paired_nodes2.extend(node_list2)
         grouped_nodes.append((pred1, node_list1, paired_nodes2))
     return grouped_nodes
 
 
-def extend_match(match, start_nodeids, dmrs1, dmrs2, underspecified=True):
+def _are_equal_nodes(nodeid1, nodeid2, dmrs1, dmrs2, underspecified, cache, compatibility_cache):
+    """ Cached are_equal_nodes for a pair of nodeids."""
+    key = (nodeid1, nodeid2, underspecified)
+    if key not in cache:
+        cache[key] = compatibility_cache.are_equal_nodes(dmrs1[nodeid1], dmrs2[nodeid2], underspecified)
+    return cache[key]
+
+
+def _are_equal_links(link1, link2, dmrs1, dmrs2, cache, compatibility_cache):
+    """ Cached are_equal_links for two links with the same label."""
+    if _are_equal_nodes(link1.start, link2.start, dmrs1, dmrs2, True, cache, compatibility_cache) and \
+            _are_equal_nodes(link1.end, link2.end, dmrs1, dmrs2, True, cache, compatibility_cache):
+        return True
+    if link1.rargname is None:
+        return _are_equal_nodes(link1.start, link2.end, dmrs1, dmrs2, True, cache, compatibility_cache) and \
+            _are_equal_nodes(link1.end, link2.start, dmrs1, dmrs2, True, cache, compatibility_cache)
+    return False
+
+
+def extend_match(match, start_nodeids, dmrs1, dmrs2, underspecified=True, cache=None, compatibility_cache=None,
+                 budget=None):
     """ Finds a match between dmrs1 and dmrs2.
         :param match: A Match object to be extended.
         :param start_nodeids: A tuple of matching nodeids with which to start to match extension.
         :param dmrs1 A DMRS object. For matching, the small dmrs.
         :param dmrs2 A DMRS object. For matching, the large dmrs.
         :param underspecified: If True (default), treat underspecified nodes as equal.
+        :param cache: An optional dictionary caching node comparisons, shared between calls for the same two DMRS.
+        :param compatibility_cache: An optional CompatibilityCache for node comparisons, which can also be shared
+                            between calls for different DMRS.
+        :param budget: An optional MatchBudget. If it is exhausted, the match is not extended any further and the
+                            budget is flagged as truncated.
 
         The two start nodes should be equivalent by are_equal_nodes criterion.
 
@@ -147,12 +231,11 @@ def extend_match(match, start_nodeids, dmrs1, dmrs2, underspecified=True):
 
         :return A Match composed of updated matched_nodes, matched_links.
     """
+    if cache is None:
+        cache = {}
+    if compatibility_cache is None:
+        compatibility_cache = CompatibilityCache()
     match.nodeid_pairs.append(start_nodeids)
-    matched_first = set(x[0] for x in match.nodeid_pairs)
-    if match.link_pairs:
-        matched_links1, matched_links2 = tuple(set(x) for x in zip(*match.link_pairs))
-    else:
-        matched_links1, matched_links2 = set(), set()
     node_queue = []
     start_id1, start_id2 = start_nodeids
     links1 = dmrs1.get_out(start_id1)
@@ -161,46 +244,62 @@ def extend_match(match, start_nodeids, dmrs1, dmrs2, underspecified=True):
     links2 = dmrs2.get_out(start_id2)
     links2.update(dmrs2.get_in(start_id2))
     links2.update(dmrs2.get_eq(start_id2))
+    # only links with the same label can be equal
+    labelled_links2 = {}
+    for link2 in links2:
+        labelled_links2.setdefault(link2.label, []).append(link2)
     for link1 in links1:
-        if link1 not in matched_links1:
-            for link2 in links2:
-                if link2 not in matched_links2:
-                    if are_equal_links(link1, link2, dmrs1, dmrs2):
-                        if link1.start in matched_first and match.get_second(link1.start) != link2.start:
-                            continue
-                        if link1.end in matched_first and match.get_second(link1.end) != link2.end:
-                            continue
-                        match.link_pairs.append((link1, link2))
-                        matched_links1.add(link1)
-                        matched_links2.add(link2)
-                        paired1 = link1.start if link1.end == start_id1 else link1.end
-                        paired2 = link2.start if link2.end == start_id2 else link2.end
-                        node_queue.append((paired1, paired2))
-                        break
+        if match.has_link(link1):
+            continue
+        for link2 in labelled_links2.get(link1.label, ()):
+            if match.has_link(link2, second=True):
+                continue
+            if _are_equal_links(link1, link2, dmrs1, dmrs2, cache, compatibility_cache):
+                second = match.get_second(link1.start)
+                if second is not None and second != link2.start:
+                    continue
+                second = match.get_second(link1.end)
+                if second is not None and second != link2.end:
+                    continue
+                match.link_pairs.append((link1, link2))
+                paired1 = link1.start if link1.end == start_id1 else link1.end
+                paired2 = link2.start if link2.end == start_id2 else link2.end
+                node_queue.append((paired1, paired2))
+                break
 
     for nodeid1, nodeid2 in node_queue:
-        if (nodeid1, nodeid2) not in match.nodeid_pairs and are_equal_nodes(dmrs1[nodeid1], dmrs2[nodeid2],
-                                                                            underspecified):
-            extend_match(match, (nodeid1, nodeid2), dmrs1, dmrs2, underspecified)
+        if budget is not None and budget.expired():
+            return
+        if not match.has_nodeid_pair((nodeid1, nodeid2)) and \
+                _are_equal_nodes(nodeid1, nodeid2, dmrs1, dmrs2, underspecified, cache, compatibility_cache):
+            extend_match(match, (nodeid1, nodeid2), dmrs1, dmrs2, underspecified, cache, compatibility_cache, budget)
 
 
-def find_all_matches(dmrs1, dmrs2, underspecified=False):
+def find_all_matches(dmrs1, dmrs2, underspecified=False, compatibility_cache=None, budget=None):
     """ Finds all regions with potential matches between two DMRS graphs.
         :param dmrs1 A DMRS object. For matching, the small dmrs.
         :param dmrs2 A DMRS object. For matching, the large dmrs.
         :param underspecified: If True, the underspecified nodes in dmrs1 will be matched to more specific ones in
                             dmrs2.
+        :param compatibility_cache: An optional CompatibilityCache for node comparisons, e.g. shared between calls.
+        :param budget: An optional MatchBudget, where every extended start pair counts as a search state. If it is
+                            exhausted, the matches found so far are returned (the last one possibly only partly
+                            extended) and the budget is flagged as truncated.
 
         The function initiates a extend_match top call and repeats it until all
         possible pairings are explored. GPreds and quantifiers 'a' and 'the'
         are not allowed as the start ndoes of extend_match to narrow down the search
-        space.
+        space. Start pairs of rare preds are tried first. With a budget, start pairs
+        of the same pred are tried in order of decreasing number of links.
 
         :return A list of Match objects where pairs come from (dmrs1, dmrs2).
         """
-    node_pairings = pair_same_node_groups(dmrs1, dmrs2, underspecified)
+    if compatibility_cache is None:
+        compatibility_cache = CompatibilityCache()
+    node_pairings = pair_same_node_groups(dmrs1, dmrs2, underspecified, compatibility_cache)
     matches = []
-    checked_node_pairs = []
+    checked_node_pairs = set()
+    cache = {}
 
     # Sort pairs so that the ones with fewer matching combination are considered first.
     # Exclude GPreds and some quantifiers from the pool of start nodes.
@@ -212,36 +311,50 @@ def find_all_matches(dmrs1, dmrs2, underspecified=False):
 
     if not sorted_pairings:
         sorted_pairings = node_pairings
+    if budget is not None:
+        # try pairs of nodes with more links first, so that large matches are found before the budget runs out
+        degrees1 = Counter(nodeid for link in dmrs1.iter_links() for nodeid in (link.start, link.end))
+        degrees2 = Counter(nodeid for link in dmrs2.iter_links() for nodeid in (link.start, link.end))
+        key = lambda pair: -min(degrees1[pair[0]], degrees2[pair[1]])
     for pred, group1, group2 in sorted_pairings:
         all_pairs = product(group1, group2)
+        if budget is not None:
+            all_pairs = sorted(all_pairs, key=key)
         for pair in all_pairs:
-            if pair not in checked_node_pairs and are_equal_nodes(dmrs1[pair[0]], dmrs2[pair[1]],
-                                                                  underspecified=underspecified):
+            if pair not in checked_node_pairs and _are_equal_nodes(pair[0], pair[1], dmrs1, dmrs2, underspecified,
+                                                                   cache, compatibility_cache):
+                if budget is not None and not budget.step():
+                    return matches
                 match = Match([], [])
-                extend_match(match, (pair[0], pair[1]), dmrs1, dmrs2, underspecified)
-                checked_node_pairs.extend(match.nodeid_pairs)
+                extend_match(match, (pair[0], pair[1]), dmrs1, dmrs2, underspecified, cache, compatibility_cache,
+                             budget)
+                checked_node_pairs.update(match.nodeid_pairs)
                 matches.append(match)
     return matches  # (matched_nodes, matched_links)
 
 
+MAX_EXACT_MATCHES = 40
+MAX_TIED_GROUPS = 20
+
+
 def group_compatible_matches(matches):
     """ Groups matches into compatible sets of indices of non-conflicting matches.
-        Indices are given by the positions in the matches list.
+        Indices are given by the positions in the matches list. The grouping is
+        greedy, so the best group is not necessarily found (see select_compatible_matches).
         :param matches A list of Matches.
 
         :return A list of sets of integers. Each set is unique and contains matches indices
                 of compatible Matches.
     """
     are_all_clashes = True
-    clash_pairs = []
+    clash_pairs = set()
     for i in range(len(matches)):
         for j in range(i + 1, len(matches)):
-            if i != j:
-                if matches[i].is_compatible(matches[j]):
-                    are_all_clashes = False
-                else:
-                    clash_pairs.append((i, j))
-                    clash_pairs.append((j, i))
+            if matches[i].is_compatible(matches[j]):
+                are_all_clashes = False
+            else:
+                clash_pairs.add((i, j))
+                clash_pairs.add((j, i))
 
     combinations = [{i} for i in range(len(matches))]
     if are_all_clashes:
@@ -253,48 +366,152 @@ def group_compatible_matches(matches):
                 if comb.union({i}) in combinations:
                     combinations.remove(comb)
                     break
-                clash = False
-                for match_id in comb:
-                    if (i, match_id) in clash_pairs:
-                        clash = True
-                        break
-                if not clash:
+                if all((i, match_id) not in clash_pairs for match_id in comb):
                     comb.add(i)
     return combinations  # list of sets
 
 
-def find_biggest_disjoint_matches(matches):
+def get_clash_masks(matches):
+    """ Computes the clash graph of matches as bitsets.
+        :param matches A list of non-empty Matches.
+        :return A list of integers, where bit j of the i-th integer is set if
+                matches i and j pair some node differently (i.e. are not compatible).
+    """
+    first_masks = {}
+    second_masks = {}
+    for i, match in enumerate(matches):
+        for nodeid in match.first_nodeids():
+            first_masks[nodeid] = first_masks.get(nodeid, 0) | (1 << i)
+        for nodeid in match.second_nodeids():
+            second_masks[nodeid] = second_masks.get(nodeid, 0) | (1 << i)
+    clash_masks = []
+    for i, match in enumerate(matches):
+        mask = 0
+        for nodeid in match.first_nodeids():
+            mask |= first_masks[nodeid]
+        for nodeid in match.second_nodeids():
+            mask |= second_masks[nodeid]
+        clash_masks.append(mask & ~(1 << i))
+    return clash_masks
+
+
+def select_compatible_matches(matches, max_exact_size=MAX_EXACT_MATCHES, budget=None, max_groups=MAX_TIED_GROUPS):
+    """ Finds the sets of compatible matches which maximize the number of
+        elements matched, i.e. the maximum-weight independent sets of the clash
+        graph, where the weight of a match is its length.
+        Up to max_exact_size matches, an exact branch-and-bound search is used,
+        which bounds each branch by the heaviest match in each of a set of cliques
+        of clashing matches covering the remaining compatible matches. For more
+        matches, the best greedy groups of group_compatible_matches are returned
+        instead.
+        :param matches A list of Matches.
+        :param max_exact_size The maximum number of matches for the exact search.
+        :param budget An optional MatchBudget, where every branch of the exact search
+                counts as a search state. If it is exhausted, the best groups found so far
+                (or the greedy groups, if there are none yet) are returned.
+        :param max_groups The maximum number of tied optimal groups returned by the exact
+                search. Once reached, branches which cannot improve the score are pruned,
+                since there can be exponentially many tied groups.
+        :return A tuple (groups, exact), where groups is a list of sets of matches
+                indices with the highest score, and exact is True if the groups are
+                guaranteed to be optimal.
+    """
+    if not matches:
+        return [], True
+    weights = [len(match) for match in matches]
+    if len(matches) > max_exact_size or not all(weights) or (budget is not None and budget.truncated):
+        best_score = None
+        best_groups = []
+        for group in group_compatible_matches(matches):
+            group_score = sum(weights[i] for i in group)
+            if best_score is None or group_score > best_score:
+                best_score = group_score
+                best_groups = [group]
+            elif group_score == best_score:
+                best_groups.append(group)
+        return best_groups, False
+
+    # bit positions in order of decreasing weight, for earlier good solutions and tighter bounds
+    order = sorted(range(len(matches)), key=lambda i: -weights[i])
+    clash_masks = get_clash_masks([matches[i] for i in order])
+    ordered_weights = [weights[i] for i in order]
+    best = [0, []]  # best score, list of bitsets
+
+    def _search(candidates, chosen, score):
+        if budget is not None and not budget.step():
+            return
+        if not candidates:
+            if score > best[0]:
+                best[0] = score
+                best[1] = [chosen]
+            elif score == best[0] and len(best[1]) < max_groups:
+                best[1].append(chosen)
+            return
+        # cover the candidates greedily by cliques of pairwise clashing matches, of which at most one can be
+        # included, so that the heaviest (i.e. first) match of every clique bounds the branch
+        bound = score
+        cliques = []
+        remaining = candidates
+        while remaining:
+            bit = remaining & -remaining
+            n = bit.bit_length() - 1
+            remaining ^= bit
+            for c, clique in enumerate(cliques):
+                if not clique & ~clash_masks[n]:
+                    cliques[c] = clique | bit
+                    break
+            else:
+                cliques.append(bit)
+                bound += ordered_weights[n]
+        if bound < best[0] or (bound == best[0] and len(best[1]) >= max_groups):
+            return
+        bit = candidates & -candidates
+        n = bit.bit_length() - 1
+        # include the match
+        _search(candidates & ~clash_masks[n] & ~bit, chosen | bit, score + ordered_weights[n])
+        # exclude the match, which is only optimal if a clashing match is included instead
+        if candidates & clash_masks[n]:
+            _search(candidates & ~bit, chosen, score)
+
+    _search((1 << len(matches)) - 1, 0, 0)
+    if not best[1]:
+        # the budget was exhausted before any group was found
+        return select_compatible_matches(matches, max_exact_size=0)[0], False
+    groups = []
+    for chosen in best[1]:
+        groups.append({order[n] for n in range(len(matches)) if chosen >> n & 1})
+    groups.sort(key=sorted)
+    return groups, budget is None or not budget.truncated
+
+
+def find_biggest_disjoint_matches(matches, max_exact_size=MAX_EXACT_MATCHES, budget=None, max_groups=MAX_TIED_GROUPS):
     """ Finds collections of compatible matches which maximize the number of
         elements matches. Returns a list in case more than one combination scores
         the highest.
         :param matches A list of Matches.
+        :param max_exact_size The maximum number of matches for the exact search (see select_compatible_matches).
+        :param budget An optional MatchBudget for the exact search (see select_compatible_matches).
+        :param max_groups The maximum number of tied groups of the exact search (see select_compatible_matches).
         :return A list of tuples (group, Match, where group is a set of matches
-                indices (see group_compatible_matches) and the Match combines
-                all the Matches in the group.
+                indices and the Match combines all the Matches in the group. The
+                Matches are flagged as approximate if the groups are not guaranteed
+                to be optimal.
     """
-    compatible_groups = group_compatible_matches(matches)
-    best_score = 0
-    best_groups = None
-    for group in compatible_groups:
-        group_score = sum(len(matches[i]) for i in group)
-        if group_score > best_score:
-            best_score = group_score
-            best_groups = [group]
-        elif group_score == best_score:
-            best_groups.append(group)
-
+    best_groups, exact = select_compatible_matches(matches, max_exact_size=max_exact_size, budget=budget,
+                                                   max_groups=max_groups)
     full_matches = []
     for group in best_groups:
-        nodes = list(chain(*[matches[i].nodeid_pairs for i in group]))
-        links = list(chain(*[matches[i].link_pairs for i in group]))
-        full_matches.append((group, Match(nodes, links)))
+        nodes = list(chain(*[matches[i].nodeid_pairs for i in sorted(group)]))
+        links = list(chain(*[matches[i].link_pairs for i in sorted(group)]))
+        full_matches.append((group, Match(nodes, links, approximate=not exact)))
     return full_matches
 
 
 # -------------------------------------------------------------------------------\
 # IMPORTANT
 
-def find_best_matches(small_dmrs, large_dmrs, exact=False, underspecified=False):
+def find_best_matches(small_dmrs, large_dmrs, exact=False, underspecified=False, max_exact_size=MAX_EXACT_MATCHES,
+                      compatibility_cache=None, deadline=None, budget=None):
     """ Finds the best matches between two DMRS (in case more the one reached
         the same score). If disconnected matches found, it finds their optimal combination.
         :param small_dmrs A DMRS object.
@@ -302,22 +519,38 @@ def find_best_matches(small_dmrs, large_dmrs, exact=False, underspecified=False)
         :param exact: If True, only look for exact perfect matches.
         :param underspecified: If True, the underspecified nodes in small_dmrs will be matched to more specific ones in
                             large_dmrs.
-        :return A list of Matches.
+        :param max_exact_size: The maximum number of disconnected matches for which their optimal combination is
+                            searched exhaustively, instead of greedily (see select_compatible_matches).
+        :param compatibility_cache: An optional CompatibilityCache for node comparisons, e.g. shared between calls.
+        :param deadline: Point in time (in seconds, see time.monotonic) after which no more matches are extended or
+                            combined. The best matches found so far are then returned, flagged as approximate.
+        :param budget: A MatchBudget instead of the deadline, which can also limit the number of search states.
+        :return A list of Matches, or None if there is no match. If the deadline or budget is exhausted before the
+                first match is found, the list is empty.
     """
-    matches = find_all_matches(small_dmrs, large_dmrs, underspecified)
+    budget = make_budget(deadline=deadline, budget=budget)
+    matches = find_all_matches(small_dmrs, large_dmrs, underspecified, compatibility_cache=compatibility_cache,
+                               budget=budget)
+    truncated = budget is not None and budget.truncated
     if not matches:
-        return None
+        return [] if truncated else None
     else:
         if exact:
-            return [m for m in matches if get_fscore(m, small_dmrs) == 1]
+            matches = [m for m in matches if get_fscore(m, small_dmrs) == 1]
+            for match in matches:
+                match.approximate = truncated
+            return matches
         if len(matches) == 1:
+            matches[0].approximate = truncated
             return matches
         best_combinations = []
-        indexed_best_combined_matches = find_biggest_disjoint_matches(matches)
+        indexed_best_combined_matches = find_biggest_disjoint_matches(matches, max_exact_size=max_exact_size,
+                                                                      budget=budget)
         for index, match in indexed_best_combined_matches:
             leftovers = [matches[i] for i in range(len(matches)) if i not in index]
             for extra_match in leftovers:
                 match.add(extra_match)
+            match.approximate = match.approximate or truncated
             best_combinations.append(match)
         return best_combinations
 
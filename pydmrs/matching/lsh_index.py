@@ -0,0 +1,206 @@
+import json
+import random
+from hashlib import blake2b
+
+from pydmrs.core import ListDmrs
+from pydmrs.matching.exact_matching import CompiledPattern
+from pydmrs.matching.similarity_index import dmrs_sketch, general_similarity
+
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def dmrs_shingles(dmrs):
+    """
+    Computes the shingles of a DMRS graph: its predicates and its labelled edge triples (start predicate, link
+    label, end predicate), as in dmrs_sketch but without multiplicities.
+    :param dmrs A Dmrs object.
+    :return A set of shingles.
+    """
+    return set(dmrs_sketch(dmrs))
+
+
+def hash_shingle(shingle):
+    """
+    Hashes a shingle to a 32-bit integer, independently of the Python hash seed (so that hashes can be stored).
+    """
+    return int.from_bytes(blake2b('\t'.join(shingle).encode('utf-8'), digest_size=4).digest(), 'big')
+
+
+def exact_verification(query_dmrs, dmrs):
+    """
+    Verifies a near duplicate with exact matching.
+    :return True if query_dmrs matches the whole of dmrs, i.e. both graphs have the same nodes and links (up to
+    underspecification in query_dmrs).
+    """
+    if len(query_dmrs) != len(dmrs) or query_dmrs.count_links() != dmrs.count_links():
+        return False
+    return CompiledPattern(query_dmrs, match_top_index=False).exists(dmrs)
+
+
+class LshIndex(object):
+    """
+    A locality-sensitive hashing index for finding near duplicates of DMRS graphs in a corpus.
+    Every graph is represented by a MinHash signature of its shingles (see dmrs_shingles), which estimates the Jaccard
+    similarity of the shingle sets. Signatures are split into bands, and graphs which agree on all values of at least
+    one band are candidates, so that a query only needs to look up one bucket per band.
+    """
+
+    def __init__(self, num_perm=64, bands=16, seed=1):
+        """
+        Create a new empty index.
+        :param num_perm The number of hash functions, i.e. the length of a signature.
+        :param bands The number of bands, which has to divide num_perm. More bands (of fewer rows) find candidates of
+        lower similarity.
+        :param seed The seed of the hash functions. Signatures are only comparable for equal num_perm and seed.
+        """
+        assert num_perm % bands == 0, 'The number of bands has to divide the number of hash functions.'
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        rand = random.Random(seed)
+        self.permutations = [(rand.randint(1, MERSENNE_PRIME - 1), rand.randint(0, MERSENNE_PRIME - 1))
+                             for _ in range(num_perm)]
+        self.graphs = {}
+        self.signatures = {}
+        self.buckets = [{} for _ in range(bands)]  # band -> band values -> list of graph ids
+        self._next_id = 0
+
+    def __len__(self):
+        """
+        Return the number of indexed graphs
+        """
+        return len(self.signatures)
+
+    def __contains__(self, graph_id):
+        return graph_id in self.signatures
+
+    def __getitem__(self, graph_id):
+        return self.graphs[graph_id]
+
+    def signature(self, dmrs):
+        """
+        Computes the MinHash signature of a graph.
+        :param dmrs A Dmrs object.
+        :return A tuple of num_perm integers.
+        """
+        hashes = [hash_shingle(shingle) for shingle in dmrs_shingles(dmrs)]
+        if not hashes:
+            return (MAX_HASH,) * self.num_perm
+        return tuple(min((a * x + b) % MERSENNE_PRIME for x in hashes) & MAX_HASH for a, b in self.permutations)
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [tuple(signature[n * rows:(n + 1) * rows]) for n in range(self.bands)]
+
+    def add(self, dmrs, graph_id=None, signature=None):
+        """
+        Add a graph to the index.
+        :param dmrs A Dmrs object (or None, to only index a precomputed signature).
+        :param graph_id The graph id. If None, the next free consecutive integer id.
+        :param signature A precomputed signature of dmrs.
+        :return The graph id.
+        """
+        if graph_id is None:
+            graph_id = self._next_id
+        assert graph_id not in self.signatures, 'Graph id already indexed.'
+        if isinstance(graph_id, int) and graph_id >= self._next_id:
+            self._next_id = graph_id + 1
+        if signature is None:
+            signature = self.signature(dmrs)
+        assert len(signature) == self.num_perm, 'Signature of wrong length.'
+        self.signatures[graph_id] = tuple(signature)
+        if dmrs is not None:
+            self.graphs[graph_id] = dmrs
+        for buckets, key in zip(self.buckets, self._band_keys(signature)):
+            buckets.setdefault(key, []).append(graph_id)
+        return graph_id
+
+    def jaccard(self, signature1, signature2):
+        """
+        Estimates the Jaccard similarity of the shingle sets of two graphs from their signatures.
+        :return The fraction of equal signature values.
+        """
+        return sum(1 for x, y in zip(signature1, signature2) if x == y) / self.num_perm
+
+    def candidates(self, query_dmrs):
+        """
+        Finds the graphs which share at least one band with a query.
+        :param query_dmrs The query DMRS.
+        :return A list of graph ids, in order of insertion per bucket.
+        """
+        return list(self._candidates(self.signature(query_dmrs)))
+
+    def _candidates(self, signature):
+        seen = set()
+        for buckets, key in zip(self.buckets, self._band_keys(signature)):
+            for graph_id in buckets.get(key, ()):
+                if graph_id not in seen:
+                    seen.add(graph_id)
+                    yield graph_id
+
+    def query(self, query_dmrs, threshold=0.5):
+        """
+        Finds candidate near duplicates of a query, with their estimated Jaccard similarity.
+        :param query_dmrs The query DMRS.
+        :param threshold The minimum estimated Jaccard similarity.
+        :return A list of pairs (graph id, estimated Jaccard similarity), most similar first.
+        """
+        signature = self.signature(query_dmrs)
+        results = []
+        for graph_id in self._candidates(signature):
+            similarity = self.jaccard(signature, self.signatures[graph_id])
+            if similarity >= threshold:
+                results.append((graph_id, similarity))
+        results.sort(key=lambda x: -x[1])
+        return results
+
+    def near_duplicates(self, query_dmrs, threshold=0.5, verify='exact', min_similarity=1):
+        """
+        Finds near duplicates of a query, verified with a graph matcher.
+        :param query_dmrs The query DMRS.
+        :param threshold The minimum estimated Jaccard similarity of candidates.
+        :param verify 'exact' to only keep graphs which exactly match the query (see exact_verification), 'general'
+        to keep graphs with a general matching fscore of at least min_similarity, a function taking the query and a
+        graph and returning True/False, or None to keep all candidates.
+        :param min_similarity The minimum fscore for verify='general'.
+        :return A list of pairs (graph id, estimated Jaccard similarity), most similar first.
+        """
+        if verify == 'exact':
+            verify = exact_verification
+        elif verify == 'general':
+            def verify(query_dmrs, dmrs):
+                return general_similarity(query_dmrs, dmrs) >= min_similarity
+        results = self.query(query_dmrs, threshold=threshold)
+        if verify is None:
+            return results
+        return [(graph_id, similarity) for graph_id, similarity in results
+                if graph_id in self.graphs and verify(query_dmrs, self.graphs[graph_id])]
+
+    def dump(self, filehandle):
+        """
+        Write the index to a (text) file, including the graphs as DMRS XML.
+        """
+        json.dump({'num_perm': self.num_perm,
+                   'bands': self.bands,
+                   'seed': self.seed,
+                   'graphs': [[graph_id, list(signature),
+                               self.graphs[graph_id].dumps_xml(encoding='utf-8') if graph_id in self.graphs else None]
+                              for graph_id, signature in self.signatures.items()]},
+                  filehandle)
+
+    @classmethod
+    def load(cls, filehandle, dmrs_cls=ListDmrs):
+        """
+        Read an index from a (text) file written by dump. More graphs can be added to the loaded index.
+        :param dmrs_cls The DMRS class of loaded graphs.
+        :return An LshIndex.
+        """
+        data = json.load(filehandle)
+        index = cls(num_perm=data['num_perm'], bands=data['bands'], seed=data['seed'])
+        for graph_id, signature, xml in data['graphs']:
+            dmrs = dmrs_cls.loads_xml(xml, encoding='utf-8') if xml is not None else None
+            index.add(dmrs, graph_id=graph_id, signature=signature)
+        return index
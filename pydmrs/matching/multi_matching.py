@@ -0,0 +1,165 @@
+from pydmrs.core import Dmrs
+from pydmrs.graphlang.graphlang import parse_graphlang
+from pydmrs.matching.common import node_signature
+from pydmrs.matching.corpus_index import graph_keys, pattern_requirements
+from pydmrs.matching.exact_matching import CompiledPattern, compile_node_test
+
+
+class MultiPatternMatcher(object):
+    """
+    Matches many DMRS (sub)graph patterns against a graph in a single pass.
+    Patterns are indexed by an anchor element (a fully specified pred or link), so that only patterns whose required
+    elements all occur in the graph are tried. Candidate node lookups are shared between all pattern nodes with the
+    same pred, carg and sortinfo, and so are the candidate node pairs of all pattern links with the same label between
+    such nodes. These one-link partial matches prune the candidates of every pattern before its search, and identical
+    patterns are only matched once. Larger partial matches are not shared.
+    """
+
+    def __init__(self, patterns, hierarchy=None, match_top_index=True):
+        """
+        Prepare a collection of patterns.
+        :param patterns A dictionary mapping keys to DMRS (sub)graphs or GraphLang strings, or an iterable of
+        these (the keys are then given by the position).
+        :param hierarchy An optional predicate hierarchy.
+        :param match_top_index
+        """
+        if not isinstance(patterns, dict):
+            patterns = dict(enumerate(patterns))
+        self.hierarchy = hierarchy
+        self.keys = list(patterns)
+        self.node_tests = {}  # node signature -> candidate test
+        self.unique_patterns = []  # (compiled pattern, node signatures, keys)
+        self.pattern_edges = []  # per unique pattern, list of (start node id, end node id, edge key)
+        self.edge_links = {}  # edge key -> pattern link
+        self.anchored = {}  # anchor key -> list of (unique pattern index, requirements)
+        self.unanchored = []  # unique pattern indices without requirements
+        unique_ids = {}
+        for key, search_dmrs in patterns.items():
+            equalities = ()
+            if not isinstance(search_dmrs, Dmrs):
+                equalities = {}
+                search_dmrs = parse_graphlang(search_dmrs, equalities=equalities)
+            optional_nodeids = [node.nodeid for node in search_dmrs.iter_nodes() if not getattr(node, 'required', True)]
+            signatures = {}
+            for node in search_dmrs.iter_nodes():
+                signature = node_signature(node)
+                if signature not in self.node_tests:
+                    self.node_tests[signature] = compile_node_test(node, hierarchy=hierarchy)
+                signatures[node.nodeid] = signature
+            # identical patterns (without equality constraints) share their matchings
+            identity = None
+            if not equalities:
+                identity = (tuple(sorted(signatures.items(), key=lambda x: x[0])),
+                            tuple(sorted(search_dmrs.iter_links(), key=str)),
+                            search_dmrs.top.nodeid if search_dmrs.top is not None else None,
+                            search_dmrs.index.nodeid if search_dmrs.index is not None else None,
+                            tuple(sorted(optional_nodeids)))
+                if identity in unique_ids:
+                    self.unique_patterns[unique_ids[identity]][2].append(key)
+                    continue
+            n = len(self.unique_patterns)
+            if identity is not None:
+                unique_ids[identity] = n
+            pattern = CompiledPattern(search_dmrs, optional_nodeids=optional_nodeids, equalities=equalities, hierarchy=hierarchy, match_top_index=match_top_index)
+            self.unique_patterns.append((pattern, signatures, [key]))
+            edges = []
+            for link in search_dmrs.iter_links():
+                if link.start in optional_nodeids or link.end in optional_nodeids:
+                    continue
+                edge = (signatures[link.start], link.rargname, link.post, signatures[link.end])
+                self.edge_links.setdefault(edge, link)
+                edges.append((link.start, link.end, edge))
+            self.pattern_edges.append(edges)
+            requirements = pattern_requirements(search_dmrs, optional_nodeids=optional_nodeids, hierarchy=hierarchy)
+            if requirements:
+                # anchor on the most specific element, i.e. an edge or a pred rather than a link label
+                anchor = max(requirements, key=lambda x: (x[0] == 'edge', x[0] == 'pred', str(x)))
+                self.anchored.setdefault(anchor, []).append((n, requirements))
+            else:
+                self.unanchored.append(n)
+
+    def __len__(self):
+        """
+        Return the number of patterns
+        """
+        return len(self.keys)
+
+    def candidate_patterns(self, dmrs):
+        """
+        Find the patterns whose required, fully specified elements all occur in a graph.
+        :param dmrs A Dmrs object.
+        :return A sorted list of indices of unique patterns.
+        """
+        keys = graph_keys(dmrs)
+        selected = list(self.unanchored)
+        for key in keys:
+            for n, requirements in self.anchored.get(key, ()):
+                if requirements <= keys:
+                    selected.append(n)
+        return sorted(selected)
+
+    def match(self, dmrs):
+        """
+        Matches all patterns against a graph.
+        :param dmrs A Dmrs object.
+        :return Iterator of pairs (pattern key, matching dictionary), mapping node ids of the pattern to node ids of
+        dmrs.
+        """
+        nodes = list(dmrs.iter_nodes())
+        links = list(dmrs.iter_links())
+        candidates = {}  # node signature -> candidate node ids, shared between patterns
+        edge_pairs = {}  # edge key -> candidate node id pairs, shared between patterns
+        for n in self.candidate_patterns(dmrs):
+            pattern, signatures, keys = self.unique_patterns[n]
+            pattern_candidates = {}
+            for nodeid, signature in signatures.items():
+                if signature not in candidates:
+                    test = self.node_tests[signature]
+                    candidates[signature] = [node.nodeid for node in nodes if test(node)]
+                pattern_candidates[nodeid] = candidates[signature]
+            # restrict the candidates of linked nodes to the endpoints of matching links
+            for start, end, edge in self.pattern_edges[n]:
+                if edge not in edge_pairs:
+                    edge_pairs[edge] = _link_candidates(self.edge_links[edge], links,
+                                                        set(candidates[edge[0]]), set(candidates[edge[3]]))
+                starts, ends = edge_pairs[edge]
+                pattern_candidates[start] = [nodeid for nodeid in pattern_candidates[start] if nodeid in starts]
+                pattern_candidates[end] = [nodeid for nodeid in pattern_candidates[end] if nodeid in ends]
+            for matching in pattern.match(dmrs, candidates=pattern_candidates):
+                yield keys[0], matching
+                for key in keys[1:]:
+                    # identical patterns get their own copy of the matching
+                    yield key, dict(matching)
+
+    def matched(self, dmrs):
+        """
+        Matches all patterns against a graph, and collects the results per pattern.
+        :param dmrs A Dmrs object.
+        :return A dictionary mapping keys of matched patterns to lists of matching dictionaries.
+        """
+        results = {}
+        for key, matching in self.match(dmrs):
+            results.setdefault(key, []).append(matching)
+        return results
+
+
+def _link_candidates(sub_link, links, starts, ends):
+    """
+    Finds the links of a graph which match a pattern link between candidate nodes (see CompiledPattern.match).
+    :param sub_link The pattern link.
+    :param links The links of the graph.
+    :param starts Set of candidate node ids for the start of the pattern link.
+    :param ends Set of candidate node ids for the end of the pattern link.
+    :return A pair of the sets of node ids which can match the start and the end of the pattern link.
+    """
+    matched_starts = set()
+    matched_ends = set()
+    for link in links:
+        if (sub_link.rargname == '?' or sub_link.rargname == link.rargname or (link.rargname and sub_link.rargname == link.rargname[:3] == 'ARG')) and (sub_link.post == '?' or sub_link.post == link.post) and link.start in starts and link.end in ends:
+            matched_starts.add(link.start)
+            matched_ends.add(link.end)
+        # reversed directionality for undirected None/EQ links
+        if link.rargname is sub_link.rargname is None and link.post == sub_link.post == 'EQ' and link.end in starts and link.start in ends:
+            matched_starts.add(link.end)
+            matched_ends.add(link.start)
+    return matched_starts, matched_ends
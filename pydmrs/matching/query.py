@@ -1,40 +1,149 @@
 import sys
 from pydmrs.core import Dmrs, ListDmrs
-from pydmrs.matching.exact_matching import dmrs_exact_matching
+from pydmrs.matching.exact_matching import CompiledPattern, MatchResults, make_budget
+from pydmrs.matching.corpus_index import pattern_requirements
 from pydmrs.graphlang.graphlang import parse_graphlang
 
 
+class CompiledQuery(object):
+    """
+    A GraphLang query pattern which is parsed and prepared once, and can then be run against any number of DMRS graphs.
+    """
+
+    def __init__(self, search_dmrs_graphlang, hierarchy=None):
+        """
+        Compile a query pattern.
+        :param search_dmrs_graphlang The query DMRS (sub)graph, given as a GraphLang string.
+        :param hierarchy An optional predicate hierarchy.
+        """
+        queries = {}
+        equalities = {}
+        self.graphlang = search_dmrs_graphlang
+        self.search_dmrs = parse_graphlang(search_dmrs_graphlang, queries=queries, equalities=equalities)
+        self.keys = tuple(sorted(queries))
+        self.retrievers = tuple(queries[key] for key in self.keys)
+        self.pattern = CompiledPattern(self.search_dmrs, equalities=equalities, hierarchy=hierarchy)
+        self.requirements = pattern_requirements(self.search_dmrs, hierarchy=hierarchy)
+
+    def run(self, dmrs, results_as_dict=False, budget=None):
+        """
+        Queries a single DMRS graph.
+        :param dmrs The DMRS graph to query.
+        :param results_as_dict True if a query result should be a dictionary, mapping identifiers to values.
+        :param budget An optional MatchBudget.
+        :return Iterator of query results, one per matching.
+        """
+        assert isinstance(dmrs, Dmrs), 'Object in dmrs_iter is not a Dmrs.'
+        retrievers = self.retrievers
+        if results_as_dict:
+            keys = self.keys
+            for matching in self.pattern.match(dmrs, copy=False, budget=budget):
+                yield {key: retriever(matching, dmrs) for key, retriever in zip(keys, retrievers)}
+        else:
+            for matching in self.pattern.match(dmrs, copy=False, budget=budget):
+                yield tuple(retriever(matching, dmrs) for retriever in retrievers)
+
+    def count(self, dmrs, budget=None):
+        """
+        Counts the matchings of the query in a single DMRS graph, without retrieving query results.
+        :param dmrs The DMRS graph to query.
+        :param budget An optional MatchBudget.
+        :return The number of matchings.
+        """
+        assert isinstance(dmrs, Dmrs), 'Object in dmrs_iter is not a Dmrs.'
+        return self.pattern.count(dmrs, budget=budget)
+
+    def exists(self, dmrs, budget=None):
+        """
+        Checks whether the query matches a single DMRS graph, stopping at the first matching.
+        :param dmrs The DMRS graph to query.
+        :param budget An optional MatchBudget.
+        :return True/False
+        """
+        assert isinstance(dmrs, Dmrs), 'Object in dmrs_iter is not a Dmrs.'
+        return self.pattern.exists(dmrs, budget=budget)
+
+    def run_many(self, dmrs_iter, results_as_dict=False, results_per_dmrs=False, corpus_index=None, mode='results', max_results=None, max_states=None, deadline=None, budget=None):
+        """
+        Queries a sequence of DMRS graphs.
+        :param dmrs_iter An iterator of DMRS graphs to query.
+        :param results_as_dict True if a query result should be a dictionary, mapping identifiers to values.
+        :param results_per_dmrs True if a (possibly empty) list per DMRS should be returned.
+        :param corpus_index An optional CorpusIndex of dmrs_iter, with graph ids given by the position in dmrs_iter.
+        :param mode 'results' for query results, 'count' for the number of matchings per DMRS graph, or 'exists' for
+        whether there is a matching per DMRS graph.
+        :param max_results Maximum number of matchings in total.
+        :param max_states Maximum number of search states in total.
+        :param deadline Point in time (in seconds, see time.monotonic) after which querying stops.
+        :param budget A MatchBudget instead of the three limits above, e.g. shared between several queries.
+        :return MatchResults of query results (resp. lists of query results, numbers of matchings or True/False per
+        DMRS graph), which flag whether they are truncated once iterated.
+        """
+        assert mode in ('results', 'count', 'exists'), 'Invalid query mode.'
+        budget = make_budget(max_results=max_results, max_states=max_states, deadline=deadline, budget=budget)
+        return MatchResults(self._run_many(dmrs_iter, results_as_dict, results_per_dmrs, corpus_index, mode, budget),
+                            budget)
+
+    def _run_many(self, dmrs_iter, results_as_dict, results_per_dmrs, corpus_index, mode, budget):
+        run = self.run
+        if corpus_index is not None:
+            candidates = corpus_index.candidates(requirements=self.requirements)
+        for graph_id, dmrs in enumerate(dmrs_iter):
+            if budget is not None and budget.truncated:
+                return
+            if corpus_index is not None and graph_id not in candidates:
+                # the graph lacks a fully specified element of the query
+                if mode == 'count':
+                    yield 0
+                elif mode == 'exists':
+                    yield False
+                elif results_per_dmrs:
+                    yield []
+                continue
+            if mode == 'count':
+                yield self.count(dmrs, budget=budget)
+                continue
+            if mode == 'exists':
+                yield self.exists(dmrs, budget=budget)
+                continue
+            if results_per_dmrs:
+                yield list(run(dmrs, results_as_dict=results_as_dict, budget=budget))
+            else:
+                for result in run(dmrs, results_as_dict=results_as_dict, budget=budget):
+                    yield result
+
+
+def compile_query(search_dmrs_graphlang, hierarchy=None):
+    """
+    Compiles a GraphLang query pattern for repeated use with dmrs_query.
+    :param search_dmrs_graphlang The query DMRS (sub)graph, given as a GraphLang string.
+    :param hierarchy An optional predicate hierarchy.
+    :return A CompiledQuery.
+    """
+    return CompiledQuery(search_dmrs_graphlang, hierarchy=hierarchy)
+
+
 # not all_matches then None if no match
-def dmrs_query(dmrs_iter, search_dmrs_graphlang, results_as_dict=False, results_per_dmrs=False):
+def dmrs_query(dmrs_iter, search_dmrs_graphlang, results_as_dict=False, results_per_dmrs=False, corpus_index=None, mode='results', max_results=None, max_states=None, deadline=None, budget=None):
     """
     Queries DMRS graphs for an underspecified (sub)graph pattern and returns the values of named wildcards (of the form "?[Identifier]") as they are specified in the queried graph.
     :param dmrs_iter An iterator of DMRS graphs to query.
-    :param search_dmrs_graphlang The query DMRS (sub)graph, given as a GraphLang string.
+    :param search_dmrs_graphlang The query DMRS (sub)graph, given as a GraphLang string or a CompiledQuery.
     :param results_as_dict True if a query result should be a dictionary, mapping identifiers to values.
     :param results_per_dmrs True if a (possibly empty) list per DMRS should be returned.
-    :return Iterator of dicts containing the matching node ids.
+    :param corpus_index An optional CorpusIndex of dmrs_iter (graph ids given by the position in dmrs_iter), to only match candidate graphs.
+    :param mode 'results' for query results, 'count' for the number of matchings per DMRS graph, or 'exists' for whether there is a matching per DMRS graph.
+    :param max_results Maximum number of matchings in total.
+    :param max_states Maximum number of search states in total.
+    :param deadline Point in time (in seconds, see time.monotonic) after which querying stops.
+    :param budget A MatchBudget instead of the three limits above, e.g. shared between several queries.
+    :return MatchResults of dicts containing the matching node ids (resp. numbers of matchings or True/False per DMRS graph), which flag whether they are truncated once iterated.
     """
-    queries = {}
-    search_dmrs = parse_graphlang(search_dmrs_graphlang, queries=queries)
-    queries = [(key, queries[key]) for key in sorted(queries)]
-    for dmrs in dmrs_iter:
-        assert isinstance(dmrs, Dmrs), 'Object in dmrs_iter is not a Dmrs.'
-        # perform an exact matching of search_dmrs against dmrs
-        matchings = dmrs_exact_matching(search_dmrs, dmrs)
-        if results_per_dmrs:
-            results = []
-        for matching in matchings:
-            # extract matched values
-            if results_as_dict:
-                result = {key: query(matching, dmrs) for key, query in queries}
-            else:
-                result = tuple(query(matching, dmrs) for _, query in queries)
-            if results_per_dmrs:
-                results.append(result)
-            else:
-                yield result
-        if results_per_dmrs:
-            yield results
+    if isinstance(search_dmrs_graphlang, CompiledQuery):
+        query = search_dmrs_graphlang
+    else:
+        query = CompiledQuery(search_dmrs_graphlang)
+    return query.run_many(dmrs_iter, results_as_dict=results_as_dict, results_per_dmrs=results_per_dmrs, corpus_index=corpus_index, mode=mode, max_results=max_results, max_states=max_states, deadline=deadline, budget=budget)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,159 @@
+import heapq
+from collections import Counter
+from functools import partial
+
+from pydmrs.matching import aligned_matching
+from pydmrs.matching.common import CompatibilityCache
+from pydmrs.matching.general_matching import find_best_matches
+from pydmrs.matching.match_evaluation import get_fscore
+
+
+def dmrs_sketch(dmrs):
+    """
+    Computes a cheap sketch of a DMRS graph: the multiset of its predicates and of its labelled edge triples
+    (start predicate, link label, end predicate). Undirected (None/EQ) links are counted with sorted endpoints.
+    :param dmrs A Dmrs object.
+    :return A Counter of features.
+    """
+    sketch = Counter(('pred', str(node.pred)) for node in dmrs.iter_nodes())
+    for link in dmrs.iter_links():
+        start = str(dmrs[link.start].pred)
+        end = str(dmrs[link.end].pred)
+        if link.rargname is None and link.post == 'EQ' and end < start:
+            start, end = end, start
+        sketch[('edge', start, link.labelstring, end)] += 1
+    return sketch
+
+
+def general_similarity(query_dmrs, dmrs, compatibility_cache=None):
+    """
+    Scores a graph against a query with general matching.
+    :param compatibility_cache An optional CompatibilityCache for node comparisons.
+    :return The best fscore of a match of query_dmrs in dmrs (0 if there is none).
+    """
+    matches = find_best_matches(query_dmrs, dmrs, compatibility_cache=compatibility_cache)
+    if not matches:
+        return 0
+    return max(get_fscore(match, query_dmrs) for match in matches)
+
+
+def aligned_similarity(query_dmrs, dmrs, compatibility_cache=None):
+    """
+    Scores a graph against a query with aligned matching (requires node spans).
+    :param compatibility_cache An optional CompatibilityCache for node comparisons.
+    :return The best fscore of an aligned match of query_dmrs in dmrs (0 if there is none).
+    """
+    nodeid_matches = aligned_matching.get_matching_nodeids(query_dmrs, dmrs)
+    if not nodeid_matches:
+        return 0
+    _, score = aligned_matching.get_best_subgraph(nodeid_matches, query_dmrs, dmrs,
+                                                  compatibility_cache=compatibility_cache)
+    return aligned_matching.get_fscore(*score)
+
+
+RERANKERS = {'general': general_similarity, 'aligned': aligned_similarity}
+
+
+class SimilarityIndex(object):
+    """
+    An index for retrieving the graphs of a corpus most similar to a query graph.
+    Graphs are represented by sketches (see dmrs_sketch), stored as sparse vectors in an inverted index. A query is
+    scored against all graphs at once by accumulating the overlap of the sketches along the posting lists, and only
+    the best candidates are reranked with a graph matcher.
+    """
+
+    def __init__(self):
+        """
+        Create a new empty index.
+        """
+        self.graphs = {}
+        self.postings = {}  # feature -> dict graph id -> count
+        self.sizes = {}  # graph id -> number of features
+        self.order = {}  # graph id -> position of insertion, to break ties
+        self.compatibility_cache = CompatibilityCache()  # shared by reranking with general/aligned matching
+        self._next_id = 0
+
+    @classmethod
+    def build(cls, corpus):
+        """
+        Build an index of a corpus.
+        :param corpus An iterable of DMRS graphs, which are indexed with consecutive graph ids starting from 0.
+        :return A SimilarityIndex.
+        """
+        index = cls()
+        for dmrs in corpus:
+            index.add(dmrs)
+        return index
+
+    def __len__(self):
+        """
+        Return the number of indexed graphs
+        """
+        return len(self.graphs)
+
+    def __contains__(self, graph_id):
+        return graph_id in self.graphs
+
+    def __getitem__(self, graph_id):
+        return self.graphs[graph_id]
+
+    def add(self, dmrs, graph_id=None):
+        """
+        Add a graph to the index.
+        :param dmrs A Dmrs object.
+        :param graph_id The graph id. If None, the next free consecutive integer id.
+        :return The graph id.
+        """
+        if graph_id is None:
+            graph_id = self._next_id
+        assert graph_id not in self.graphs, 'Graph id already indexed.'
+        if isinstance(graph_id, int) and graph_id >= self._next_id:
+            self._next_id = graph_id + 1
+        sketch = dmrs_sketch(dmrs)
+        self.graphs[graph_id] = dmrs
+        self.sizes[graph_id] = sum(sketch.values())
+        self.order[graph_id] = len(self.order)
+        for feature, count in sketch.items():
+            self.postings.setdefault(feature, {})[graph_id] = count
+        return graph_id
+
+    def shortlist(self, query_dmrs, size):
+        """
+        Finds the graphs with the most similar sketches to a query, by the Dice coefficient of the sketch multisets.
+        Graphs sharing no sketch feature with the query are not returned, and ties are broken by insertion order.
+        :param query_dmrs The query DMRS.
+        :param size The maximum number of graphs.
+        :return A list of pairs (graph id, sketch similarity), most similar first.
+        """
+        sketch = dmrs_sketch(query_dmrs)
+        query_size = sum(sketch.values())
+        overlaps = {}
+        for feature, query_count in sketch.items():
+            for graph_id, count in self.postings.get(feature, {}).items():
+                overlaps[graph_id] = overlaps.get(graph_id, 0) + min(query_count, count)
+        scores = ((2 * overlap / (query_size + self.sizes[graph_id]), -self.order[graph_id], graph_id)
+                  for graph_id, overlap in overlaps.items())
+        return [(graph_id, score) for score, _, graph_id in heapq.nlargest(size, scores, key=lambda x: x[:2])]
+
+    def top_k(self, query_dmrs, k=10, shortlist_size=None, rerank='general'):
+        """
+        Retrieves the k graphs most similar to a query.
+        :param query_dmrs The query DMRS.
+        :param k The number of graphs.
+        :param shortlist_size The number of graphs to rerank (by default, 5 * k).
+        :param rerank 'general' or 'aligned' to rerank the shortlist with general_matching resp. aligned_matching,
+        a function taking the query and a graph and returning a similarity score, or None to use sketch similarity.
+        :return A list of pairs (graph id, similarity), most similar first.
+        """
+        if shortlist_size is None:
+            shortlist_size = 5 * k
+        candidates = self.shortlist(query_dmrs, max(k, shortlist_size))
+        if rerank is None:
+            return candidates[:k]
+        if not callable(rerank):
+            rerank = partial(RERANKERS[rerank], compatibility_cache=self.compatibility_cache)
+        # ties are broken by the sketch similarity
+        scored = [(rerank(query_dmrs, self.graphs[graph_id]), sketch_score, n, graph_id)
+                  for n, (graph_id, sketch_score) in enumerate(candidates)]
+        scored.sort(key=lambda x: (-x[0], -x[1], x[2]))
+        return [(graph_id, score) for score, _, _, graph_id in scored[:k]]
@@ -0,0 +1,140 @@
+import os
+from functools import partial
+from multiprocessing import Pool
+
+try:
+    import numpy
+except ImportError:  # numpy is only required for this module
+    raise ImportError("pydmrs.matching.similarity_matrix requires numpy, which is installed with the 'similarity' "
+                      "extra: pip install pydmrs[similarity]")
+
+from pydmrs.matching.common import CompatibilityCache
+from pydmrs.matching.general_matching import find_best_matches
+
+
+def pair_similarity(dmrs1, dmrs2, compatibility_cache=None):
+    """
+    Scores a pair of graphs with general matching. Since general matching looks for the first graph in the second,
+    both directions are matched, so that the score does not depend on the order of the graphs.
+    :param dmrs1 A DMRS object.
+    :param dmrs2 A DMRS object.
+    :param compatibility_cache An optional CompatibilityCache for node comparisons.
+    :return The F-score of the best match in either direction, i.e. twice the number of matched nodes and links
+    divided by the total number of nodes and links of both graphs (0 if there is no match).
+    """
+    size = len(dmrs1) + dmrs1.count_links() + len(dmrs2) + dmrs2.count_links()
+    if size == 0:
+        return 1.
+    best = 0
+    for small_dmrs, large_dmrs in ((dmrs1, dmrs2), (dmrs2, dmrs1)):
+        matches = find_best_matches(small_dmrs, large_dmrs, compatibility_cache=compatibility_cache)
+        if matches:
+            best = max(best, max(len(match) for match in matches))
+    return 2 * best / size
+
+
+def iter_tiles(num_graphs, tile_size):
+    """
+    Splits the upper triangle of a square matrix into tiles.
+    :param num_graphs The size of the matrix.
+    :param tile_size The number of rows and columns of a tile.
+    :return Iterator of tiles (row start, row end, column start, column end), with row start <= column start.
+    """
+    for row_start in range(0, num_graphs, tile_size):
+        row_end = min(row_start + tile_size, num_graphs)
+        for column_start in range(row_start, num_graphs, tile_size):
+            yield row_start, row_end, column_start, min(column_start + tile_size, num_graphs)
+
+
+# state of a worker process, set once by _init_worker
+_worker_graphs = None
+_worker_similarity = None
+
+
+def _init_worker(graphs, similarity):
+    global _worker_graphs, _worker_similarity
+    _worker_graphs = graphs
+    _worker_similarity = similarity
+
+
+def _compute_tile(tile, graphs=None, similarity=None):
+    """
+    Computes the similarities of a tile, on and above the diagonal.
+    :return A pair of the tile and a list of rows of similarities (NaN below the diagonal).
+    """
+    if graphs is None:
+        graphs = _worker_graphs
+        similarity = _worker_similarity
+    row_start, row_end, column_start, column_end = tile
+    values = []
+    for i in range(row_start, row_end):
+        values.append([similarity(graphs[i], graphs[j]) if j >= i else float('nan')
+                       for j in range(column_start, column_end)])
+    return tile, values
+
+
+def _is_computed(matrix, tile):
+    row_start, row_end, column_start, column_end = tile
+    return not numpy.isnan(matrix[row_start:row_end, column_start:column_end]).any() and \
+        not numpy.isnan(matrix[column_start:column_end, row_start:row_end]).any()
+
+
+def similarity_matrix(graphs, out=None, tile_size=64, processes=None, similarity=None, flush_every=100):
+    """
+    Computes the pairwise similarities of a list of graphs, for a symmetric similarity function. The upper triangle
+    of the matrix, including the diagonal, is split into tiles, which are computed in a process pool (the graphs are
+    sent once to every worker) and mirrored to the lower triangle. Entries which have not been computed yet are NaN, so that an interrupted computation can be resumed by
+    passing the partially computed matrix (or file) again.
+    :param graphs A list of DMRS graphs (which have to be picklable to use several processes).
+    :param out None for a new array, an existing array to resume, or the file name of a memory-mapped .npy file, which
+    is resumed if it exists and created otherwise.
+    :param tile_size The number of rows and columns of a tile.
+    :param processes The number of worker processes (by default, the number of CPUs). If 0 or 1, tiles are computed
+    in this process.
+    :param similarity A (picklable, e.g. module-level) function taking two graphs and returning their similarity.
+    By default, pair_similarity, with a CompatibilityCache per worker process.
+    :param flush_every The number of tiles after which a memory-mapped file is flushed.
+    :return A square numpy array of similarities, with the similarity of every graph to itself on the diagonal.
+    """
+    num_graphs = len(graphs)
+    shape = (num_graphs, num_graphs)
+    if out is None:
+        matrix = numpy.full(shape, numpy.nan)
+    elif isinstance(out, str):
+        if os.path.exists(out):
+            matrix = numpy.load(out, mmap_mode='r+')
+        else:
+            matrix = numpy.lib.format.open_memmap(out, mode='w+', dtype=numpy.float64, shape=shape)
+            matrix[:] = numpy.nan
+    else:
+        matrix = out
+    assert matrix.shape == shape, 'Matrix of wrong shape.'
+    tiles = [tile for tile in iter_tiles(num_graphs, tile_size) if not _is_computed(matrix, tile)]
+
+    def write(results):
+        for n, (tile, values) in enumerate(results, 1):
+            row_start, row_end, column_start, column_end = tile
+            block = numpy.array(values, dtype=matrix.dtype)
+            if row_start == column_start:
+                # mirror the upper triangle of the tile
+                upper = numpy.triu(block, 1)
+                matrix[row_start:row_end, column_start:column_end] = upper + upper.T + numpy.diag(numpy.diag(block))
+            else:
+                matrix[row_start:row_end, column_start:column_end] = block
+                matrix[column_start:column_end, row_start:row_end] = block.T
+            if isinstance(matrix, numpy.memmap) and n % flush_every == 0:
+                matrix.flush()
+
+    if similarity is None:
+        # every worker process gets its own copy of the cache
+        similarity = partial(pair_similarity, compatibility_cache=CompatibilityCache())
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or len(tiles) <= 1:
+        write(_compute_tile(tile, graphs=graphs, similarity=similarity) for tile in tiles)
+    else:
+        with Pool(processes, initializer=_init_worker, initargs=(graphs, similarity)) as pool:
+            write(pool.imap_unordered(_compute_tile, tiles))
+    if isinstance(matrix, numpy.memmap):
+        matrix.flush()
+    return matrix
@@ -0,0 +1,267 @@
+import sqlite3
+from itertools import groupby
+
+from pydmrs.components import RealPred, GPred
+from pydmrs.core import Dmrs, ListDmrs
+from pydmrs.graphlang.graphlang import parse_graphlang
+from pydmrs.matching.corpus_index import pred_key
+from pydmrs.matching.exact_matching import CompiledPattern
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS graphs (
+    graph_id INTEGER PRIMARY KEY,
+    ident INTEGER,
+    surface TEXT,
+    xml BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS preds (
+    pred_id INTEGER PRIMARY KEY,
+    pred TEXT NOT NULL UNIQUE,
+    lemma TEXT,
+    pos TEXT,
+    sense TEXT,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    graph_id INTEGER NOT NULL REFERENCES graphs(graph_id) ON DELETE CASCADE,
+    nodeid INTEGER NOT NULL,
+    pred_id INTEGER REFERENCES preds(pred_id),
+    carg TEXT,
+    cvarsort TEXT,
+    PRIMARY KEY (graph_id, nodeid)
+);
+CREATE TABLE IF NOT EXISTS links (
+    graph_id INTEGER NOT NULL REFERENCES graphs(graph_id) ON DELETE CASCADE,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    rargname TEXT,
+    post TEXT
+);
+CREATE INDEX IF NOT EXISTS nodes_pred ON nodes (pred_id, graph_id);
+CREATE INDEX IF NOT EXISTS nodes_carg ON nodes (carg, graph_id);
+CREATE INDEX IF NOT EXISTS links_start ON links (graph_id, start, end);
+CREATE INDEX IF NOT EXISTS links_end ON links (graph_id, end, start);
+CREATE INDEX IF NOT EXISTS links_label ON links (rargname, post);
+"""
+
+
+class SqliteDmrsStore(object):
+    """
+    A persistent store of DMRS graphs in a local SQLite database, with node, link and pred tables.
+    Fully specified parts of a search (sub)graph are translated into SQL joins returning candidate graphs and node
+    bindings, and only the remaining underspecified constraints are checked by exact matching.
+    """
+
+    def __init__(self, path=':memory:', cls=ListDmrs):
+        """
+        Open (or create) a store.
+        :param path The database file (by default, an in-memory database).
+        :param cls The DMRS class of loaded graphs.
+        """
+        self.path = path
+        self.cls = cls
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+        self._pred_ids = {}
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        """
+        Return the number of stored graphs
+        """
+        return self.connection.execute('SELECT COUNT(*) FROM graphs').fetchone()[0]
+
+    def __contains__(self, graph_id):
+        return self.connection.execute('SELECT 1 FROM graphs WHERE graph_id = ?', (graph_id,)).fetchone() is not None
+
+    def __iter__(self):
+        """
+        Iterate over graph ids
+        """
+        return (row[0] for row in self.connection.execute('SELECT graph_id FROM graphs ORDER BY graph_id'))
+
+    def _pred_id(self, pred, create=False):
+        """
+        Look up (or create) the id of a pred.
+        """
+        string = str(pred)
+        if string in self._pred_ids:
+            return self._pred_ids[string]
+        row = self.connection.execute('SELECT pred_id FROM preds WHERE pred = ?', (string,)).fetchone()
+        if row is not None:
+            pred_id = row[0]
+        elif not create:
+            return None
+        elif isinstance(pred, RealPred):
+            pred_id = self.connection.execute('INSERT INTO preds (pred, lemma, pos, sense) VALUES (?, ?, ?, ?)',
+                                              (string, pred.lemma, pred.pos, pred.sense)).lastrowid
+        elif isinstance(pred, GPred):
+            pred_id = self.connection.execute('INSERT INTO preds (pred, name) VALUES (?, ?)',
+                                              (string, pred.name)).lastrowid
+        else:
+            pred_id = self.connection.execute('INSERT INTO preds (pred) VALUES (?)', (string,)).lastrowid
+        self._pred_ids[string] = pred_id
+        return pred_id
+
+    def add(self, dmrs, graph_id=None, commit=True):
+        """
+        Add a graph to the store.
+        :param dmrs A Dmrs object.
+        :param graph_id The graph id. If None, the next free integer id.
+        :param commit True if the transaction should be committed immediately.
+        :return The graph id.
+        """
+        cursor = self.connection.execute('INSERT INTO graphs (graph_id, ident, surface, xml) VALUES (?, ?, ?, ?)',
+                                         (graph_id, dmrs.ident, dmrs.surface, dmrs.dumps_xml()))
+        graph_id = cursor.lastrowid
+        self.connection.executemany(
+            'INSERT INTO nodes (graph_id, nodeid, pred_id, carg, cvarsort) VALUES (?, ?, ?, ?, ?)',
+            ((graph_id, node.nodeid, None if node.pred is None else self._pred_id(node.pred, create=True), node.carg,
+              None if node.sortinfo is None else node.sortinfo.cvarsort)
+             for node in dmrs.iter_nodes()))
+        self.connection.executemany(
+            'INSERT INTO links (graph_id, start, end, rargname, post) VALUES (?, ?, ?, ?, ?)',
+            ((graph_id, link.start, link.end, link.rargname, link.post) for link in dmrs.iter_links()))
+        if commit:
+            self.connection.commit()
+        return graph_id
+
+    def add_all(self, iterable):
+        """
+        Add a number of graphs in a single transaction.
+        :return A list of graph ids.
+        """
+        graph_ids = [self.add(dmrs, commit=False) for dmrs in iterable]
+        self.connection.commit()
+        return graph_ids
+
+    def remove(self, graph_id, commit=True):
+        """
+        Remove a graph from the store.
+        """
+        self.connection.execute('DELETE FROM graphs WHERE graph_id = ?', (graph_id,))
+        if commit:
+            self.connection.commit()
+
+    def __getitem__(self, graph_id):
+        """
+        Load a graph from the store.
+        """
+        row = self.connection.execute('SELECT xml FROM graphs WHERE graph_id = ?', (graph_id,)).fetchone()
+        if row is None:
+            raise KeyError(graph_id)
+        return self.cls.loads_xml(row[0])
+
+    def candidate_bindings(self, search_dmrs, optional_nodeids=(), hierarchy=None):
+        """
+        Translates the fully specified parts of a search (sub)graph into an SQL query.
+        Nodes with fully specified preds (or cargs) are bound to graph nodes, and links between them are required to
+        exist with the specified label.
+        :param search_dmrs DMRS (sub)graph to match.
+        :param optional_nodeids Node ids of optional nodes.
+        :param hierarchy An optional predicate hierarchy.
+        :return Iterator of pairs (graph id, dictionary of node id bindings), ordered by graph id.
+        """
+        hierarchy = hierarchy or dict()
+        bound = []
+        conditions = []
+        parameters = []
+        for node in search_dmrs.iter_nodes():
+            if node.nodeid in optional_nodeids or not getattr(node, 'required', True):
+                continue
+            key = pred_key(node.pred)
+            if key is not None and hierarchy.get(key):
+                key = None
+            carg = node.carg if node.carg not in (None, '?') else None
+            if key is None and carg is None:
+                continue
+            alias = 'n{}'.format(len(bound))
+            if key is not None:
+                pred_id = self._pred_id(node.pred)
+                if pred_id is None:  # pred does not occur in any stored graph
+                    return iter(())
+                conditions.append('{}.pred_id = ?'.format(alias))
+                parameters.append(pred_id)
+            if carg is not None:
+                conditions.append('{}.carg = ?'.format(alias))
+                parameters.append(carg)
+            bound.append((node.nodeid, alias))
+        if not bound:
+            return ((graph_id, {}) for graph_id in self)
+
+        aliases = dict(bound)
+        # all bound nodes are in the same graph and distinct
+        for i, (_, alias) in enumerate(bound[1:], 1):
+            conditions.append('{}.graph_id = n0.graph_id'.format(alias))
+            for _, other_alias in bound[:i]:
+                conditions.append('{}.nodeid != {}.nodeid'.format(alias, other_alias))
+        # links between bound nodes have to exist
+        for link in search_dmrs.iter_links():
+            if link.start not in aliases or link.end not in aliases:
+                continue
+            start = aliases[link.start]
+            end = aliases[link.end]
+            label_conditions = []
+            label_parameters = []
+            if link.rargname == 'ARG':
+                label_conditions.append("l.rargname LIKE 'ARG%'")
+            elif link.rargname != '?':
+                label_conditions.append('l.rargname IS ?')
+                label_parameters.append(link.rargname)
+            if link.post != '?':
+                label_conditions.append('l.post IS ?')
+                label_parameters.append(link.post)
+            if link.rargname is None and link.post == 'EQ':
+                # undirected link
+                direction = '((l.start = {0}.nodeid AND l.end = {1}.nodeid) OR (l.start = {1}.nodeid AND l.end = {0}.nodeid))'.format(start, end)
+            else:
+                direction = 'l.start = {}.nodeid AND l.end = {}.nodeid'.format(start, end)
+            conditions.append('EXISTS (SELECT 1 FROM links l WHERE l.graph_id = n0.graph_id AND {})'.format(
+                ' AND '.join([direction] + label_conditions)))
+            parameters.extend(label_parameters)
+
+        sql = 'SELECT n0.graph_id, {} FROM {} WHERE {} ORDER BY n0.graph_id'.format(
+            ', '.join('{}.nodeid'.format(alias) for _, alias in bound),
+            ', '.join('nodes {}'.format(alias) for _, alias in bound),
+            ' AND '.join(conditions) if conditions else '1')
+        nodeids = [nodeid for nodeid, _ in bound]
+        rows = self.connection.execute(sql, parameters)
+        return ((row[0], dict(zip(nodeids, row[1:]))) for row in rows)
+
+    def candidate_graph_ids(self, search_dmrs, optional_nodeids=(), hierarchy=None):
+        """
+        Find the ids of graphs which can possibly match a search (sub)graph.
+        :return A list of graph ids.
+        """
+        return [graph_id for graph_id, _ in groupby(self.candidate_bindings(search_dmrs, optional_nodeids=optional_nodeids, hierarchy=hierarchy), key=lambda x: x[0])]
+
+    def match(self, search_dmrs, optional_nodeids=(), equalities=(), hierarchy=None, match_top_index=True):
+        """
+        Performs an exact DMRS (sub)graph matching against all stored graphs.
+        :param search_dmrs DMRS (sub)graph to match, or a GraphLang string.
+        :param optional_nodeids
+        :param equalities
+        :param hierarchy An optional predicate hierarchy.
+        :param match_top_index
+        :return Iterator of pairs (graph id, matching dictionary).
+        """
+        if not isinstance(search_dmrs, Dmrs):
+            equalities = {}
+            search_dmrs = parse_graphlang(search_dmrs, equalities=equalities)
+        pattern = CompiledPattern(search_dmrs, optional_nodeids=optional_nodeids, equalities=equalities, hierarchy=hierarchy, match_top_index=match_top_index)
+        bindings = self.candidate_bindings(search_dmrs, optional_nodeids=optional_nodeids, hierarchy=hierarchy)
+        for graph_id, group in groupby(bindings, key=lambda x: x[0]):
+            dmrs = self[graph_id]
+            for _, fixed in group:
+                for matching in pattern.match(dmrs, fixed=fixed):
+                    yield graph_id, matching
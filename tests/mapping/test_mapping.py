@@ -0,0 +1,63 @@
+import unittest
+
+from examples import examples_dmrs
+from pydmrs.graphlang.graphlang import parse_graphlang
+from pydmrs.mapping.mapping import dmrs_mapping
+from pydmrs.matching.exact_matching import CompiledPattern, IncrementalMatching, MatchBudget
+
+
+class TestIterativeMapping(unittest.TestCase):
+    def setUp(self):
+        self.chain = parse_graphlang('[1]:_a_n_1 x -1-> [2]:_a_n_1 x -1-> [3]:_a_n_1 x -1-> [4]:_b_n_1 x')
+        self.search_dmrs = parse_graphlang('[1]:_a_n_1 x? -1-> [2]:_b_n_1 x?')
+        self.replace_dmrs = parse_graphlang('[1]:_b_n_1 x? -1-> [2]:_b_n_1 x?')
+
+    def test_all_matches(self):
+        dmrs = dmrs_mapping(examples_dmrs.the_dog_chases_the_cat(), parse_graphlang('[1]:_the_q'),
+                            parse_graphlang('[1]:_a_q'))
+        self.assertListEqual(sorted(str(node.pred) for node in dmrs.iter_nodes() if str(node.pred).endswith('_q')),
+                             ['_a_q', '_a_q'])
+
+    def test_new_matches(self):
+        # every rewrite creates a new match for the preceding node
+        dmrs = dmrs_mapping(self.chain, self.search_dmrs, self.replace_dmrs)
+        self.assertListEqual([str(node.pred) for node in dmrs.iter_nodes()], ['_b_n_1'] * 4)
+        self.assertEqual(dmrs.count_links(), 3)
+        self.assertListEqual([str(node.pred) for node in self.chain.iter_nodes()], ['_a_n_1'] * 3 + ['_b_n_1'])
+        self.assertTrue(dmrs_mapping(self.chain, self.search_dmrs, self.replace_dmrs, copy_dmrs=False))
+        self.assertListEqual([str(node.pred) for node in self.chain.iter_nodes()], ['_b_n_1'] * 4)
+
+    def test_fixed_point(self):
+        # rewritten matchings are not matched again
+        search_dmrs = parse_graphlang('[1]:_a_n_1 x?')
+        dmrs = dmrs_mapping(self.chain, search_dmrs, parse_graphlang('[1]:_a_n_1 x?'), max_matches=4)
+        self.assertTrue(dmrs.is_isomorphic(self.chain))
+
+    def test_incremental_matching(self):
+        dmrs = parse_graphlang('[1]:_a_n_1 x -1-> [2]:_b_n_1 x; [3]:_a_n_1 x -1-> [4]:_b_n_1 x')
+        matchings = IncrementalMatching(CompiledPattern(self.search_dmrs), dmrs)
+        first = next(matchings)
+        self.assertDictEqual(first, {1: 1, 2: 2})
+        # the initial matching of node 3 is invalidated
+        pred = dmrs[3].pred
+        dmrs[3].pred = dmrs[4].pred
+        matchings.update({3}, image=first.values())
+        dmrs[3].pred = pred
+        # node 3 matches again, but the (unmodified) rewritten matching is not repeated
+        matchings.update({1, 3})
+        self.assertDictEqual(next(matchings), {1: 3, 2: 4})
+        self.assertRaises(StopIteration, next, matchings)
+
+    def test_argument_swap(self):
+        # the swapped arguments match the rule again, but the rewritten nodes are not rewritten again
+        search_dmrs = parse_graphlang('[1]:node <-1- [2]:_chase_v_1 e? -2-> [3]:node')
+        replace_dmrs = parse_graphlang('[1]:node <-2- [2]:_chase_v_1 e? -1-> [3]:node')
+        dmrs = dmrs_mapping(examples_dmrs.the_dog_chases_the_cat(), search_dmrs, replace_dmrs)
+        self.assertListEqual(sorted((link.start, link.end, link.rargname, link.post) for link in dmrs.iter_links()),
+                             [(1, 2, 'RSTR', 'H'), (3, 2, 'ARG2', 'NEQ'), (3, 5, 'ARG1', 'NEQ'), (4, 5, 'RSTR', 'H')])
+
+    def test_budget(self):
+        budget = MatchBudget(max_states=1)
+        dmrs = dmrs_mapping(self.chain, self.search_dmrs, self.replace_dmrs, budget=budget)
+        self.assertTrue(budget.truncated)
+        self.assertEqual(sum(1 for node in dmrs.iter_nodes() if str(node.pred) == '_b_n_1'), 2)
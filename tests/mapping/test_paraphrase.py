@@ -0,0 +1,142 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from examples import examples_dmrs
+from pydmrs.graphlang.graphlang import parse_graphlang
+from pydmrs.mapping.paraphrase import ParaphraseEngine, compile_paraphrases_file, graph_memory, \
+    load_compiled_paraphrases, paraphrase, paraphrase_closure, read_paraphrases_file
+
+
+class TestParaphraseEngine(unittest.TestCase):
+    def setUp(self):
+        self.rules = [
+            (parse_graphlang('[1]:_the_q'), parse_graphlang('[1]:_a_q')),
+            (parse_graphlang('[1]:_mouse_n_1 x?'), parse_graphlang('[1]:_rat_n_1 x?')),
+            (parse_graphlang('[1]:_dog_n_1 x?'), parse_graphlang('[1]:_hound_n_1 x?')),
+            (parse_graphlang('[1]:_hound_n_1 x?'), parse_graphlang('[1]:_wolf_n_1 x?')),
+            (parse_graphlang('[1]:node <-1- [2]:_chase_v_1 e? -2-> [3]:node'),
+             parse_graphlang('[1]:node <-2- [2]:_chase_v_1 e? -1-> [3]:node')),
+        ]
+        self.engine = ParaphraseEngine(self.rules)
+
+    def test_candidates(self):
+        self.assertSetEqual(self.engine.candidates(examples_dmrs.the_cat()), {0})
+        self.assertSetEqual(self.engine.candidates(examples_dmrs.the_dog_chases_the_cat()), {0, 2, 4})
+
+    def test_paraphrase(self):
+        dmrs = examples_dmrs.the_dog_chases_the_cat()
+        result = self.engine.paraphrase(dmrs)
+        self.assertTrue(dmrs.is_isomorphic(examples_dmrs.the_dog_chases_the_cat()))
+        self.assertListEqual([(node.nodeid, str(node.pred)) for node in result.iter_nodes()],
+                             [(1, '_a_q'), (2, '_wolf_n_1'), (3, '_chase_v_1'), (4, '_a_q'), (5, '_cat_n_1')])
+        # the arguments are swapped exactly once
+        self.assertListEqual(sorted((link.start, link.end, link.rargname, link.post) for link in result.iter_links()),
+                             [(1, 2, 'RSTR', 'H'), (3, 2, 'ARG2', 'NEQ'), (3, 5, 'ARG1', 'NEQ'), (4, 5, 'RSTR', 'H')])
+        self.assertTrue(paraphrase(dmrs, self.rules).is_isomorphic(result))
+
+    def test_stats(self):
+        self.engine.paraphrase(examples_dmrs.the_dog_chases_the_cat())
+        self.engine.paraphrase(examples_dmrs.the_mouse())
+        self.assertListEqual([stats.attempts for stats in self.engine.stats], [2, 1, 1, 1, 1])
+        self.assertListEqual([stats.hits for stats in self.engine.stats], [2, 1, 1, 1, 1])
+        self.assertListEqual([stats.skips for stats in self.engine.stats], [0, 1, 1, 1, 1])
+        self.assertTrue(all(stats.time > 0 for stats in self.engine.stats))
+        self.engine.reset_stats()
+        self.assertEqual(self.engine.stats[0].attempts, 0)
+
+    def test_from_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as file:
+            file.write('[1]:_the_q\n[1]:_a_q\n\n[1]:_dog_n_1 x?\n[1]:_hound_n_1 x?\n')
+        try:
+            self.assertEqual(len(read_paraphrases_file(file.name)), 2)
+            engine = ParaphraseEngine.from_file(file.name)
+            result = engine.paraphrase(examples_dmrs.the_dog_chases_the_cat())
+            self.assertIn('_hound_n_1', [str(node.pred) for node in result.iter_nodes()])
+        finally:
+            os.remove(file.name)
+
+
+class TestParaphraseClosure(unittest.TestCase):
+    def setUp(self):
+        self.rules = [
+            (parse_graphlang('[1]:_the_q'), parse_graphlang('[1]:_a_q')),
+            (parse_graphlang('[1]:_dog_n_1 x?'), parse_graphlang('[1]:_hound_n_1 x?')),
+            (parse_graphlang('[1]:_cat_n_1 x?'), parse_graphlang('[1]:_kitten_n_1 x?')),
+        ]
+        self.dmrs = examples_dmrs.the_dog_chases_the_cat()
+
+    def test_closure(self):
+        closure = paraphrase_closure(self.dmrs, self.rules)
+        # two choices for each quantifier and each noun
+        self.assertEqual(len(closure.graphs), 16)
+        self.assertIs(closure.graphs[0], self.dmrs)
+        self.assertGreater(closure.duplicates, 0)
+        self.assertFalse(closure.truncated)
+        self.assertEqual(len(set(graph.canonical_form()[1] for graph in closure.graphs)), 16)
+        self.assertGreaterEqual(closure.memory, sum(graph_memory(graph) for graph in closure.graphs))
+        exact_closure = ParaphraseEngine(self.rules).closure(self.dmrs, exact=True)
+        self.assertEqual(len(exact_closure.graphs), 16)
+        self.assertEqual(exact_closure.duplicates, closure.duplicates)
+
+    def test_limits(self):
+        closure = paraphrase_closure(self.dmrs, self.rules, max_depth=1)
+        self.assertEqual(len(closure.graphs), 5)
+        self.assertTrue(closure.truncated)
+        closure = paraphrase_closure(self.dmrs, self.rules, max_graphs=3)
+        self.assertEqual(len(closure.graphs), 3)
+        self.assertTrue(closure.truncated)
+        closure = paraphrase_closure(self.dmrs, self.rules, max_frontier=2)
+        self.assertLess(len(closure.graphs), 16)
+        self.assertTrue(closure.truncated)
+        max_memory = 3 * graph_memory(self.dmrs)
+        closure = paraphrase_closure(self.dmrs, self.rules, max_memory=max_memory)
+        self.assertLessEqual(closure.memory, max_memory)
+        self.assertLess(len(closure.graphs), 16)
+        self.assertTrue(closure.truncated)
+
+
+class TestCompiledParaphrases(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'rules.txt')
+        with open(self.filename, 'w') as file:
+            file.write('[1]:_the_q\n[1]:_a_q\n\n[1]:_mouse_n_1 x?\n[1]:_rat_n_1 x?\n\n[1]:_dog_n_1 x?\n[1]:_hound_n_1 x?\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_compile(self):
+        self.assertIsNone(load_compiled_paraphrases(self.filename))
+        engine = compile_paraphrases_file(self.filename)
+        self.assertTrue(os.path.exists(self.filename + '.pickle'))
+        loaded = load_compiled_paraphrases(self.filename)
+        self.assertEqual(len(loaded), 3)
+        self.assertListEqual(loaded.requirements, engine.requirements)
+        self.assertListEqual(loaded.anchors, engine.anchors)
+        dmrs = examples_dmrs.the_dog_chases_the_cat()
+        self.assertTrue(loaded.paraphrase(dmrs).is_isomorphic(engine.paraphrase(dmrs)))
+        # rules which are never matched are not unpickled
+        self.assertIsNone(loaded.rules.rules[1])
+        self.assertIsNotNone(loaded.rules.rules[2])
+
+    def test_invalidation(self):
+        compile_paraphrases_file(self.filename)
+        self.assertIsNone(load_compiled_paraphrases(self.filename, hierarchy={'_animal_n_1': ['_dog_n_1']}))
+        with open(self.filename, 'a') as file:
+            file.write('\n[1]:_cat_n_1 x?\n[1]:_kitten_n_1 x?\n')
+        self.assertIsNone(load_compiled_paraphrases(self.filename))
+        engine = ParaphraseEngine.from_file(self.filename, cache=True)
+        self.assertEqual(len(engine), 4)
+        self.assertEqual(len(load_compiled_paraphrases(self.filename)), 4)
+        # outdated format version
+        with open(self.filename + '.pickle', 'rb') as file:
+            compiled = pickle.load(file)
+        compiled['version'] -= 1
+        with open(self.filename + '.pickle', 'wb') as file:
+            pickle.dump(compiled, file)
+        self.assertIsNone(load_compiled_paraphrases(self.filename))
+        self.assertEqual(len(ParaphraseEngine.from_file(self.filename, cache=True)), 4)
+        self.assertIsNotNone(load_compiled_paraphrases(self.filename))
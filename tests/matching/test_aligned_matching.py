@@ -1,6 +1,7 @@
 import unittest
 
 from examples import examples_dmrs
+from pydmrs.components import GPred
 from pydmrs.core import span_pred_key, abstractSortDictDmrs, ListDmrs, Node, RealPred, \
     InstanceSortinfo, Link
 from pydmrs.matching import aligned_matching
@@ -38,6 +39,32 @@ class TestAlignedMatching(unittest.TestCase):
         self.assertListEqual(matches[0], [(2, 5), (1, 1)])
         self.assertListEqual(matches[1], [(2, 5), (1, 4)])
 
+    @staticmethod
+    def _nodes(lemmas, start):
+        return [Node(nodeid=start + i, pred=RealPred(lemma, 'n', '1')) for i, lemma in enumerate(lemmas)]
+
+    def test_match_nodes_repeated_preds(self):
+        # each node is aligned with the first equal node after the previously aligned one
+        matches = aligned_matching.match_nodes(self._nodes('aab', 1), self._nodes('ab', 11))
+        self.assertListEqual(matches, [[(3, 12), (1, 11)]])
+        matches = aligned_matching.match_nodes(self._nodes('abab', 1), self._nodes('ba', 11))
+        self.assertListEqual(matches, [[(3, 12), (2, 11)]])
+
+    def test_match_nodes_several_longest(self):
+        # alignments are ordered by their first aligned node of nodes2, and their pairs are in reverse order
+        matches = aligned_matching.match_nodes(self._nodes('ab', 1), self._nodes('aab', 11))
+        self.assertListEqual(matches, [[(2, 13), (1, 11)], [(2, 13), (1, 12)]])
+        matches = aligned_matching.match_nodes(self._nodes('ab', 1), self._nodes('ba', 11))
+        self.assertListEqual(matches, [[(2, 11)], [(1, 12)]])
+
+    def test_match_nodes_excluded(self):
+        matches = aligned_matching.match_nodes(self._nodes('abab', 1), self._nodes('ba', 11), excluded=[12])
+        self.assertListEqual(matches, [[(2, 11)]])
+        matches = aligned_matching.match_nodes(self._nodes('aab', 1), self._nodes('ab', 11), excluded=[11])
+        self.assertListEqual(matches, [[(3, 12)]])
+        matches = aligned_matching.match_nodes(self._nodes('ab', 1), self._nodes('ab', 11), excluded=[11, 12])
+        self.assertListEqual(matches, [])
+
     def test_find_extra_surface_nodeids(self):
         nodeids = [1, 5]
         extras = aligned_matching.find_extra_surface_nodeids(nodeids, self.the_dog_chases_the_cat)
@@ -87,6 +114,26 @@ class TestAlignedMatching(unittest.TestCase):
         mixed = aligned_matching.get_matching_nodeids(mixed_cat, self.the_dog_chases_the_cat)
         self.assertListEqual(mixed, matches1)
 
+    def test_prepared_target(self):
+        target = aligned_matching.PreparedAlignedTarget(examples_dmrs.the_dog_chases_the_cat())
+        self.assertListEqual([node.nodeid for node in target.filtered_nodes], [2, 3, 5])
+        self.assertListEqual(sorted(target.quantifier_links), [2, 5])
+        for small_dmrs in (self.the_cat, self.the_mouse, self.the_cat_chases_the_dog):
+            for all_surface in (False, True):
+                self.assertListEqual(
+                    aligned_matching.get_matching_nodeids(small_dmrs, target, all_surface=all_surface),
+                    aligned_matching.get_matching_nodeids(small_dmrs, self.the_dog_chases_the_cat,
+                                                          all_surface=all_surface))
+        self.assertListEqual(aligned_matching.find_extra_surface_nodeids([1, 5], target), [2, 3, 4])
+
+    def test_prepared_target_incomplete_compound(self):
+        # a compound without ARG2 is only inspected if a match is found
+        dmrs = examples_dmrs.dog_cat()
+        compound = dmrs.add_node(Node(pred=GPred('compound'), cfrom=0, cto=7))
+        dmrs.add_link(Link(start=compound, end=2, rargname='ARG1', post='EQ'))
+        target = aligned_matching.PreparedAlignedTarget(dmrs)
+        self.assertListEqual(aligned_matching.get_matching_nodeids(self.the_mouse, target), [])
+
     def test_get_score(self):
         matches = aligned_matching.get_matching_nodeids(self.the_cat, self.the_dog_chases_the_cat)
         subgraph1 = aligned_matching.get_matched_subgraph(matches[0], self.the_dog_chases_the_cat)
@@ -101,3 +148,17 @@ class TestAlignedMatching(unittest.TestCase):
                                                            self.the_dog_chases_the_cat)
         score1a = aligned_matching.get_score(self.the_cat, subgraph1a, all_surface_matches[0])
         self.assertEqual(score1a, (2, 7, 3))
+
+    def test_aligned_scorer(self):
+        scorer = aligned_matching.AlignedScorer(self.the_cat)
+        for large_dmrs in (self.the_dog_chases_the_cat, self.dog_cat):
+            matches = aligned_matching.get_matching_nodeids(self.the_cat, large_dmrs, all_surface=True)
+            results = scorer.score_all(matches, large_dmrs)
+            self.assertEqual(len(results), len(matches))
+            for (subgraph, score), match in zip(results, matches):
+                self.assertEqual(score, aligned_matching.get_score(self.the_cat, subgraph, match))
+        best_graphs, best_score = aligned_matching.get_best_subgraph(
+            aligned_matching.get_matching_nodeids(self.the_cat, self.the_dog_chases_the_cat),
+            self.the_cat, self.the_dog_chases_the_cat, scorer=scorer)
+        self.assertEqual(len(best_graphs), 1)
+        self.assertEqual(best_score, (3, 3, 3))
@@ -0,0 +1,59 @@
+import unittest
+
+from examples import examples_dmrs
+from pydmrs.graphlang.graphlang import parse_graphlang
+from pydmrs.mapping.mapping import dmrs_mapping
+from pydmrs.matching.corpus_index import CorpusIndex, graph_keys, pattern_requirements
+from pydmrs.matching.query import dmrs_query
+
+
+class TestCorpusIndex(unittest.TestCase):
+    def setUp(self):
+        self.corpus = [examples_dmrs.the_dog_chases_the_cat(), examples_dmrs.the_mouse(),
+                       examples_dmrs.the_cat_chases_the_dog()]
+        self.index = CorpusIndex(self.corpus)
+
+    def test_lookup(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertSetEqual(self.index.lookup(('pred', '_chase_v_1')), {0, 2})
+        self.assertSetEqual(self.index.lookup(('link', 'RSTR', 'H')), {0, 1, 2})
+        self.assertSetEqual(self.index.lookup(('edge', '_chase_v_1', 'ARG1', 'NEQ', '_dog_n_1')), {0})
+        self.assertSetEqual(self.index.lookup(('pred', '_elephant_n_1')), set())
+
+    def test_graph_keys(self):
+        keys = graph_keys(parse_graphlang('udef_q --> _cat_n_1 x'))
+        self.assertSetEqual(keys, {('pred', 'udef_q'), ('pred', '_cat_n_1'), ('link', 'RSTR', 'H'),
+                                   ('edge', 'udef_q', 'RSTR', 'H', '_cat_n_1')})
+
+    def test_pattern_requirements(self):
+        search_dmrs = parse_graphlang('_chase_v_1 e? -1-> _dog_n_1 x? <-- _?_q')
+        self.assertSetEqual(pattern_requirements(search_dmrs),
+                            {('pred', '_chase_v_1'), ('pred', '_dog_n_1'), ('link', 'ARG1', 'NEQ'),
+                             ('link', 'RSTR', 'H'), ('edge', '_chase_v_1', 'ARG1', 'NEQ', '_dog_n_1')})
+        # underspecified elements are not required
+        search_dmrs = parse_graphlang('_?_v_1 e? -?-> _?_n_1 x?')
+        self.assertSetEqual(pattern_requirements(search_dmrs), set())
+        # neither are preds with more specific preds in the hierarchy
+        search_dmrs = parse_graphlang('_animal_n_1 x?')
+        self.assertSetEqual(pattern_requirements(search_dmrs, hierarchy={'_animal_n_1': ['_dog_n_1']}), set())
+
+    def test_candidates(self):
+        search_dmrs = parse_graphlang('_chase_v_1 e? -1-> _dog_n_1 x?')
+        self.assertSetEqual(self.index.candidates(search_dmrs), {0})
+        self.assertTrue(self.index.may_match(0, search_dmrs))
+        self.assertFalse(self.index.may_match(1, search_dmrs))
+        self.assertSetEqual(self.index.candidates(parse_graphlang('_?_n_1 x?')), {0, 1, 2})
+
+    def test_query_and_mapping(self):
+        results = list(dmrs_query(self.corpus, '_chase_v_1 e? -1-> _?1_n_1 x?', results_per_dmrs=True,
+                                  corpus_index=self.index))
+        self.assertListEqual(results, [[('dog',)], [], [('cat',)]])
+        search_dmrs = parse_graphlang('[1]:_mouse_n_1 x?')
+        replace_dmrs = parse_graphlang('[1]:_rat_n_1 x?')
+        self.assertIsNone(dmrs_mapping(self.corpus[0], search_dmrs, replace_dmrs, all_matches=False,
+                                       corpus_index=self.index, graph_id=0))
+        mapped = dmrs_mapping(self.corpus[1], search_dmrs, replace_dmrs, all_matches=False,
+                              corpus_index=self.index, graph_id=1)
+        self.assertEqual(str(mapped[2].pred), '_rat_n_1')
+        with self.assertRaises(AssertionError):
+            dmrs_mapping(self.corpus[1], search_dmrs, replace_dmrs, corpus_index=self.index)
@@ -0,0 +1,57 @@
+import unittest
+
+from examples import examples_dmrs
+from pydmrs.components import GPred, RealPred
+from pydmrs.matching.edit_distance import approximate_edit_distance, edit_cost, pred_distance, solve_assignment
+
+
+class TestEditDistance(unittest.TestCase):
+    def test_pred_distance(self):
+        self.assertEqual(pred_distance(RealPred('cat', 'n', '1'), RealPred('cat', 'n', '1')), 0)
+        self.assertEqual(pred_distance(RealPred('cat', 'n', '1'), RealPred('cat', 'v')), 0.5)
+        self.assertEqual(pred_distance(RealPred('cat', 'n', '1'), GPred('udef_q')), 1)
+        self.assertEqual(pred_distance(None, None), 0)
+
+    def test_solve_assignment(self):
+        assignment, cost = solve_assignment([[4, 1, 3], [2, 0, 5]])
+        self.assertListEqual(assignment, [1, 0])
+        self.assertEqual(cost, 3)
+        self.assertEqual(solve_assignment([]), ([], 0))
+
+    def test_edit_cost(self):
+        dmrs1 = examples_dmrs.the_dog_chases_the_cat()
+        dmrs2 = examples_dmrs.the_cat_chases_the_dog()
+        # dog and cat keep their positions, so only the two argument links are swapped
+        mapping = {1: 4, 2: 5, 3: 3, 4: 1, 5: 2}
+        self.assertEqual(edit_cost(dmrs1, dmrs2, mapping), 2)
+        self.assertEqual(edit_cost(dmrs1, dmrs2, {nodeid: nodeid for nodeid in dmrs1}), 2)
+        # deleting all nodes and links, and inserting them
+        self.assertEqual(edit_cost(dmrs1, dmrs2, {nodeid: None for nodeid in dmrs1}), 18)
+
+    def test_identical(self):
+        dmrs = examples_dmrs.the_dog_chases_the_cat()
+        result = approximate_edit_distance(dmrs, examples_dmrs.the_dog_chases_the_cat())
+        self.assertEqual(result.lower_bound, 0)
+        self.assertEqual(result.upper_bound, 0)
+        self.assertDictEqual(result.mapping, {nodeid: nodeid for nodeid in dmrs})
+
+    def test_bounds(self):
+        result = approximate_edit_distance(examples_dmrs.the_dog_chases_the_cat(),
+                                           examples_dmrs.the_cat_chases_the_dog())
+        self.assertLessEqual(result.lower_bound, 2)
+        self.assertGreaterEqual(result.upper_bound, 2)
+        result = approximate_edit_distance(examples_dmrs.the_cat(), examples_dmrs.the_mouse())
+        self.assertEqual(result.lower_bound, 1)
+        self.assertEqual(result.upper_bound, 1)
+
+    def test_different_sizes(self):
+        small = examples_dmrs.the_cat()
+        large = examples_dmrs.the_dog_chases_the_cat()
+        result = approximate_edit_distance(small, large)
+        self.assertListEqual(sorted(result.mapping), [1, 2])
+        reverse = approximate_edit_distance(large, small)
+        self.assertListEqual(sorted(reverse.mapping), [1, 2, 3, 4, 5])
+        self.assertEqual(sum(1 for nodeid in reverse.mapping.values() if nodeid is None), 3)
+        self.assertEqual(reverse.lower_bound, result.lower_bound)
+        self.assertLessEqual(result.lower_bound, result.upper_bound)
+        self.assertEqual(result.upper_bound, edit_cost(small, large, result.mapping))
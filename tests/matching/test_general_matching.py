@@ -1,3 +1,4 @@
+import time
 import unittest
 
 import pydmrs.matching.match_evaluation
@@ -6,6 +7,8 @@ from pydmrs._exceptions import PydmrsTypeError
 from pydmrs.components import InstanceSortinfo, RealPred
 from pydmrs.core import Link, DictDmrs, Node
 from pydmrs.matching import general_matching
+from pydmrs.matching.common import CompatibilityCache
+from pydmrs.matching.exact_matching import MatchBudget
 
 
 class TestMatch(unittest.TestCase):
@@ -46,6 +49,124 @@ class TestMatch(unittest.TestCase):
                                                       (Link(1, 3, 'ARG1', 'NEQ'),
                                                        Link(1, 5, 'ARG2', 'NEQ'))])
 
+    def test_Match_add_without_links(self):
+        match = general_matching.Match([(1, 2)])
+        match.add(general_matching.Match([(3, 4)]))
+        self.assertCountEqual(match.nodeid_pairs, [(1, 2), (3, 4)])
+        self.assertListEqual(match.link_pairs, [])
+        self.match.add(match)
+        # (1, 2) conflicts with (4, 2)
+        self.assertCountEqual(self.match.nodeid_pairs, [(2, 3), (4, 2), (3, 4)])
+        match = general_matching.Match([(5, 1), (6, 3)])
+        match.add(self.match)
+        self.assertCountEqual(match.nodeid_pairs, [(5, 1), (6, 3), (4, 2), (3, 4)])
+        self.assertCountEqual(match.link_pairs, [(Link(4, 5, 'RSTR', 'H'), Link(1, 2, 'RSTR', 'H'))])
+
+    def test_Match_get(self):
+        self.assertEqual(self.match.get_second(4), 2)
+        self.assertEqual(self.match.get_first(3), 2)
+        self.assertIsNone(self.match.get_second(3))
+        # lookups follow in-place extensions
+        self.match.nodeid_pairs.append((5, 1))
+        self.assertEqual(self.match.get_first(1), 5)
+        self.assertTrue(self.match.has_nodeid_pair((5, 1)))
+        self.assertTrue(self.match.has_link(Link(1, 2, 'RSTR', 'H'), second=True))
+        self.assertFalse(self.match.has_link(Link(1, 2, 'RSTR', 'H')))
+
+    def test_Match_is_compatible(self):
+        self.assertTrue(self.match.is_compatible(general_matching.Match([(1, 1)], [])))
+        self.assertFalse(self.match.is_compatible(general_matching.Match([(4, 1)], [])))
+        self.assertFalse(self.match.is_compatible(general_matching.Match([(1, 2)], [])))
+        self.assertTrue(self.match.is_compatible(general_matching.Match()))
+
+
+class TestSelectCompatibleMatches(unittest.TestCase):
+    def setUp(self):
+        # the two small matches together are better than the big one they clash with
+        self.matches = [general_matching.Match([(1, 1), (2, 2), (3, 3)], []),
+                        general_matching.Match([(1, 4), (5, 5)], []),
+                        general_matching.Match([(2, 6), (6, 7)], []),
+                        general_matching.Match([(7, 8)], [])]
+
+    def test_exact(self):
+        groups, exact = general_matching.select_compatible_matches(self.matches)
+        self.assertTrue(exact)
+        self.assertListEqual(groups, [{1, 2, 3}])
+        full_matches = general_matching.find_biggest_disjoint_matches(self.matches)
+        self.assertEqual(len(full_matches), 1)
+        self.assertEqual(len(full_matches[0][1]), 5)
+
+    def test_ties(self):
+        matches = [general_matching.Match([(1, 1)], []), general_matching.Match([(1, 2)], [])]
+        groups, exact = general_matching.select_compatible_matches(matches)
+        self.assertListEqual(groups, [{0}, {1}])
+
+    def test_many_ties(self):
+        # 20 pairs of clashing matches of equal weight have 2^20 optimal groups
+        matches = []
+        for n in range(20):
+            matches.append(general_matching.Match([(n, 100 + n)], []))
+            matches.append(general_matching.Match([(n, 200 + n)], []))
+        start = time.monotonic()
+        groups, exact = general_matching.select_compatible_matches(matches)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertTrue(exact)
+        self.assertEqual(len(groups), general_matching.MAX_TIED_GROUPS)
+        self.assertTrue(all(len(group) == 20 for group in groups))
+        groups, exact = general_matching.select_compatible_matches(matches, max_groups=1)
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(len(general_matching.find_biggest_disjoint_matches(matches, max_groups=3)), 3)
+
+    def test_greedy(self):
+        groups, exact = general_matching.select_compatible_matches(self.matches, max_exact_size=3)
+        self.assertFalse(exact)
+        self.assertTrue(all(sum(len(self.matches[i]) for i in group) <= 5 for group in groups))
+
+    def test_budget(self):
+        # the first group found is kept when the search is cut short
+        budget = MatchBudget(max_states=3)
+        groups, exact = general_matching.select_compatible_matches(self.matches, budget=budget)
+        self.assertFalse(exact)
+        self.assertTrue(budget.truncated)
+        self.assertListEqual(groups, [{0, 3}])
+        # exhausted budgets fall back to greedy groups
+        groups, exact = general_matching.select_compatible_matches(self.matches, budget=budget)
+        self.assertFalse(exact)
+        self.assertTrue(groups)
+        full_matches = general_matching.find_biggest_disjoint_matches(self.matches, budget=budget)
+        self.assertTrue(all(match.approximate for _, match in full_matches))
+
+
+class TestCompatibilityCache(unittest.TestCase):
+    def test_cache(self):
+        cache = CompatibilityCache(maxsize=2)
+        cat = Node(pred=RealPred('cat', 'n', '1'))
+        other_cat = Node(nodeid=5, pred=RealPred('cat', 'n', '1'), cfrom=4, cto=7)
+        animal = Node(pred=RealPred('?', 'n', '1'))
+        self.assertTrue(cache.are_equal_nodes(cat, other_cat))
+        self.assertTrue(cache.are_equal_nodes(other_cat, cat))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertTrue(cache.are_equal_nodes(animal, cat))
+        self.assertFalse(cache.are_equal_nodes(animal, cat, underspecified=False))
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.is_less_specific(animal, cat))
+        self.assertFalse(cache.is_less_specific(cat, animal))
+        self.assertEqual((cache.hits, cache.misses), (1, 5))
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses, cache.hit_rate), (0, 0, 0, 0))
+
+    def test_shared(self):
+        cache = CompatibilityCache()
+        small_dmrs = examples_dmrs.the_dog_chases_the_cat()
+        large_dmrs = examples_dmrs.the_dog_chases_the_cat_and_the_cat_chases_the_mouse()
+        matches = general_matching.find_best_matches(small_dmrs, large_dmrs, compatibility_cache=cache)
+        # the quantifiers, nouns and verbs of the large graph share signatures
+        self.assertGreater(cache.hits, 0)
+        misses = cache.misses
+        shared_matches = general_matching.find_best_matches(small_dmrs, large_dmrs, compatibility_cache=cache)
+        self.assertEqual(cache.misses, misses)
+        self.assertEqual([match.nodeid_pairs for match in shared_matches], [match.nodeid_pairs for match in matches])
+
 
 class TestGeneralMatching(unittest.TestCase):
     def setUp(self):
@@ -84,6 +205,46 @@ class TestGeneralMatching(unittest.TestCase):
         self.assertCountEqual(matches[1].nodeid_pairs, [(2, 8), (1, 7)])
         self.assertCountEqual(matches[1].link_pairs,
                               [(Link(1, 2, 'RSTR', 'H'), Link(7, 8, 'RSTR', 'H'))])
+        self.assertFalse(any(match.approximate for match in matches))
+
+    def test_find_best_matches_deadline(self):
+        matches = general_matching.find_best_matches(self.small_dmrs, self.large_dmrs,
+                                                     deadline=time.monotonic() + 60)
+        self.assertFalse(any(match.approximate for match in matches))
+        # only the first match is extended
+        budget = MatchBudget(max_states=1)
+        approximate_matches = general_matching.find_best_matches(self.small_dmrs, self.large_dmrs, budget=budget)
+        self.assertTrue(budget.truncated)
+        self.assertEqual(len(approximate_matches), 1)
+        self.assertTrue(approximate_matches[0].approximate)
+        self.assertLessEqual(len(approximate_matches[0]), max(len(match) for match in matches))
+        # the deadline expires before the first match
+        self.assertListEqual(general_matching.find_best_matches(self.small_dmrs, self.large_dmrs,
+                                                                deadline=time.monotonic() - 1), [])
+        self.assertIsNone(general_matching.find_best_matches(examples_dmrs.the(), examples_dmrs.dog_cat(),
+                                                             deadline=time.monotonic() + 60))
+
+    def test_find_best_matches_priority(self):
+        small_dmrs = DictDmrs([Node(1, RealPred('dog', 'n', '1')), Node(2, RealPred('the', 'q'))],
+                              [Link(2, 1, 'RSTR', 'H')])
+        large_dmrs = DictDmrs([Node(1, RealPred('dog', 'n', '1')), Node(2, RealPred('dog', 'n', '1')),
+                               Node(3, RealPred('the', 'q'))], [Link(3, 2, 'RSTR', 'H')])
+        # with a budget, the linked dog is tried first
+        matches = general_matching.find_best_matches(small_dmrs, large_dmrs, budget=MatchBudget(max_states=1))
+        self.assertEqual(len(matches), 1)
+        self.assertCountEqual(matches[0].nodeid_pairs, [(1, 2), (2, 3)])
+        self.assertTrue(matches[0].approximate)
+
+    def test_extend_match_deadline(self):
+        match = general_matching.Match()
+        general_matching.extend_match(match, (3, 3), self.small_dmrs, self.large_dmrs)
+        self.assertGreater(len(match.nodeid_pairs), 1)
+        # only the links of the start pair are matched
+        budget = MatchBudget(deadline=time.monotonic() - 1)
+        match = general_matching.Match()
+        general_matching.extend_match(match, (3, 3), self.small_dmrs, self.large_dmrs, budget=budget)
+        self.assertListEqual(match.nodeid_pairs, [(3, 3)])
+        self.assertTrue(budget.truncated)
 
     def test_get_matched_subgraph(self):
         match = general_matching.find_best_matches(self.cat_dmrs, self.small_dmrs)[0]
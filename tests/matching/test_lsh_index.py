@@ -0,0 +1,44 @@
+import io
+import unittest
+
+from examples import examples_dmrs
+from pydmrs.matching.lsh_index import LshIndex, dmrs_shingles
+
+
+class TestLshIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = LshIndex(num_perm=32, bands=16)
+        for dmrs in (examples_dmrs.the_dog_chases_the_cat(), examples_dmrs.the_mouse(),
+                     examples_dmrs.the_cat_chases_the_dog(), examples_dmrs.the_cat()):
+            self.index.add(dmrs)
+
+    def test_shingles(self):
+        shingles = dmrs_shingles(examples_dmrs.the_dog_chases_the_cat())
+        self.assertIn(('pred', '_chase_v_1'), shingles)
+        self.assertIn(('edge', '_chase_v_1', 'ARG1/NEQ', '_dog_n_1'), shingles)
+        self.assertEqual(len(shingles), 8)
+
+    def test_query(self):
+        query = examples_dmrs.the_dog_chases_the_cat()
+        results = self.index.query(query, threshold=0)
+        self.assertEqual(results[0], (0, 1.0))
+        self.assertNotIn(1, [graph_id for graph_id, _ in results])
+        signature = self.index.signature(query)
+        for graph_id, similarity in results:
+            self.assertEqual(similarity, self.index.jaccard(signature, self.index.signatures[graph_id]))
+        self.assertListEqual(self.index.near_duplicates(query, threshold=0), [(0, 1.0)])
+        # 'the cat' is fully matched in all graphs except 'the mouse'
+        results = self.index.near_duplicates(examples_dmrs.the_cat(), threshold=0, verify='general')
+        self.assertCountEqual([graph_id for graph_id, _ in results], [0, 2, 3])
+
+    def test_dump_load(self):
+        filehandle = io.StringIO()
+        self.index.dump(filehandle)
+        filehandle.seek(0)
+        index = LshIndex.load(filehandle)
+        self.assertEqual(len(index), 4)
+        self.assertDictEqual(index.signatures, self.index.signatures)
+        query = examples_dmrs.the_cat_chases_the_dog()
+        self.assertListEqual(index.near_duplicates(query), [(2, 1.0)])
+        self.assertEqual(index.add(query), 4)
+        self.assertListEqual(index.near_duplicates(query), [(2, 1.0), (4, 1.0)])
@@ -0,0 +1,48 @@
+import unittest
+
+from examples import examples_dmrs
+from pydmrs.graphlang.graphlang import parse_graphlang
+from pydmrs.matching.exact_matching import dmrs_exact_matching
+from pydmrs.matching.multi_matching import MultiPatternMatcher
+
+
+class TestMultiPatternMatcher(unittest.TestCase):
+    def setUp(self):
+        self.patterns = {'cat': '_the_q --> _cat_n_1 x?', 'chase': '_chase_v_1 e? -1-> _?_n_1 x?',
+                         'noun': '_?_n_1 x?', 'mouse': '_mouse_n_1 x?', 'cat2': '_the_q --> _cat_n_1 x?'}
+        self.matcher = MultiPatternMatcher(self.patterns)
+
+    def test_same_as_exact_matching(self):
+        for dmrs in (examples_dmrs.the_dog_chases_the_cat(), examples_dmrs.the_mouse(),
+                     examples_dmrs.the_dog_chases_the_cat_and_the_cat_chases_the_mouse()):
+            results = self.matcher.matched(dmrs)
+            for key, pattern in self.patterns.items():
+                expected = list(dmrs_exact_matching(parse_graphlang(pattern), dmrs))
+                self.assertListEqual(results.get(key, []), expected, msg=key)
+
+    def test_deduplication(self):
+        self.assertEqual(len(self.matcher), 5)
+        self.assertEqual(len(self.matcher.unique_patterns), 4)
+
+    def test_deduplicated_results(self):
+        results = self.matcher.matched(examples_dmrs.the_dog_chases_the_cat())
+        self.assertListEqual(results['cat'], results['cat2'])
+        results['cat'][0][1] = None
+        self.assertEqual(results['cat2'][0][1], 4)
+
+    def test_candidate_patterns(self):
+        keys = {key for n in self.matcher.candidate_patterns(examples_dmrs.the_mouse())
+                for key in self.matcher.unique_patterns[n][2]}
+        self.assertSetEqual(keys, {'noun', 'mouse'})
+
+    def test_pattern_list(self):
+        matcher = MultiPatternMatcher([parse_graphlang('_cat_n_1 x?'), parse_graphlang('_dog_n_1 x?')])
+        self.assertListEqual([key for key, _ in matcher.match(examples_dmrs.the_dog_chases_the_cat())], [0, 1])
+
+    def test_shared_links(self):
+        matcher = MultiPatternMatcher(['_the_q --> _cat_n_1 x?', '_chase_v_1 e? -2-> _cat_n_1 x? <-- _the_q',
+                                       '_chase_v_1 e? -2-> _dog_n_1 x?'])
+        # the quantifier link of the first two patterns is shared
+        self.assertEqual(len(matcher.edge_links), 3)
+        dmrs = examples_dmrs.the_dog_chases_the_cat()
+        self.assertDictEqual(matcher.matched(dmrs), {0: [{1: 4, 2: 5}], 1: [{1: 3, 2: 5, 3: 4}]})
@@ -0,0 +1,149 @@
+import time
+import unittest
+
+from examples import examples_dmrs
+from pydmrs._exceptions import PydmrsTypeError
+from pydmrs.components import RealPred, GPred, Pred, PredHierarchy, Sortinfo, EventSortinfo, InstanceSortinfo
+from pydmrs.core import Node, DictDmrs
+from pydmrs.matching.exact_matching import compile_node_test, dmrs_exact_matching, CompiledPattern, MatchBudget
+from pydmrs.matching.query import CompiledQuery, dmrs_query
+
+
+class TestCompileNodeTest(unittest.TestCase):
+    def test_equivalent_to_is_less_specific(self):
+        sub_nodes = [Node(pred=Pred()), Node(pred=RealPred('?', 'n', '?')), Node(pred=RealPred('cat', 'u', '1')),
+                     Node(pred=GPred('?')), Node(pred=GPred('udef_q')), Node(carg='?'),
+                     Node(pred=RealPred('cat', 'n', '1'), sortinfo=InstanceSortinfo(num='sg')),
+                     Node(pred=RealPred('chase', 'v', '1'), sortinfo=EventSortinfo(tense='tensed')),
+                     Node(sortinfo=Sortinfo())]
+        nodes = [Node(), Node(pred=RealPred('cat', 'n', '1')), Node(pred=RealPred('cat', 'n', '1'),
+                                                                    sortinfo=InstanceSortinfo(pers='3', num='sg')),
+                 Node(pred=RealPred('chase', 'v', '1'), sortinfo=EventSortinfo(tense='pres')),
+                 Node(pred=RealPred('chase', 'v', '1'), sortinfo=EventSortinfo(tense='untensed')),
+                 Node(pred=GPred('udef_q')), Node(pred=GPred('named'), carg='Kim'), Node(sortinfo=Sortinfo())]
+        for sub_node in sub_nodes:
+            test = compile_node_test(sub_node)
+            for node in nodes:
+                try:
+                    expected = sub_node == node
+                except PydmrsTypeError:  # comparing a pred with None
+                    expected = False
+                try:
+                    expected = expected or sub_node.is_less_specific(node)
+                except PydmrsTypeError:
+                    pass
+                self.assertEqual(test(node), expected, msg='{} / {}'.format(sub_node, node))
+
+    def test_hierarchy(self):
+        test = compile_node_test(Node(pred=RealPred('animal', 'n', '1')), hierarchy={'_animal_n_1': ('_cat_n_1',)})
+        self.assertTrue(test(Node(pred=RealPred('cat', 'n', '1'))))
+        self.assertFalse(test(Node(pred=RealPred('dog', 'n', '1'))))
+        hierarchy = PredHierarchy({'_animal_n_1': ['_mammal_n_1'], '_mammal_n_1': ['_cat_n_1']})
+        test = compile_node_test(Node(pred=RealPred('animal', 'n', '1')), hierarchy=hierarchy)
+        self.assertTrue(test(Node(pred=RealPred('cat', 'n', '1'))))
+        self.assertTrue(test(Node(pred=RealPred('animal', 'n', '1'))))
+        self.assertFalse(test(Node(pred=RealPred('dog', 'n', '1'))))
+        search_dmrs = examples_dmrs.the_cat()
+        search_dmrs[2].pred = RealPred('animal', 'n', '1')
+        matches = list(dmrs_exact_matching(search_dmrs, examples_dmrs.the_dog_chases_the_cat(), hierarchy=hierarchy))
+        self.assertListEqual(matches, [{1: 4, 2: 5}])
+
+
+class TestCompiledPattern(unittest.TestCase):
+    def test_match_many(self):
+        pattern = CompiledPattern(examples_dmrs.the_cat())
+        self.assertEqual(len(list(pattern.match(examples_dmrs.the_dog_chases_the_cat()))), 1)
+        self.assertEqual(len(list(pattern.match(
+            examples_dmrs.the_dog_chases_the_cat_and_the_cat_chases_the_mouse()))), 2)
+        self.assertEqual(len(list(pattern.match(examples_dmrs.the_mouse()))), 0)
+
+    def test_dmrs_exact_matching(self):
+        pattern = CompiledPattern(DictDmrs(nodes=[Node(nodeid=1, pred=RealPred('?', 'n', '?'), sortinfo=Sortinfo())]))
+        self.assertEqual(len(list(dmrs_exact_matching(pattern, examples_dmrs.the_dog_chases_the_cat()))), 2)
+
+
+class TestMatchBudget(unittest.TestCase):
+    def setUp(self):
+        self.sub_dmrs = DictDmrs(nodes=[Node(nodeid=1, pred=Pred(), sortinfo=Sortinfo()),
+                                        Node(nodeid=2, pred=Pred(), sortinfo=Sortinfo())])
+        self.dmrs = examples_dmrs.the_dog_chases_the_cat_and_the_cat_chases_the_mouse()
+
+    def test_unlimited(self):
+        budget = MatchBudget()
+        results = list(dmrs_exact_matching(self.sub_dmrs, self.dmrs, budget=budget))
+        self.assertEqual(len(results), 90)
+        self.assertEqual(budget.results, 90)
+        self.assertFalse(budget.truncated)
+
+    def test_max_results(self):
+        results = dmrs_exact_matching(self.sub_dmrs, self.dmrs, max_results=3)
+        self.assertEqual(len(list(results)), 3)
+        self.assertTrue(results.truncated)
+        results = dmrs_exact_matching(self.sub_dmrs, self.dmrs, max_results=90)
+        self.assertEqual(len(list(results)), 90)
+        self.assertFalse(results.truncated)
+        budget = MatchBudget(max_results=90)
+        self.assertEqual(len(list(dmrs_exact_matching(self.sub_dmrs, self.dmrs, budget=budget))), 90)
+        self.assertFalse(budget.truncated)
+        budget = MatchBudget(max_results=89)
+        self.assertEqual(len(list(dmrs_exact_matching(self.sub_dmrs, self.dmrs, budget=budget))), 89)
+        self.assertTrue(budget.truncated)
+
+    def test_max_states_and_deadline(self):
+        budget = MatchBudget(max_states=5)
+        results = list(dmrs_exact_matching(self.sub_dmrs, self.dmrs, budget=budget))
+        self.assertLess(len(results), 90)
+        self.assertTrue(budget.truncated)
+        budget = MatchBudget(deadline=time.monotonic() - 1)
+        self.assertListEqual(list(dmrs_exact_matching(self.sub_dmrs, self.dmrs, budget=budget)), [])
+        self.assertTrue(budget.truncated)
+        results = dmrs_exact_matching(self.sub_dmrs, self.dmrs, max_states=5)
+        self.assertLess(len(list(results)), 90)
+        self.assertTrue(results.truncated)
+        results = dmrs_exact_matching(self.sub_dmrs, self.dmrs, deadline=time.monotonic() + 60)
+        self.assertEqual(len(list(results)), 90)
+        self.assertFalse(results.truncated)
+
+    def test_query(self):
+        dmrs_list = [examples_dmrs.the_dog_chases_the_cat(), examples_dmrs.the_cat_chases_the_dog()]
+        budget = MatchBudget(max_results=3)
+        self.assertListEqual(list(dmrs_query(dmrs_list, '_?1_n_1 x?', budget=budget)), [('dog',), ('cat',), ('cat',)])
+        self.assertTrue(budget.truncated)
+        results = dmrs_query(dmrs_list, '_?1_n_1 x?', max_results=3)
+        self.assertListEqual(list(results), [('dog',), ('cat',), ('cat',)])
+        self.assertTrue(results.truncated)
+        results = dmrs_query(dmrs_list, '_?1_n_1 x?', results_per_dmrs=True)
+        self.assertEqual(len(list(results)), 2)
+        self.assertFalse(results.truncated)
+
+
+class TestCompiledQuery(unittest.TestCase):
+    def setUp(self):
+        self.dmrs_list = [examples_dmrs.the_dog_chases_the_cat(), examples_dmrs.the_cat_chases_the_dog(),
+                          examples_dmrs.the_mouse()]
+
+    def test_run(self):
+        query = CompiledQuery('_chase_v_1 e? -1-> _?1_n_1 x?')
+        self.assertListEqual(list(query.run(self.dmrs_list[0])), [('dog',)])
+        self.assertListEqual(list(query.run(self.dmrs_list[1], results_as_dict=True)), [{'1': 'cat'}])
+
+    def test_run_many(self):
+        query = CompiledQuery('_?1_n_1 x? <-1- _chase_v_1 e? -2-> _?2_n_1 x?')
+        self.assertListEqual(list(query.run_many(self.dmrs_list)), [('dog', 'cat'), ('cat', 'dog')])
+        self.assertListEqual(list(query.run_many(self.dmrs_list, results_per_dmrs=True)),
+                             [[('dog', 'cat')], [('cat', 'dog')], []])
+        # dmrs_query accepts compiled queries
+        self.assertListEqual(list(dmrs_query(self.dmrs_list, query, results_as_dict=True)),
+                             [{'1': 'dog', '2': 'cat'}, {'1': 'cat', '2': 'dog'}])
+
+    def test_equalities(self):
+        query = CompiledQuery('_=1_n_1 x? <-1- _chase_v_1 e? -2-> _=1_n_1 x?')
+        self.assertListEqual(list(query.run_many(self.dmrs_list)), [])
+        query = CompiledQuery('_=1_n_1 x? <-1- _chase_v_1 e? -2-> _=2_n_1 x?')
+        self.assertListEqual(list(query.run_many(self.dmrs_list)), [(), ()])
+
+    def test_modes(self):
+        query = CompiledQuery('_?1_n_1 x? <-1- _chase_v_1 e?')
+        self.assertListEqual(list(query.run_many(self.dmrs_list, mode='count')), [1, 1, 0])
+        self.assertListEqual(list(dmrs_query(self.dmrs_list, '_?1_n_1 x?', mode='count')), [2, 2, 1])
+        self.assertListEqual(list(dmrs_query(self.dmrs_list, query, mode='exists')), [True, True, False])
@@ -0,0 +1,32 @@
+import unittest
+
+from examples import examples_dmrs
+from pydmrs.matching.similarity_index import SimilarityIndex, dmrs_sketch
+
+
+class TestSimilarityIndex(unittest.TestCase):
+    def setUp(self):
+        self.corpus = [examples_dmrs.the_mouse(), examples_dmrs.the_dog_chases_the_cat(),
+                       examples_dmrs.the_cat_chases_the_dog(), examples_dmrs.the_cat()]
+        self.index = SimilarityIndex.build(self.corpus)
+
+    def test_sketch(self):
+        sketch = dmrs_sketch(examples_dmrs.the_cat())
+        self.assertEqual(sketch[('pred', '_the_q')], 1)
+        self.assertEqual(sketch[('edge', '_the_q', 'RSTR/H', '_cat_n_1')], 1)
+        self.assertEqual(sum(sketch.values()), 3)
+
+    def test_shortlist(self):
+        shortlist = self.index.shortlist(examples_dmrs.the_cat(), 10)
+        self.assertEqual(shortlist[0], (3, 1.0))
+        self.assertListEqual([graph_id for graph_id, _ in shortlist], [3, 1, 2, 0])
+        self.assertListEqual(self.index.shortlist(examples_dmrs.the_cat(), 2), shortlist[:2])
+
+    def test_top_k(self):
+        query = examples_dmrs.the_dog_chases_the_cat()
+        for rerank in ('general', 'aligned', None):
+            results = self.index.top_k(query, k=2, rerank=rerank)
+            self.assertEqual(results[0], (1, 1.0), msg=rerank)
+            self.assertEqual(results[1][0], 2, msg=rerank)
+        results = self.index.top_k(query, k=1, rerank=lambda query, dmrs: -len(dmrs))
+        self.assertEqual(results, [(3, -2)])
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from examples import examples_dmrs
+
+try:
+    import numpy
+    from pydmrs.matching.similarity_matrix import iter_tiles, pair_similarity, similarity_matrix
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestSimilarityMatrix(unittest.TestCase):
+    def setUp(self):
+        self.graphs = [examples_dmrs.the_dog_chases_the_cat(), examples_dmrs.the_cat(), examples_dmrs.the_mouse(),
+                       examples_dmrs.the_cat_chases_the_dog(), examples_dmrs.the_dog_chases_the_mouse()]
+
+    def test_iter_tiles(self):
+        self.assertListEqual(list(iter_tiles(5, 2)), [(0, 2, 0, 2), (0, 2, 2, 4), (0, 2, 4, 5), (2, 4, 2, 4),
+                                                      (2, 4, 4, 5), (4, 5, 4, 5)])
+
+    def test_similarity_matrix(self):
+        matrix = similarity_matrix(self.graphs, tile_size=2, processes=0)
+        self.assertEqual(matrix.shape, (5, 5))
+        self.assertTrue(numpy.array_equal(matrix, matrix.T))
+        self.assertTrue((numpy.diag(matrix) == 1).all())
+        # 'the cat' (3 elements) is fully matched in 'the dog chases the cat' (9 elements)
+        self.assertAlmostEqual(matrix[0, 1], 0.5)
+        self.assertEqual(matrix[1, 2], 0)
+        self.assertAlmostEqual(matrix[3, 4], pair_similarity(self.graphs[3], self.graphs[4]))
+        parallel = similarity_matrix(self.graphs, tile_size=2, processes=2)
+        self.assertTrue(numpy.array_equal(parallel, matrix))
+
+    def test_without_links(self):
+        graphs = [examples_dmrs.the(), examples_dmrs.dog_cat(),
+                  examples_dmrs.the_dog_chases_the_cat_and_the_cat_chases_the_mouse()]
+        matrix = similarity_matrix(graphs, tile_size=2, processes=0)
+        self.assertTrue((numpy.diag(matrix) == 1).all())
+        self.assertGreater(matrix[1, 2], 0)
+        self.assertAlmostEqual(matrix[1, 2], pair_similarity(graphs[2], graphs[1]))
+
+    def test_order(self):
+        # 'the' is fully matched in 'the cat', whichever graph comes first
+        self.assertAlmostEqual(pair_similarity(examples_dmrs.the(), examples_dmrs.the_cat()), 0.5)
+        self.assertAlmostEqual(pair_similarity(examples_dmrs.the_cat(), examples_dmrs.the()), 0.5)
+        matrix = similarity_matrix([examples_dmrs.the(), examples_dmrs.the_cat()], processes=0)
+        swapped = similarity_matrix([examples_dmrs.the_cat(), examples_dmrs.the()], processes=0)
+        self.assertTrue(numpy.array_equal(matrix, swapped))
+        self.assertAlmostEqual(matrix[0, 1], 0.5)
+
+    def test_custom_similarity(self):
+        # the diagonal is computed with the given similarity as well
+        matrix = similarity_matrix(self.graphs, tile_size=2, processes=0, similarity=lambda x, y: len(x) + len(y))
+        self.assertListEqual(list(numpy.diag(matrix)), [2 * len(graph) for graph in self.graphs])
+        self.assertEqual(matrix[0, 1], len(self.graphs[0]) + len(self.graphs[1]))
+
+    def test_resume(self):
+        matrix = similarity_matrix(self.graphs, tile_size=2, processes=0)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'matrix.npy')
+            partial = similarity_matrix(self.graphs[:4], out=None, tile_size=2, processes=0)
+            stored = numpy.lib.format.open_memmap(filename, mode='w+', dtype=numpy.float64, shape=(5, 5))
+            stored[:] = numpy.nan
+            stored[:4, :4] = partial
+            # one entry of an otherwise computed tile is missing
+            stored[0, 3] = stored[3, 0] = numpy.nan
+            stored.flush()
+            del stored
+            resumed = similarity_matrix(self.graphs, out=filename, tile_size=2, processes=0)
+            self.assertTrue(numpy.array_equal(resumed, matrix))
+            self.assertTrue(numpy.array_equal(numpy.load(filename), matrix))
+            del resumed
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from examples import examples_dmrs
+from pydmrs.components import RealPred
+from pydmrs.core import DictDmrs, Link, Node
+from pydmrs.graphlang.graphlang import parse_graphlang
+from pydmrs.matching.exact_matching import dmrs_exact_matching
+from pydmrs.matching.sqlite_store import SqliteDmrsStore
+
+
+class TestSqliteDmrsStore(unittest.TestCase):
+    def setUp(self):
+        self.store = SqliteDmrsStore()
+        self.graph_ids = self.store.add_all([examples_dmrs.the_dog_chases_the_cat(), examples_dmrs.the_mouse(),
+                                             examples_dmrs.the_cat_chases_the_dog()])
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_add_remove(self):
+        self.assertEqual(len(self.store), 3)
+        dmrs = self.store[self.graph_ids[1]]
+        self.assertListEqual(sorted(str(node.pred) for node in dmrs.iter_nodes()), ['_mouse_n_1', '_the_q'])
+        self.store.remove(self.graph_ids[1])
+        self.assertEqual(len(self.store), 2)
+        self.assertNotIn(self.graph_ids[1], self.store)
+        with self.assertRaises(KeyError):
+            self.store[self.graph_ids[1]]
+
+    def test_candidate_bindings(self):
+        search_dmrs = parse_graphlang('_chase_v_1 e? -1-> _dog_n_1 x?')
+        self.assertListEqual(list(self.store.candidate_bindings(search_dmrs)), [(self.graph_ids[0], {1: 3, 2: 2})])
+        search_dmrs = parse_graphlang('_the_q --> _?_n_1 x?')
+        self.assertListEqual(self.store.candidate_graph_ids(search_dmrs), self.graph_ids)
+        search_dmrs = parse_graphlang('_elephant_n_1 x?')
+        self.assertListEqual(list(self.store.candidate_bindings(search_dmrs)), [])
+
+    def test_match(self):
+        results = list(self.store.match('_the_q --> _?_n_1 x?'))
+        self.assertEqual(len(results), 5)
+        results = list(self.store.match('_chase_v_1 e? -2-> _?_n_1 x[3s_+_]'))
+        self.assertCountEqual(results, [(self.graph_ids[0], {1: 3, 2: 5}), (self.graph_ids[2], {1: 3, 2: 5})])
+
+    def test_match_without_post(self):
+        dmrs = DictDmrs([Node(1, RealPred('chase', 'v', '1')), Node(2, RealPred('dog', 'n', '1'))],
+                        [Link(1, 2, 'ARG1', None)])
+        graph_id = self.store.add(dmrs)
+        search_dmrs = DictDmrs([Node(1, RealPred('chase', 'v', '1')), Node(2, RealPred('dog', 'n', '1'))],
+                               [Link(1, 2, 'ARG1', None)])
+        expected = list(dmrs_exact_matching(search_dmrs, dmrs))
+        self.assertListEqual(expected, [{1: 1, 2: 2}])
+        self.assertListEqual(list(self.store.match(search_dmrs)), [(graph_id, matching) for matching in expected])
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dmrs.sqlite')
+            with SqliteDmrsStore(path) as store:
+                store.add(examples_dmrs.the_cat())
+            with SqliteDmrsStore(path) as store:
+                self.assertEqual(len(store), 1)
+                self.assertEqual(len(list(store.match('_cat_n_1 x?'))), 1)
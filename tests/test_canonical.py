@@ -0,0 +1,71 @@
+import unittest
+
+from examples import examples_dmrs
+from pydmrs.canonical import canonical_form, canonical_hash, wl_labels
+from pydmrs.components import RealPred
+from pydmrs.core import DictDmrs, Link, ListDmrs, Node
+
+
+class TestCanonicalHash(unittest.TestCase):
+    def test_renumbered(self):
+        dmrs = examples_dmrs.the_dog_chases_the_cat()
+        renumbered = examples_dmrs.the_dog_chases_the_cat().convert_to(DictDmrs)
+        for old_id, new_id in ((1, 15), (5, 11), (3, 13), (2, 1)):
+            renumbered.renumber_node(old_id, new_id)
+        self.assertEqual(canonical_hash(renumbered), canonical_hash(dmrs))
+        self.assertEqual(renumbered.canonical_hash(), dmrs.canonical_hash())
+        # both quantifiers are distinguished by their restrictions
+        labels = wl_labels(dmrs)
+        self.assertEqual(len(set(labels.values())), 5)
+
+    def test_different(self):
+        dmrs = examples_dmrs.the_dog_chases_the_cat()
+        self.assertNotEqual(dmrs.canonical_hash(), examples_dmrs.the_cat_chases_the_dog().canonical_hash())
+        self.assertNotEqual(dmrs.canonical_hash(), examples_dmrs.the_dog_chases_the_mouse().canonical_hash())
+        without_index = examples_dmrs.the_dog_chases_the_cat()
+        without_index.index = None
+        self.assertNotEqual(dmrs.canonical_hash(), without_index.canonical_hash())
+        relabelled = examples_dmrs.the_dog_chases_the_cat()
+        relabelled.remove_link(Link(3, 2, 'ARG1', 'NEQ'))
+        relabelled.add_link(Link(3, 2, 'ARG3', 'NEQ'))
+        self.assertNotEqual(dmrs.canonical_hash(), relabelled.canonical_hash())
+        # spans and graph attributes are ignored
+        unaligned = examples_dmrs.the_dog_chases_the_cat()
+        unaligned.surface = None
+        for node in unaligned.iter_nodes():
+            node.cfrom = node.cto = None
+        self.assertEqual(dmrs.canonical_hash(), unaligned.canonical_hash())
+
+
+class TestCanonicalForm(unittest.TestCase):
+    def test_canonical_form(self):
+        dmrs = examples_dmrs.the_dog_chases_the_cat()
+        renumbered = examples_dmrs.the_dog_chases_the_cat().convert_to(DictDmrs)
+        for old_id, new_id in ((1, 15), (5, 11), (3, 13), (2, 1)):
+            renumbered.renumber_node(old_id, new_id)
+        renumbering, canonical_bytes = canonical_form(dmrs)
+        self.assertEqual(sorted(renumbering.values()), [1, 2, 3, 4, 5])
+        self.assertEqual(renumbered.canonical_form()[1], canonical_bytes)
+        self.assertEqual(renumbered.canonical_form()[0][13], renumbering[3])
+        self.assertTrue(dmrs.is_isomorphic(renumbered))
+        self.assertFalse(dmrs.is_isomorphic(examples_dmrs.the_cat_chases_the_dog()))
+        self.assertFalse(dmrs.is_isomorphic(examples_dmrs.the_dog_chases_the_mouse()))
+        self.assertTrue(ListDmrs().is_isomorphic(ListDmrs()))
+
+    def test_symmetric(self):
+        # a cycle with a distinguished node in either direction, which refinement alone cannot tell apart
+        def cycle(nodeids, top):
+            dmrs = ListDmrs()
+            for nodeid in nodeids:
+                dmrs.add_node(Node(nodeid=nodeid, pred=RealPred('x', 'n')))
+            for nodeid1, nodeid2 in zip(nodeids, nodeids[1:] + nodeids[:1]):
+                dmrs.add_link(Link(nodeid1, nodeid2, None, 'EQ'))
+            dmrs.add_node(Node(nodeid=10, pred=RealPred('y', 'n')))
+            dmrs.add_link(Link(10, nodeids[0], 'ARG1', 'NEQ'))
+            dmrs.add_link(Link(10, nodeids[2], 'ARG2', 'NEQ'))
+            dmrs.top = dmrs[top]
+            return dmrs
+        dmrs = cycle([1, 2, 3, 4, 5, 6], 2)
+        self.assertTrue(dmrs.is_isomorphic(cycle([6, 5, 4, 3, 2, 1], 5)))
+        self.assertTrue(dmrs.is_isomorphic(cycle([3, 4, 5, 6, 1, 2], 4)))
+        self.assertFalse(dmrs.is_isomorphic(cycle([1, 2, 3, 4, 5, 6], 4)))
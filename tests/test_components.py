@@ -1,7 +1,9 @@
+import os
+import tempfile
 import unittest, warnings
 
 from pydmrs.components import (
-    Pred, RealPred, GPred,
+    Pred, RealPred, GPred, PredHierarchy,
     Sortinfo, EventSortinfo, InstanceSortinfo
 )
 
@@ -437,6 +439,54 @@ class TestPred(unittest.TestCase):
         self.assertGreaterEqual(the, pron)
 
 
+class TestPredHierarchy(unittest.TestCase):
+    """
+    Test the precompiled predicate hierarchy
+    """
+
+    def setUp(self):
+        self.hierarchy = PredHierarchy({'_animal_n_1': ['_mammal_n_1', '_bird_n_1'],
+                                        RealPred('mammal', 'n', '1'): [RealPred('cat', 'n', '1')]})
+
+    def test_PredHierarchy_closure(self):
+        """
+        More specific preds should include indirect ones
+        """
+        self.assertSetEqual(set(self.hierarchy.get('_animal_n_1')), {'_mammal_n_1', '_bird_n_1', '_cat_n_1'})
+        self.assertSetEqual(set(self.hierarchy['_mammal_n_1']), {'_cat_n_1'})
+        self.assertIsNone(self.hierarchy.get('_cat_n_1'))
+        self.assertNotIn('_cat_n_1', self.hierarchy)
+        self.assertEqual(len(self.hierarchy), 2)
+
+    def test_PredHierarchy_subsumes(self):
+        """
+        Subsumption should be strict and transitive, for preds and strings
+        """
+        animal = RealPred('animal', 'n', '1')
+        cat = RealPred('cat', 'n', '1')
+        self.assertTrue(self.hierarchy.subsumes(animal, cat))
+        self.assertTrue(self.hierarchy.subsumes('_animal_n_1', '_cat_n_1'))
+        self.assertFalse(self.hierarchy.subsumes(cat, animal))
+        self.assertFalse(self.hierarchy.subsumes(cat, cat))
+        self.assertFalse(self.hierarchy.subsumes(animal, RealPred('dog', 'n', '1')))
+        self.assertFalse(self.hierarchy.subsumes(animal, Pred()))
+        self.assertTrue(cat.is_more_specific(animal, hierarchy=self.hierarchy))
+        self.assertTrue(animal.is_less_specific(cat, hierarchy=self.hierarchy))
+        self.assertFalse(animal.is_less_specific(cat, hierarchy={'_animal_n_1': ['_mammal_n_1']}))
+        self.assertFalse(GPred('pron').is_more_specific(animal, hierarchy=self.hierarchy))
+
+    def test_PredHierarchy_from_file(self):
+        """
+        Hierarchy files should list a pred followed by more specific preds per line
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'hierarchy.txt')
+            with open(filename, 'w') as file:
+                file.write('# animals\n"_animal_n_1_rel" _mammal_n_1 _bird_n_1\n\n_mammal_n_1 _cat_n_1\n')
+            hierarchy = PredHierarchy.from_file(filename)
+        self.assertSetEqual(set(hierarchy['_animal_n_1']), set(self.hierarchy['_animal_n_1']))
+
+
 class TestSortinfo(unittest.TestCase):
     """
     Test methods of SortInfo and subclasses
@@ -351,3 +351,29 @@ class TestDmrs(unittest.TestCase):
         in_it = self.test_dmrs.iter_incoming(3)
         with self.assertRaises(StopIteration):
             next(in_it)
+
+
+class TestSpanIndex(unittest.TestCase):
+    """
+    Test span queries of SpanIndex
+    """
+
+    def setUp(self):
+        self.span_index = examples_dmrs.the_dog_chases_the_cat().span_index()
+
+    def test_overlapping(self):
+        self.assertListEqual(self.span_index.overlapping(5, 9), [2, 3])
+        self.assertListEqual(self.span_index.overlapping(7, 8), [])
+        self.assertListEqual(self.span_index.overlapping(0, 30), [1, 2, 3, 4, 5])
+
+    def test_contained(self):
+        self.assertListEqual(self.span_index.contained(4, 18), [2, 3, 4])
+        self.assertListEqual(self.span_index.contained(5, 18), [3, 4])
+
+    def test_covering(self):
+        self.assertListEqual(self.span_index.covering(9, 10), [3])
+        self.assertListEqual(self.span_index.covering(4, 8), [])
+
+    def test_max_cto(self):
+        self.assertEqual(self.span_index.max_cto(0, 3), 14)
+        self.assertIsNone(self.span_index.max_cto(2, 2))